@@ -0,0 +1,59 @@
+"""
+Compares two benchmark result files and exits non-zero on regressions.
+
+    python -m benchmarks.compare benchmarks/results/<base>.json benchmarks/results/<new>.json --threshold 0.15
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+METRICS = ("p50_ms", "p95_ms", "p99_ms", "throughput_rps")
+
+
+def _key(scenario: dict) -> tuple:
+    return scenario["endpoint"], scenario["range"], scenario["interval"], scenario["concurrency"]
+
+
+def compare(base: dict, new: dict, threshold: float) -> list[str]:
+    """Returns one line per scenario/metric that got worse by more than `threshold` (relative)."""
+    base_by_key = {_key(s): s for s in base["scenarios"]}
+    regressions = []
+    for scenario in new["scenarios"]:
+        previous = base_by_key.get(_key(scenario))
+        if previous is None:
+            continue
+        for metric in METRICS:
+            old, cur = previous[metric], scenario[metric]
+            if not old:
+                continue
+            # Latency regresses upwards, throughput downwards
+            change = (cur - old) / old if metric.endswith("_ms") else (old - cur) / old
+            if change > threshold:
+                endpoint, range_name, interval, level = _key(scenario)
+                regressions.append(
+                    f"{endpoint} {range_name or '-'} {interval} c={level} {metric}: "
+                    f"{old:.1f} -> {cur:.1f} ({change:+.0%})"
+                )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base", type=Path)
+    parser.add_argument("new", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.15, help="relative change treated as a regression")
+    args = parser.parse_args(argv)
+
+    base = json.loads(args.base.read_text())
+    new = json.loads(args.new.read_text())
+    regressions = compare(base, new, args.threshold)
+    print(f"{base['commit']} -> {new['commit']}: {len(regressions)} regression(s)")
+    for line in regressions:
+        print(f"  {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
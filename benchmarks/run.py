@@ -0,0 +1,252 @@
+"""
+Offline latency/throughput benchmark of the HTTP API against local upstream stand-ins.
+
+    python -m benchmarks.run                       # full matrix, results/<commit>.json
+    python -m benchmarks.run --quick               # 1w/1y ranges, concurrency 1 and 8
+    python -m benchmarks.run --endpoints /selic --ranges 1y 20y --concurrency 1 16
+
+Compare two runs with `python -m benchmarks.compare`.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import requests
+import uvicorn
+
+from . import standins
+from .standins import StandInConfig, StandInSearch, StandInServer, StandInTicker
+
+RESULTS_DIR = Path(__file__).parent / "results"
+API_KEY = "bench-key"
+END = datetime(2025, 1, 1, tzinfo=timezone.utc)
+TICKERS = ("BTC-USD", "ETH-USD", "AAPL", "MSFT", "SPY", "QQQ", "PETR4.SA", "VALE3.SA")
+
+RANGES = {"1w": 7, "1m": 30, "1y": 365, "5y": 5 * 365, "20y": 20 * 365}
+# Yahoo only serves hourly bars for the last 730 days
+MAX_HOURLY_DAYS = 730
+CONCURRENCY = (1, 8, 32)
+RANGED_ENDPOINTS = ("/ticker", "/ticker/prices", "/selic")
+POINT_ENDPOINTS = ("/ticker/price", "/tickers/search", "/binance/buy")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _git_commit() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def install_standins(base_url: str) -> None:
+    """Routes every upstream the service talks to through the stand-in server."""
+    from src import service
+    from src.app.dependencies import load_api_keys
+    from src.binance import client as binance_client
+
+    standins.use_standins(base_url)
+    service.yf = SimpleNamespace(Ticker=StandInTicker, Search=StandInSearch)
+    service.BCB_SELIC_URL = f"{base_url}/dados/serie/bcdata.sgs.11/dados"
+    reset_service_state()
+    binance_client._client = binance_client.BinanceClient(api_key="bench", api_secret="bench", base_url=base_url)
+    os.environ["FINAPP_URL"] = base_url
+    os.environ["API_KEY"] = API_KEY
+    load_api_keys()
+
+
+def reset_service_state() -> None:
+    """
+    Empties the in-process caches and starts a fresh series store. Cache keys do not include the stand-in
+    bar interval, so without this a scenario would be answered from data an earlier one loaded.
+    """
+    from src import service
+    from src.storage import SeriesStore
+
+    service._store = SeriesStore(tempfile.mkdtemp(prefix="holdings-bench-series-"))
+    service.clear_caches()
+
+
+class ApiServer:
+    def __init__(self):
+        from src.app.main import app
+
+        # main.py configures INFO logging; per-request log lines would dominate the timings
+        logging.getLogger().setLevel(logging.WARNING)
+        self.port = _free_port()
+        config = uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning", access_log=False)
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self) -> "ApiServer":
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+
+    def stop(self) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+
+
+def _request_for(endpoint: str, range_days: int | None, i: int) -> tuple[str, dict, dict | None]:
+    ticker = TICKERS[i % len(TICKERS)]
+    start = END - timedelta(days=range_days or 1)
+    if endpoint == "/ticker":
+        return "GET", {"ticker": ticker, "start": start.isoformat(), "end": END.isoformat()}, None
+    if endpoint == "/ticker/prices":
+        return "GET", {"ticker": ticker, "from_date": start.isoformat(), "to_date": END.isoformat()}, None
+    if endpoint == "/selic":
+        return "GET", {"start": start.date().isoformat(), "end": END.date().isoformat(), "ir": "true"}, None
+    if endpoint == "/ticker/price":
+        # Step back over a couple of weeks so equities hit trading days and closed days alike
+        return "GET", {"ticker": ticker, "date": (END - timedelta(days=1 + i % 14)).isoformat()}, None
+    if endpoint == "/tickers/search":
+        return "GET", {"q": ("bitcoin", "apple", "petro", "vale", "micro")[i % 5]}, None
+    if endpoint == "/binance/buy":
+        return "POST", {}, {"ticker": "BTCBRL", "value": 10.0}
+    raise ValueError(f"Unknown endpoint {endpoint}")
+
+
+def run_scenario(base_url: str, endpoint: str, range_name: str | None, interval: str,
+                 concurrency: int, total: int) -> dict:
+    StandInConfig.bar_interval = interval
+    reset_service_state()
+    range_days = RANGES.get(range_name) if range_name else None
+    local = threading.local()
+    headers = {"Authorization": f"Bearer {API_KEY}"}
+
+    def call(i: int) -> tuple[float, int, int]:
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        method, params, body = _request_for(endpoint, range_days, i)
+        start = time.perf_counter()
+        resp = session.request(method, f"{base_url}{endpoint}", params=params, json=body, headers=headers, timeout=120)
+        content = resp.content
+        return time.perf_counter() - start, resp.status_code, len(content)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(call, range(total)))
+    wall = time.perf_counter() - started
+
+    latencies = np.array([r[0] for r in results]) * 1000.0
+    statuses: dict[str, int] = {}
+    for _, code, _ in results:
+        statuses[str(code)] = statuses.get(str(code), 0) + 1
+    # 404s are expected from /ticker/price on closed days; only server errors count
+    errors = sum(1 for r in results if r[1] >= 500)
+    return {
+        "endpoint": endpoint,
+        "range": range_name,
+        "interval": interval,
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "statuses": statuses,
+        "throughput_rps": total / wall,
+        "mean_ms": float(latencies.mean()),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "response_bytes": int(np.mean([r[2] for r in results])),
+    }
+
+
+def scenario_matrix(endpoints, ranges, intervals, concurrency) -> list[tuple[str, str | None, str, int]]:
+    matrix = []
+    for endpoint in endpoints:
+        for level in concurrency:
+            if endpoint not in RANGED_ENDPOINTS:
+                matrix.append((endpoint, None, "1d", level))
+                continue
+            for range_name in ranges:
+                # SELIC is a daily series; the interval dimension only applies to price history
+                for interval in intervals if endpoint != "/selic" else ("1d",):
+                    if interval == "1h" and RANGES[range_name] > MAX_HOURLY_DAYS:
+                        continue
+                    matrix.append((endpoint, range_name, interval, level))
+    return matrix
+
+
+def main(argv: list[str] | None = None) -> dict:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoints", nargs="+", default=list(RANGED_ENDPOINTS + POINT_ENDPOINTS))
+    parser.add_argument("--ranges", nargs="+", default=list(RANGES), choices=list(RANGES))
+    parser.add_argument("--intervals", nargs="+", default=["1d", "1h"], choices=["1d", "1h"])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=list(CONCURRENCY))
+    parser.add_argument("--requests", type=int, default=40, help="requests per scenario")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="multiplier for simulated upstream latency")
+    parser.add_argument("--quick", action="store_true", help="1w/1y ranges at concurrency 1 and 8")
+    parser.add_argument("--output", type=Path, help="defaults to benchmarks/results/<commit>.json")
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        args.ranges, args.concurrency = ["1w", "1y"], [1, 8]
+    StandInConfig.latency = {k: v * args.latency_scale for k, v in StandInConfig.latency.items()}
+
+    upstream = StandInServer().start()
+    install_standins(upstream.url)
+    api = ApiServer().start()
+    try:
+        scenarios = []
+        for endpoint, range_name, interval, level in scenario_matrix(
+            args.endpoints, args.ranges, args.intervals, args.concurrency
+        ):
+            result = run_scenario(api.url, endpoint, range_name, interval, level, args.requests)
+            scenarios.append(result)
+            print(
+                f"{endpoint:<16} {range_name or '-':>4} {interval:>3} c={level:<3} "
+                f"{result['throughput_rps']:8.1f} req/s  p50={result['p50_ms']:7.1f}ms  "
+                f"p95={result['p95_ms']:7.1f}ms  p99={result['p99_ms']:7.1f}ms  errors={result['errors']}",
+                flush=True,
+            )
+    finally:
+        api.stop()
+        upstream.stop()
+
+    commit = _git_commit()
+    report = {
+        "commit": commit,
+        "created_at": datetime.now(tz=timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "config": {
+            "requests_per_scenario": args.requests,
+            "upstream_latency_s": StandInConfig.latency,
+        },
+        "scenarios": scenarios,
+    }
+    output = args.output or RESULTS_DIR / f"{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Saved {len(scenarios)} scenarios to {output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+Local stand-ins for the upstream APIs (Yahoo chart/search, BCB SGS, Binance, Finapp).
+
+A ThreadingHTTPServer answers with deterministic synthetic payloads shaped like the real ones,
+after an optional artificial delay that models upstream latency. yfinance itself cannot be
+pointed at another host (it negotiates cookies/crumbs with Yahoo), so StandInTicker/StandInSearch
+replace `yf.Ticker`/`yf.Search` and fetch the same chart/search JSON from the stand-in server.
+"""
+
+import json
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+import requests
+
+BAR_SECONDS = {"1d": 86_400, "1h": 3_600}
+
+
+class StandInConfig:
+    # Seconds slept before answering, per upstream
+    latency = {"yahoo": 0.02, "bcb": 0.05, "binance": 0.03, "finapp": 0.02}
+    # Bar spacing served by the chart endpoint regardless of the interval asked for,
+    # so the runner can benchmark daily and hourly density through the same service code
+    bar_interval = "1d"
+
+
+def _seed(symbol: str) -> int:
+    return zlib.crc32(symbol.encode("utf-8"))
+
+
+def chart_payload(symbol: str, period1: int, period2: int, interval: str) -> dict:
+    step = BAR_SECONDS[interval]
+    first = period1 - period1 % step
+    timestamps = np.arange(first, period2, step, dtype=np.int64)
+    if interval == "1d" and not symbol.endswith("-USD"):
+        # Equities only trade on weekdays (epoch day 0 was a Thursday)
+        timestamps = timestamps[((timestamps // 86_400 + 3) % 7) < 5]
+    rng = np.random.default_rng(_seed(symbol) ^ int(first))
+    closes = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.01, len(timestamps))))
+    return {
+        "chart": {
+            "result": [{
+                "meta": {"symbol": symbol, "currency": "USD", "dataGranularity": interval},
+                "timestamp": timestamps.tolist(),
+                "indicators": {"quote": [{"close": closes.round(4).tolist()}]},
+            }],
+            "error": None,
+        }
+    }
+
+
+def search_payload(query: str, max_results: int) -> dict:
+    base = query.upper().replace(" ", "")[:6] or "X"
+    quotes = [
+        {
+            "symbol": f"{base}{i}",
+            "shortname": f"{query.title()} {i}",
+            "longname": f"{query.title()} Holdings {i}",
+            "quoteType": "EQUITY",
+            "exchDisp": "NASDAQ",
+        }
+        for i in range(max_results)
+    ]
+    return {"quotes": quotes}
+
+
+def selic_payload(start: str, end: str) -> list[dict]:
+    current = datetime.strptime(start, "%d/%m/%Y")
+    last = datetime.strptime(end, "%d/%m/%Y")
+    points = []
+    while current <= last:
+        if current.weekday() < 5:
+            points.append({"data": current.strftime("%d/%m/%Y"), "valor": "0.043739"})
+        current += timedelta(days=1)
+    return points
+
+
+def binance_order(params: dict) -> dict:
+    now = int(time.time() * 1000)
+    quote = float(params.get("quoteOrderQty", "10"))
+    price = 350_000.0
+    qty = quote / price
+    return {
+        "symbol": params.get("symbol", "BTCBRL"),
+        "orderId": now,
+        "clientOrderId": params.get("newClientOrderId", "bench"),
+        "transactTime": now,
+        "executedQty": f"{qty:.8f}",
+        "cummulativeQuoteQty": f"{quote:.8f}",
+        "status": "FILLED",
+        "type": "MARKET",
+        "side": "BUY",
+        "fills": [{"price": f"{price:.8f}", "qty": f"{qty:.8f}", "commission": "0", "commissionAsset": "BNB"}],
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _params(self) -> dict:
+        query = parse_qs(urlparse(self.path).query)
+        return {k: v[-1] for k, v in query.items()}
+
+    def _send(self, upstream: str, body, status: int = 200, headers: dict | None = None) -> None:
+        time.sleep(StandInConfig.latency.get(upstream, 0.0))
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        params = self._params()
+        if path.startswith("/v8/finance/chart/"):
+            symbol = path.rsplit("/", 1)[-1]
+            body = chart_payload(symbol, int(params["period1"]), int(params["period2"]), StandInConfig.bar_interval)
+            self._send("yahoo", body)
+        elif path == "/v1/finance/search":
+            self._send("yahoo", search_payload(params.get("q", ""), int(params.get("quotesCount", 8))))
+        elif path == "/dados/serie/bcdata.sgs.11/dados":
+            self._send("bcb", selic_payload(params["dataInicial"], params["dataFinal"]))
+        elif path == "/api/v3/time":
+            self._send("binance", {"serverTime": int(time.time() * 1000)}, headers={"X-MBX-USED-WEIGHT-1M": "1"})
+        else:
+            self._send("", {"msg": "not found"}, status=404)
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        if path == "/api/v3/order":
+            self._send("binance", binance_order(self._params()), headers={"X-MBX-USED-WEIGHT-1M": "2"})
+        elif path == "/api/sign_in":
+            self._send("finapp", {"token": "bench-token"})
+        elif path.startswith("/api/assets/") and path.endswith("/asset_events"):
+            self._send("finapp", {"id": 1}, status=201)
+        else:
+            self._send("", {"msg": "not found"}, status=404)
+
+
+class StandInServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StandInServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+# ---------------------------------------------------------------------------
+# yfinance replacements backed by the stand-in server
+# ---------------------------------------------------------------------------
+
+_local = threading.local()
+_base_url = "http://127.0.0.1"
+
+
+def _session() -> requests.Session:
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = _local.session = requests.Session()
+    return session
+
+
+def _epoch(value) -> int:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp())
+    return int(pd.Timestamp(value).timestamp())
+
+
+class StandInTicker:
+    def __init__(self, ticker: str, session=None):
+        self.ticker = ticker
+
+    def history(self, start=None, end=None, interval: str = "1d", **kwargs) -> pd.DataFrame:
+        params = {"period1": _epoch(start), "period2": _epoch(end), "interval": interval}
+        resp = _session().get(f"{_base_url}/v8/finance/chart/{self.ticker}", params=params, timeout=30)
+        resp.raise_for_status()
+        result = resp.json()["chart"]["result"][0]
+        timestamps = result.get("timestamp") or []
+        if not timestamps:
+            return pd.DataFrame()
+        index = pd.to_datetime(np.asarray(timestamps, dtype=np.int64), unit="s", utc=True)
+        return pd.DataFrame({"Close": result["indicators"]["quote"][0]["close"]}, index=index)
+
+
+class StandInSearch:
+    def __init__(self, query: str, max_results: int = 8, **kwargs):
+        params = {"q": query, "quotesCount": max_results}
+        resp = _session().get(f"{_base_url}/v1/finance/search", params=params, timeout=30)
+        resp.raise_for_status()
+        self.quotes = resp.json()["quotes"]
+
+
+def use_standins(base_url: str) -> None:
+    """Points StandInTicker/StandInSearch at a running StandInServer."""
+    global _base_url
+    _base_url = base_url
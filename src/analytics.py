@@ -0,0 +1,58 @@
+"""
+Risk/return statistics over a price series, vectorized with NumPy.
+
+Series mix calendars (crypto trades daily, B3/NYSE on business days), so annualization uses the
+elapsed time between points rather than a fixed 252 or 365 periods per year.
+"""
+
+import numpy as np
+
+from .series import DAY, Series
+
+YEAR = 365.25 * DAY
+
+
+def years(series: Series) -> float:
+    return float(series.epochs[-1] - series.epochs[0]) / YEAR
+
+
+def total_return(series: Series) -> float:
+    return float(series.values[-1] / series.values[0] - 1.0)
+
+
+def annualized_return(series: Series) -> float:
+    span = years(series)
+    if span <= 0:
+        return 0.0
+    return float((series.values[-1] / series.values[0]) ** (1.0 / span) - 1.0)
+
+
+def volatility(series: Series) -> float:
+    """Annualized standard deviation of log returns."""
+    if len(series) < 3:
+        return 0.0
+    log_returns = np.diff(np.log(series.values))
+    periods_per_year = (len(series) - 1) / years(series)
+    return float(np.std(log_returns, ddof=1) * np.sqrt(periods_per_year))
+
+
+def max_drawdown(series: Series) -> float:
+    """Largest peak-to-trough fall, as a negative fraction (0.0 if the series never falls)."""
+    peaks = np.maximum.accumulate(series.values)
+    return float(np.min(series.values / peaks - 1.0))
+
+
+def sharpe(series: Series, risk_free: float) -> float | None:
+    """(annualized return - annualized risk-free return) / volatility."""
+    vol = volatility(series)
+    if vol == 0.0:
+        return None
+    return (annualized_return(series) - risk_free) / vol
+
+
+def rolling_returns(series: Series, window_days: int) -> np.ndarray:
+    """Return over the trailing `window_days` ending at each point that has a full window behind it."""
+    # Last point at or before t - window, for every t
+    index = np.searchsorted(series.epochs, series.epochs - window_days * DAY, side="right") - 1
+    full = index >= 0
+    return series.values[full] / series.values[index[full]] - 1.0
@@ -0,0 +1,242 @@
+"""
+POST /batch: many GET sub-requests of the routes in routes.py answered in one round trip.
+
+Sub-requests are validated like their query strings and run through the same endpoint functions, so
+limits, errors and staleness headers match the individual calls. Tickers (and SELIC) needed by more than
+one sub-request are loaded once into the series store first; the sub-requests then run concurrently
+and read their slices from it.
+"""
+
+import contextvars
+import inspect
+import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Callable, Iterator
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials
+from pydantic import BaseModel, Field, ValidationError
+
+from ..models import CURRENCY_PATTERN
+from ..service import LATEST_LOOKBACK, MAX_FANOUT, prefetch_series
+from . import routes
+from .dependencies import Lease, MeteredStreamingResponse, bearer, metered
+from .monitoring import timed
+
+router = APIRouter(tags=["Batch"])
+
+MAX_BATCH_REQUESTS = 50
+
+
+# ---------------------------------------------------------------------------
+# Sub-request parameters: the same names and types as the routes' query strings
+# ---------------------------------------------------------------------------
+
+class TickerParams(BaseModel):
+    ticker: str
+    start: datetime
+    end: datetime | None = None
+    currency: str | None = Field(default=None, pattern=CURRENCY_PATTERN)
+
+
+class TickerPriceParams(BaseModel):
+    ticker: str
+    date: datetime
+
+
+class TickerPricesParams(BaseModel):
+    ticker: str
+    from_date: datetime
+    to_date: datetime | None = None
+
+
+class SearchParams(BaseModel):
+    q: str = Field(min_length=1)
+
+
+class SelicParams(BaseModel):
+    start: date
+    end: date | None = None
+    ir: bool = False
+    percentage: float = 100.0
+
+
+class CompareParams(BaseModel):
+    start: date
+    end: date | None = None
+    tickers: list[str] = []
+    selic: list[str] = []
+
+
+class AnalyticsParams(BaseModel):
+    tickers: list[str]
+    start: date
+    end: date | None = None
+    windows: list[int] = [30, 365]
+    currency: str | None = Field(default=None, pattern=CURRENCY_PATTERN)
+
+
+ROUTES: dict[str, tuple[type[BaseModel], Callable[..., Any]]] = {
+    "/ticker": (TickerParams, routes.get_ticker),
+    "/ticker/price": (TickerPriceParams, routes.get_ticker_price),
+    "/ticker/prices": (TickerPricesParams, routes.get_ticker_prices),
+    "/tickers/search": (SearchParams, routes.get_tickers_search),
+    "/selic": (SelicParams, routes.get_selic),
+    "/compare": (CompareParams, routes.get_compare),
+    "/analytics": (AnalyticsParams, routes.get_analytics),
+}
+_TAKES_RESPONSE = {path: "response" in inspect.signature(fn).parameters for path, (_, fn) in ROUTES.items()}
+
+
+class SubRequest(BaseModel):
+    id: str | None = Field(default=None, description="Echoed in the result; defaults to the request's index")
+    path: str = Field(description="A GET route, e.g. /ticker/price")
+    params: dict[str, Any] = Field(default={}, description="The route's query parameters")
+
+
+class BatchRequest(BaseModel):
+    requests: list[SubRequest] = Field(min_length=1, max_length=MAX_BATCH_REQUESTS)
+
+
+class SubResponse(BaseModel):
+    id: str
+    status: int
+    headers: dict[str, str] = {}
+    body: Any = None
+
+
+class BatchResponse(BaseModel):
+    results: list[SubResponse]
+
+
+# ---------------------------------------------------------------------------
+# Execution
+# ---------------------------------------------------------------------------
+
+def _utc(value: date | datetime | None) -> datetime | None:
+    if value is None:
+        return None
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, datetime.min.time())
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def _series_needs(params: BaseModel) -> tuple[list[tuple[str, datetime, datetime | None]], tuple | None]:
+    """(ticker, start, end) ranges and the SELIC range a sub-request will load."""
+    if isinstance(params, TickerParams):
+        return [(params.ticker, _utc(params.start), _utc(params.end))], None
+    if isinstance(params, TickerPricesParams):
+        return [(params.ticker, _utc(params.from_date), _utc(params.to_date))], None
+    if isinstance(params, TickerPriceParams):
+        # The day itself, and the sessions before it that a closed day resolves to
+        day = _utc(params.date).replace(hour=0, minute=0, second=0, microsecond=0)
+        end = day + timedelta(days=1)
+        return [(params.ticker, day - LATEST_LOOKBACK, end if end < datetime.now(timezone.utc) else None)], None
+    if isinstance(params, SelicParams):
+        return [], (_utc(params.start), _utc(params.end))
+    if isinstance(params, CompareParams):
+        span = (_utc(params.start), _utc(params.end))
+        return [(ticker, *span) for ticker in params.tickers], span if params.selic else None
+    if isinstance(params, AnalyticsParams):
+        return [(ticker, _utc(params.start), _utc(params.end)) for ticker in params.tickers], None
+    return [], None
+
+
+def _union(spans: list[tuple[datetime, datetime | None]]) -> tuple[datetime, datetime | None]:
+    ends = [end for _, end in spans]
+    return min(start for start, _ in spans), None if None in ends else max(ends)
+
+
+def _prefetch_shared(validated: list[BaseModel | None]) -> None:
+    """Loads every ticker or SELIC range that more than one sub-request needs, once, as their union."""
+    tickers: dict[str, list[tuple[datetime, datetime | None]]] = {}
+    selic: list[tuple[datetime, datetime | None]] = []
+    for params in validated:
+        if params is None:
+            continue
+        needs, selic_span = _series_needs(params)
+        for ticker, start, end in needs:
+            tickers.setdefault(ticker, []).append((start, end))
+        if selic_span is not None:
+            selic.append(selic_span)
+    shared = {ticker: _union(spans) for ticker, spans in tickers.items() if len(spans) > 1}
+    if shared or len(selic) > 1:
+        prefetch_series(shared, _union(selic) if len(selic) > 1 else None)
+
+
+def _validate(sub: SubRequest) -> BaseModel | SubResponse:
+    route = ROUTES.get(sub.path)
+    if route is None:
+        return SubResponse(id=sub.id, status=404, body={"detail": f"No batchable GET route '{sub.path}'"})
+    try:
+        return route[0].model_validate(sub.params)
+    except ValidationError as exc:
+        return SubResponse(id=sub.id, status=422, body={"detail": json.loads(exc.json(include_url=False))})
+
+
+def _run(sub: SubRequest, params: BaseModel) -> SubResponse:
+    _, endpoint = ROUTES[sub.path]
+    kwargs = params.model_dump()
+    response = Response()
+    before = set(response.headers.keys())
+    if _TAKES_RESPONSE[sub.path]:
+        kwargs["response"] = response
+    try:
+        result = endpoint(**kwargs)
+    except HTTPException as exc:
+        return SubResponse(id=sub.id, status=exc.status_code, headers=exc.headers or {}, body={"detail": exc.detail})
+    except Exception as exc:
+        return SubResponse(id=sub.id, status=500, body={"detail": str(exc)})
+    headers = {k: v for k, v in response.headers.items() if k not in before}
+    return SubResponse(id=sub.id, status=200, headers=headers, body=jsonable_encoder(result))
+
+
+def _prepare(body: BatchRequest) -> list[tuple[SubRequest, BaseModel | SubResponse]]:
+    subs = [sub.model_copy(update={"id": sub.id or str(i)}) for i, sub in enumerate(body.requests)]
+    prepared = [(sub, _validate(sub)) for sub in subs]
+    _prefetch_shared([p if not isinstance(p, SubResponse) else None for _, p in prepared])
+    return prepared
+
+
+def _results(prepared: list[tuple[SubRequest, BaseModel | SubResponse]]) -> Iterator[tuple[int, SubResponse]]:
+    """Runs the sub-requests concurrently, yielding (index, result) as they finish."""
+    pending = [(i, sub, p) for i, (sub, p) in enumerate(prepared) if not isinstance(p, SubResponse)]
+    yield from ((i, p) for i, (_, p) in enumerate(prepared) if isinstance(p, SubResponse))
+    if not pending:
+        return
+    with ThreadPoolExecutor(max_workers=min(MAX_FANOUT, len(pending)), thread_name_prefix="batch") as pool:
+        futures = {
+            pool.submit(contextvars.copy_context().run, _run, sub, params): i for i, sub, params in pending
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+async def _metered_batch(
+    body: BatchRequest, credentials: HTTPAuthorizationCredentials = Depends(bearer),
+) -> AsyncIterator[Lease]:
+    # Each sub-request counts against the key's rate limit; the batch holds one fair-queue slot
+    async with metered(credentials.credentials, cost=len(body.requests)) as lease:
+        yield lease
+
+
+@router.post("/batch", response_model=BatchResponse)
+@timed
+def post_batch(
+    body: BatchRequest,
+    stream: bool = Query(default=False, description="Stream results as NDJSON lines in completion order"),
+    lease: Lease = Depends(_metered_batch),
+) -> BatchResponse | StreamingResponse:
+    """
+    Runs up to MAX_BATCH_REQUESTS GET sub-requests, e.g. {"path": "/ticker/price", "params": {"ticker":
+    "PETR4.SA", "date": "2024-03-01"}}. Each result carries the status, headers and body the route would
+    have returned; the batch itself answers 200 unless it is malformed or over quota.
+    """
+    prepared = _prepare(body)
+    if stream:
+        lines = (result.model_dump_json() + "\n" for _, result in _results(prepared))
+        return MeteredStreamingResponse(lines, lease, media_type="application/x-ndjson")
+    return BatchResponse(results=[result for _, result in sorted(_results(prepared), key=lambda item: item[0])])
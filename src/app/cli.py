@@ -0,0 +1,71 @@
+"""
+Command-line exports of the series store, for analytics jobs that need years of history at once.
+
+    python -m src.app.cli export --tickers PETR4.SA VALE3.SA BTC-USD --start 2010-01-01 --selic --out exports/
+    python -m src.app.cli export --tickers-file tickers.txt --start 2015-01-01 --format arrow --out exports/
+
+Writes prices.<ext> (and selic.<ext> with --selic) under --out; load them with pandas.read_parquet,
+polars.scan_parquet or pyarrow.ipc.open_file(pyarrow.memory_map(...)).
+"""
+
+import argparse
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+from ..export import FORMATS, ExportUnavailableError, price_batches, price_schema, selic_batches, selic_schema, write_file
+
+
+def _day(text: str) -> datetime:
+    return datetime.combine(date.fromisoformat(text), datetime.min.time())
+
+
+def _tickers(args: argparse.Namespace) -> list[str]:
+    tickers = list(args.tickers or [])
+    if args.tickers_file:
+        tickers += [line.strip() for line in args.tickers_file.read_text().splitlines() if line.strip()]
+    return list(dict.fromkeys(tickers))
+
+
+def export(args: argparse.Namespace) -> int:
+    tickers = _tickers(args)
+    if not tickers and not args.selic:
+        print("Nothing to export: pass --tickers/--tickers-file and/or --selic", file=sys.stderr)
+        return 2
+    args.out.mkdir(parents=True, exist_ok=True)
+    ext = FORMATS[args.format]
+    if tickers:
+        path = args.out / f"prices{ext}"
+        size = write_file(path, price_batches(tickers, args.start, args.end), price_schema(), args.format)
+        print(f"{path}: {len(tickers)} ticker(s), {size} bytes")
+    if args.selic:
+        path = args.out / f"selic{ext}"
+        size = write_file(path, selic_batches(args.start, args.end), selic_schema(), args.format)
+        print(f"{path}: {size} bytes")
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="write price and SELIC history as Parquet or Arrow IPC")
+    export_parser.add_argument("--tickers", nargs="*", help="ticker symbols, e.g. PETR4.SA BTC-USD")
+    export_parser.add_argument("--tickers-file", type=Path, help="file with one ticker per line")
+    export_parser.add_argument("--selic", action="store_true", help="also export daily SELIC rates")
+    export_parser.add_argument("--start", type=_day, required=True, help="start date (YYYY-MM-DD)")
+    export_parser.add_argument("--end", type=_day, default=None, help="end date (YYYY-MM-DD), defaults to today")
+    export_parser.add_argument("--format", choices=sorted(FORMATS), default="parquet")
+    export_parser.add_argument("--out", type=Path, default=Path("exports"), help="output directory")
+    export_parser.set_defaults(run=export)
+
+    args = parser.parse_args(argv)
+    try:
+        return args.run(args)
+    except ExportUnavailableError as exc:
+        print(exc, file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
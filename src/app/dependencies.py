@@ -1,21 +1,128 @@
+from contextlib import asynccontextmanager
+from math import ceil
 from os import getenv
+from typing import AsyncIterator
 
 from fastapi import Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from starlette.types import Receive, Scope, Send
+
+from ..quotas import ApiKey, QuotaExceededError, digest, fair_queue, limiter, parse_keys
 
 bearer = HTTPBearer()
 
 
-def get_api_key(credentials: HTTPAuthorizationCredentials = Depends(bearer)) -> str:
-    api_key = getenv("API_KEY")
-    if not api_key:
+_key_table: dict[bytes, ApiKey] = {}
+
+
+def load_api_keys() -> dict[bytes, ApiKey]:
+    """
+    Parses API_KEY/API_KEYS into the key table used by every request. Called once when the app is created,
+    so a malformed API_KEYS stops the server at startup (ValueError) instead of failing each request.
+    """
+    global _key_table
+    _key_table = parse_keys(getenv("API_KEY"), getenv("API_KEYS"))
+    return _key_table
+
+
+def lookup_api_key(token: str | None) -> ApiKey | None:
+    if not token:
+        return None
+    return _key_table.get(digest(token))
+
+
+def is_valid_api_key(token: str | None) -> bool:
+    return lookup_api_key(token) is not None
+
+
+def _authenticate(token: str) -> ApiKey:
+    if not _key_table:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="API key is not configured on the server.",
         )
-    if credentials.credentials != api_key:
+    key = lookup_api_key(token)
+    if key is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Unauthorized",
         )
+    return key
+
+
+def get_api_key(credentials: HTTPAuthorizationCredentials = Depends(bearer)) -> str:
+    _authenticate(credentials.credentials)
     return credentials.credentials
+
+
+def _too_many_requests(exc: QuotaExceededError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=str(exc),
+        headers={"Retry-After": str(ceil(exc.retry_after))},
+    )
+
+
+class Lease:
+    """A metered request's fair-queue slot; a MeteredStreamingResponse takes it over until its body is sent."""
+
+    def __init__(self, key: ApiKey):
+        self.key = key
+        self.handed_over = False
+        self._held = True
+
+    def release(self) -> None:
+        if self._held:
+            self._held = False
+            fair_queue.release()
+
+
+class MeteredStreamingResponse(StreamingResponse):
+    """
+    A streamed response that keeps its request's slot while the body is produced: FastAPI exits the
+    dependencies (and so `metered`) when the endpoint returns, before the body iterator runs.
+    """
+
+    def __init__(self, content, lease: Lease, **kwargs):
+        super().__init__(content, **kwargs)
+        lease.handed_over = True
+        self._lease = lease
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self._lease.release()
+
+
+@asynccontextmanager
+async def metered(token: str, cost: int = 1) -> AsyncIterator[Lease]:
+    """
+    Authenticates like get_api_key, then applies the key's quota: `cost` requests against its sliding-window
+    limit and a weighted fair share of the expensive-endpoint slots, held for the block (or, if handed to a
+    MeteredStreamingResponse, until it is sent). 429 when either is exhausted.
+    """
+    key = _authenticate(token)
+    try:
+        limiter.check(key, cost)
+        await fair_queue.acquire(key)
+    except QuotaExceededError as exc:
+        raise _too_many_requests(exc) from exc
+    lease = Lease(key)
+    try:
+        yield lease
+    finally:
+        if not lease.handed_over:
+            lease.release()
+
+
+async def get_metered_api_key(credentials: HTTPAuthorizationCredentials = Depends(bearer)) -> AsyncIterator[ApiKey]:
+    async with metered(credentials.credentials) as lease:
+        yield lease.key
+
+
+async def get_metered_lease(credentials: HTTPAuthorizationCredentials = Depends(bearer)) -> AsyncIterator[Lease]:
+    """Like get_metered_api_key, for endpoints that hand the slot to a MeteredStreamingResponse."""
+    async with metered(credentials.credentials) as lease:
+        yield lease
@@ -0,0 +1,85 @@
+from datetime import date, datetime
+from typing import AsyncIterator, Iterator
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials
+
+from ..export import (
+    FORMATS, MAX_EXPORT_TICKERS, MEDIA_TYPES, ExportUnavailableError, price_batches, price_schema, selic_batches,
+    selic_schema, stream,
+)
+from ..scheduler import CircuitOpenError
+from .dependencies import Lease, MeteredStreamingResponse, bearer, get_metered_lease, metered
+from .routes import _unavailable
+
+router = APIRouter(prefix="/export", tags=["Export"])
+
+FORMAT_PATTERN = "^(" + "|".join(FORMATS) + ")$"
+
+
+def _midnight(day: date | None) -> datetime | None:
+    return datetime.combine(day, datetime.min.time()) if day else None
+
+
+async def _metered_prices(
+    tickers: list[str] = Query(..., description="Ticker symbols, e.g. tickers=BTC-USD&tickers=PETR4.SA"),
+    credentials: HTTPAuthorizationCredentials = Depends(bearer),
+) -> AsyncIterator[Lease]:
+    # Every ticker is a series load, counted against the key's rate limit like a request for it
+    count = len(set(tickers))
+    if count > MAX_EXPORT_TICKERS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"At most {MAX_EXPORT_TICKERS} tickers per export",
+        )
+    async with metered(credentials.credentials, cost=count) as lease:
+        yield lease
+
+
+def _respond(name: str, fmt: str, batches, schema_factory, lease: Lease) -> StreamingResponse:
+    try:
+        chunks = stream(batches, schema_factory(), fmt)
+        # Load the first chunk here so upstream failures still get a proper status code
+        first = next(chunks)
+    except ExportUnavailableError as exc:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=str(exc)) from exc
+    except CircuitOpenError as exc:
+        raise _unavailable(exc) from exc
+    except Exception as exc:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(exc)) from exc
+
+    def body() -> Iterator[bytes]:
+        yield first
+        yield from chunks
+
+    # The response keeps the request's fair-queue slot until the last batch is written
+    return MeteredStreamingResponse(
+        body(), lease, media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}{FORMATS[fmt]}"'},
+    )
+
+
+@router.get("/prices")
+def export_prices(
+    tickers: list[str] = Query(..., description="Ticker symbols, e.g. tickers=BTC-USD&tickers=PETR4.SA"),
+    start: date = Query(..., description="Start date (YYYY-MM-DD)"),
+    end: date = Query(default=None, description="End date (YYYY-MM-DD), defaults to today"),
+    format: str = Query(default="parquet", pattern=FORMAT_PATTERN, description="parquet or arrow (IPC file)"),
+    lease: Lease = Depends(_metered_prices),
+) -> StreamingResponse:
+    """Daily closes as (ticker, time, close) rows, one row group per ticker."""
+    tickers = list(dict.fromkeys(tickers))
+    batches = price_batches(tickers, _midnight(start), _midnight(end))
+    return _respond("prices", format, batches, price_schema, lease)
+
+
+@router.get("/selic")
+def export_selic(
+    start: date = Query(..., description="Start date (YYYY-MM-DD)"),
+    end: date = Query(default=None, description="End date (YYYY-MM-DD), defaults to today"),
+    format: str = Query(default="parquet", pattern=FORMAT_PATTERN, description="parquet or arrow (IPC file)"),
+    lease: Lease = Depends(get_metered_lease),
+) -> StreamingResponse:
+    """Daily SELIC rates (percent per day) as (date, rate) rows."""
+    return _respond("selic", format, selic_batches(_midnight(start), _midnight(end)), selic_schema, lease)
@@ -0,0 +1,88 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+from pydantic import BaseModel
+
+from ..jobs import DONE, AnalyticsJob, CompareJob, JobQueueFullError, SelicJob, TickerJob, manager
+from ..models import PortfolioRequest
+from .dependencies import get_api_key, get_metered_api_key
+from .routes import parse_scenario, validate_analytics, validate_compare, validate_portfolio
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+# Submissions trigger the same upstream fetches as the synchronous endpoints and count against the same
+# quota; polling does not
+_metered = [Depends(get_metered_api_key)]
+_polling = [Depends(get_api_key)]
+
+
+class JobStatus(BaseModel):
+    id: str
+    kind: str
+    status: str
+    submitted_at: float
+    started_at: float | None = None
+    finished_at: float | None = None
+    expires_at: float | None = None
+    error: str | None = None
+    status_url: str
+    result_url: str
+
+
+def _job_status(data: dict) -> JobStatus:
+    return JobStatus(**data, status_url=f"/jobs/{data['id']}", result_url=f"/jobs/{data['id']}/result")
+
+
+def _submit(kind: str, params: BaseModel) -> JobStatus:
+    try:
+        return _job_status(manager.submit(kind, params))
+    except JobQueueFullError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(exc), headers={"Retry-After": "30"},
+        ) from exc
+
+
+@router.post("/ticker", response_model=JobStatus, status_code=status.HTTP_202_ACCEPTED, dependencies=_metered)
+def submit_ticker(params: TickerJob) -> JobStatus:
+    return _submit("ticker", params)
+
+
+@router.post("/selic", response_model=JobStatus, status_code=status.HTTP_202_ACCEPTED, dependencies=_metered)
+def submit_selic(params: SelicJob) -> JobStatus:
+    return _submit("selic", params)
+
+
+@router.post("/compare", response_model=JobStatus, status_code=status.HTTP_202_ACCEPTED, dependencies=_metered)
+def submit_compare(params: CompareJob) -> JobStatus:
+    validate_compare(params.tickers, params.selic)
+    for text in params.selic:
+        parse_scenario(text)
+    return _submit("compare", params)
+
+
+@router.post("/analytics", response_model=JobStatus, status_code=status.HTTP_202_ACCEPTED, dependencies=_metered)
+def submit_analytics(params: AnalyticsJob) -> JobStatus:
+    validate_analytics(params.tickers, params.windows)
+    return _submit("analytics", params)
+
+
+@router.post("/portfolio", response_model=JobStatus, status_code=status.HTTP_202_ACCEPTED, dependencies=_metered)
+def submit_portfolio(params: PortfolioRequest) -> JobStatus:
+    validate_portfolio(params)
+    return _submit("portfolio", params)
+
+
+@router.get("/{job_id}", response_model=JobStatus, dependencies=_polling)
+def get_job(job_id: str) -> JobStatus:
+    data = manager.status(job_id)
+    if data is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown or expired job")
+    return _job_status(data)
+
+
+@router.get("/{job_id}/result", dependencies=_polling)
+def get_job_result(job_id: str) -> FileResponse:
+    data = manager.status(job_id)
+    if data is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown or expired job")
+    if data["status"] != DONE:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Job is {data['status']}")
+    return FileResponse(manager.result_path(job_id), media_type="application/json")
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+
+from ..live import hub
+from .dependencies import get_api_key
+
+router = APIRouter(tags=["Ticker"])
+
+MAX_STREAM_TICKERS = 50
+# Comment lines keep idle connections open through proxies
+KEEPALIVE_INTERVAL = 15.0
+
+
+@router.get("/ticker/price/stream", dependencies=[Depends(get_api_key)])
+async def stream_prices(
+    request: Request,
+    tickers: list[str] = Query(..., description="Ticker symbols, e.g. tickers=BTC-USD&tickers=PETR4.SA"),
+) -> StreamingResponse:
+    """Server-Sent Events: a `price` event (TickerPriceResponse JSON) whenever a subscribed ticker's price changes."""
+    if len(set(tickers)) > MAX_STREAM_TICKERS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"At most {MAX_STREAM_TICKERS} tickers per stream",
+        )
+    subscription = hub.subscribe(tickers)
+
+    async def events():
+        try:
+            while not await request.is_disconnected():
+                price = await subscription.next(timeout=KEEPALIVE_INTERVAL)
+                if price is None:
+                    yield ": keepalive\n\n"
+                else:
+                    yield f"event: price\ndata: {price.model_dump_json()}\n\n"
+        finally:
+            hub.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,15 +1,30 @@
 import logging
 
 from fastapi import FastAPI
+from .batch import router as batch_router
+from .dependencies import load_api_keys
+from .export import router as export_router
+from .jobs import router as jobs_router
+from .live import router as live_router
+from .monitoring import add_server_timing, record_request_metrics, router as monitoring_router
 from .routes import router
 from ..binance.routes import router as binance_router
 
 logging.basicConfig(level=logging.INFO)
+# Fails here, at startup, on a malformed API_KEYS
+load_api_keys()
 
 app = FastAPI(
     title="Holdings API",
     description="Hourly price history and cumulative multipliers for any ticker.",
     version="2.0.0",
 )
+app.middleware("http")(add_server_timing)
+app.middleware("http")(record_request_metrics)
 app.include_router(router)
+app.include_router(live_router)
 app.include_router(binance_router)
+app.include_router(jobs_router)
+app.include_router(export_router)
+app.include_router(batch_router)
+app.include_router(monitoring_router)
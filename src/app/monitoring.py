@@ -0,0 +1,135 @@
+import cProfile
+import functools
+import io
+import logging
+import pstats
+import tempfile
+import time
+import uuid
+from os import getenv
+from pathlib import Path
+
+import anyio.to_thread
+from fastapi import APIRouter, Depends, Request, Response
+from fastapi.responses import PlainTextResponse
+
+from ..metrics import REGISTRY, REQUEST_LATENCY, THREADPOOL_IN_USE, THREADPOOL_SIZE
+from ..timing import Timings, activate, current, deactivate
+from .dependencies import get_api_key, is_valid_api_key
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["Monitoring"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+PROFILE_HEADER = "X-Profile"
+PROFILE_MODES = {"1": "file", "file": "file", "text": "text"}
+PROFILE_TOP = 40
+
+
+async def record_request_metrics(request: Request, call_next) -> Response:
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        # Label by route template (/ticker, not /ticker?ticker=...) to keep cardinality bounded
+        route = request.scope.get("route")
+        REQUEST_LATENCY.observe(
+            time.perf_counter() - start,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=str(status_code),
+        )
+
+
+@router.get("/metrics", dependencies=[Depends(get_api_key)], include_in_schema=False)
+async def get_metrics() -> Response:
+    # Sync endpoints run on anyio's default thread limiter; sample it on scrape
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    THREADPOOL_IN_USE.set(limiter.borrowed_tokens)
+    THREADPOOL_SIZE.set(limiter.total_tokens)
+    return Response(content=REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+def _profile_dir() -> Path:
+    path = Path(getenv("PROFILE_DIR") or Path(tempfile.gettempdir()) / "holdings-profiles")
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _requested_profile(request: Request) -> str | None:
+    mode = PROFILE_MODES.get(request.headers.get(PROFILE_HEADER, "").lower())
+    if mode is None:
+        return None
+    # Profiling is only honoured for authenticated callers
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not is_valid_api_key(token):
+        return None
+    return mode
+
+
+async def add_server_timing(request: Request, call_next) -> Response:
+    timings = Timings(profile=_requested_profile(request))
+    token = activate(timings)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        deactivate(token)
+
+    now = time.perf_counter()
+    if timings.endpoint_done is not None:
+        # Response validation, jsonable_encoder and json.dumps happen after the endpoint returns
+        timings.add("serialize", now - timings.endpoint_done)
+    timings.add("total", now - start)
+
+    if timings.profile_report is not None:
+        async for _ in response.body_iterator:
+            pass
+        response = PlainTextResponse(timings.profile_report)
+    if timings.profile_path is not None:
+        response.headers["X-Profile-File"] = timings.profile_path
+    response.headers["Server-Timing"] = timings.header()
+    return response
+
+
+def timed(endpoint):
+    """
+    Marks when a sync endpoint returns (so the middleware can attribute the rest to serialization)
+    and runs it under cProfile when the request opted in. It has to wrap the endpoint itself:
+    cProfile only sees the thread it is enabled on, and sync endpoints run in the threadpool.
+    """
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        timings = current()
+        if timings is None or timings.profile is None:
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                if timings is not None:
+                    timings.endpoint_done = time.perf_counter()
+
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(endpoint, *args, **kwargs)
+        finally:
+            _store_profile(profiler, timings, endpoint.__name__)
+            timings.endpoint_done = time.perf_counter()
+
+    return wrapper
+
+
+def _store_profile(profiler: cProfile.Profile, timings: Timings, name: str) -> None:
+    if timings.profile == "text":
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP)
+        timings.profile_report = out.getvalue()
+        return
+    path = _profile_dir() / f"{name}-{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}.prof"
+    profiler.dump_stats(path)
+    timings.profile_path = str(path)
+    logger.info("Saved profile to %s", path)
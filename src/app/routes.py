@@ -1,58 +1,107 @@
 from datetime import date, datetime
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from ..models import PricePoint, TickerResponse, TickerSearchResponse, SelicResponse, TickerPriceResponse
-from ..service import fetch_ticker, search_tickers, fetch_selic, fetch_last_price
-from .dependencies import get_api_key
+from math import ceil
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from ..caching import Staleness, track_staleness
+from ..models import (
+    PricePoint, TickerResponse, TickerSearchResponse, SelicResponse, TickerPriceResponse, SelicScenario, CompareResponse,
+    AnalyticsResponse, PortfolioRequest, PortfolioResponse, CURRENCY_PATTERN,
+)
+from ..scheduler import CircuitOpenError
+from ..service import (
+    MAX_ANALYTICS_TICKERS, MAX_ANALYTICS_WINDOWS, MAX_COMPARE_COLUMNS, MAX_PORTFOLIO_EVENTS, MAX_PORTFOLIO_TICKERS,
+    fetch_ticker, search_tickers, fetch_selic, fetch_last_price, compare, analyze, value_portfolio,
+)
+from .dependencies import get_api_key, get_metered_api_key
+from .monitoring import timed
 
 router = APIRouter(tags=["Ticker"])
 
 
-@router.get("/ticker", response_model=TickerResponse, dependencies=[Depends(get_api_key)])
+def _unavailable(exc: CircuitOpenError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(exc),
+        headers={"Retry-After": str(ceil(exc.retry_after))},
+    )
+
+
+def _mark_stale(response: Response, staleness: Staleness) -> None:
+    if staleness.stale:
+        response.headers["X-Data-Stale"] = "true"
+        response.headers["Age"] = str(int(staleness.age))
+
+
+@router.get("/ticker", response_model=TickerResponse, dependencies=[Depends(get_metered_api_key)])
+@timed
 def get_ticker(
+    response: Response,
     ticker: str = Query(..., description="Ticker symbol, e.g. BTC-USD"),
     start: datetime = Query(..., description="Start datetime (ISO 8601)"),
     end: datetime = Query(default=None, description="End datetime (ISO 8601), defaults to now"),
+    currency: str = Query(
+        default=None, pattern=CURRENCY_PATTERN, description="Convert prices to this currency, e.g. BRL",
+    ),
 ) -> TickerResponse:
     try:
-        return fetch_ticker(ticker, start, end)
+        with track_staleness() as staleness:
+            result = fetch_ticker(ticker, start, end, currency)
+        _mark_stale(response, staleness)
+        return result
+    except CircuitOpenError as exc:
+        raise _unavailable(exc) from exc
     except Exception as exc:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(exc)) from exc
 
 
-@router.get("/ticker/price", response_model=TickerPriceResponse, dependencies=[Depends(get_api_key)])
+@router.get("/ticker/price", response_model=TickerPriceResponse, dependencies=[Depends(get_metered_api_key)])
+@timed
 def get_ticker_price(
     ticker: str = Query(..., description="Ticker symbol, e.g. BTC-USD"),
     date: datetime = Query(..., description="Date to fetch price for (ISO 8601)"),
 ) -> TickerPriceResponse:
     try:
         return fetch_last_price(ticker, date)
+    except CircuitOpenError as exc:
+        raise _unavailable(exc) from exc
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
     except Exception as exc:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(exc)) from exc
 
 
-@router.get("/ticker/prices", response_model=list[PricePoint], dependencies=[Depends(get_api_key)])
+@router.get("/ticker/prices", response_model=list[PricePoint], dependencies=[Depends(get_metered_api_key)])
+@timed
 def get_ticker_prices(
+    response: Response,
     ticker: str = Query(..., description="Ticker symbol, e.g. BTC-USD"),
     from_date: datetime = Query(..., description="Start date (ISO 8601)"),
     to_date: datetime = Query(default=None, description="End date (ISO 8601), defaults to now"),
 ) -> list[PricePoint]:
     try:
-        return fetch_ticker(ticker, from_date, to_date).prices
+        with track_staleness() as staleness:
+            result = fetch_ticker(ticker, from_date, to_date)
+        _mark_stale(response, staleness)
+        return result.prices
+    except CircuitOpenError as exc:
+        raise _unavailable(exc) from exc
     except Exception as exc:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(exc)) from exc
 
 
 @router.get("/tickers/search", response_model=TickerSearchResponse, dependencies=[Depends(get_api_key)])
+@timed
 def get_tickers_search(q: str = Query(..., min_length=1, description="Search query")) -> TickerSearchResponse:
     try:
         return search_tickers(q)
+    except CircuitOpenError as exc:
+        raise _unavailable(exc) from exc
     except Exception as exc:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(exc)) from exc
 
-@router.get("/selic", response_model=SelicResponse, dependencies=[Depends(get_api_key)])
+@router.get("/selic", response_model=SelicResponse, dependencies=[Depends(get_metered_api_key)])
+@timed
 def get_selic(
+    response: Response,
     start: date = Query(..., description="Start date (YYYY-MM-DD)"),
     end: date = Query(default=None, description="End date (YYYY-MM-DD), defaults to today"),
     ir: bool = Query(default=False, description="Apply Imposto de Renda on gains at each point"),
@@ -61,6 +110,120 @@ def get_selic(
     try:
         start_dt = datetime.combine(start, datetime.min.time())
         end_dt = datetime.combine(end, datetime.min.time()) if end else None
-        return fetch_selic(start=start_dt, end=end_dt, ir=ir, percentage=percentage)
+        with track_staleness() as staleness:
+            result = fetch_selic(start=start_dt, end=end_dt, ir=ir, percentage=percentage)
+        _mark_stale(response, staleness)
+        return result
+    except CircuitOpenError as exc:
+        raise _unavailable(exc) from exc
+    except Exception as exc:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(exc)) from exc
+
+
+# Checks shared with the job submission endpoints
+def validate_compare(tickers: list, selic: list) -> None:
+    if not 0 < len(tickers) + len(selic) <= MAX_COMPARE_COLUMNS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Pass between 1 and {MAX_COMPARE_COLUMNS} tickers and SELIC scenarios",
+        )
+
+
+def validate_analytics(tickers: list[str], windows: list[int]) -> None:
+    if len(tickers) > MAX_ANALYTICS_TICKERS or len(windows) > MAX_ANALYTICS_WINDOWS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"At most {MAX_ANALYTICS_TICKERS} tickers and {MAX_ANALYTICS_WINDOWS} windows per request",
+        )
+    if any(days < 1 for days in windows):
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Windows must be at least 1 day")
+
+
+def validate_portfolio(body: PortfolioRequest) -> None:
+    tickers = {event.ticker for event in body.events if event.ticker}
+    if not 0 < len(body.events) <= MAX_PORTFOLIO_EVENTS or len(tickers) > MAX_PORTFOLIO_TICKERS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Pass between 1 and {MAX_PORTFOLIO_EVENTS} events over at most {MAX_PORTFOLIO_TICKERS} tickers",
+        )
+
+
+def parse_scenario(text: str) -> SelicScenario:
+    try:
+        return SelicScenario.parse(text)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Invalid SELIC scenario '{text}': expected e.g. 100 or 110:ir",
+        ) from exc
+
+
+@router.get("/compare", response_model=CompareResponse, dependencies=[Depends(get_metered_api_key)])
+@timed
+def get_compare(
+    response: Response,
+    start: date = Query(..., description="Start date (YYYY-MM-DD)"),
+    end: date = Query(default=None, description="End date (YYYY-MM-DD), defaults to today"),
+    tickers: list[str] = Query(default=[], description="Ticker symbols, e.g. tickers=BTC-USD&tickers=PETR4.SA"),
+    selic: list[str] = Query(default=[], description="SELIC scenarios: percentage with optional ':ir', e.g. 100 or 110:ir"),
+) -> CompareResponse:
+    validate_compare(tickers, selic)
+    scenarios = [parse_scenario(text) for text in selic]
+    try:
+        start_dt = datetime.combine(start, datetime.min.time())
+        end_dt = datetime.combine(end, datetime.min.time()) if end else None
+        with track_staleness() as staleness:
+            result = compare(tickers, scenarios, start_dt, end_dt)
+        _mark_stale(response, staleness)
+        return result
+    except CircuitOpenError as exc:
+        raise _unavailable(exc) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
+    except Exception as exc:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(exc)) from exc
+
+
+@router.get("/analytics", response_model=AnalyticsResponse, dependencies=[Depends(get_metered_api_key)])
+@timed
+def get_analytics(
+    response: Response,
+    tickers: list[str] = Query(..., description="Ticker symbols, e.g. tickers=BTC-USD&tickers=PETR4.SA"),
+    start: date = Query(..., description="Start date (YYYY-MM-DD)"),
+    end: date = Query(default=None, description="End date (YYYY-MM-DD), defaults to today"),
+    windows: list[int] = Query(default=[30, 365], description="Rolling return windows in calendar days"),
+    currency: str = Query(
+        default=None, pattern=CURRENCY_PATTERN, description="Convert prices to this currency first, e.g. BRL",
+    ),
+) -> AnalyticsResponse:
+    validate_analytics(tickers, windows)
+    try:
+        start_dt = datetime.combine(start, datetime.min.time())
+        end_dt = datetime.combine(end, datetime.min.time()) if end else None
+        with track_staleness() as staleness:
+            result = analyze(tickers, start_dt, end_dt, windows, currency)
+        _mark_stale(response, staleness)
+        return result
+    except CircuitOpenError as exc:
+        raise _unavailable(exc) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
+    except Exception as exc:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(exc)) from exc
+
+
+@router.post("/portfolio/valuation", response_model=PortfolioResponse, dependencies=[Depends(get_metered_api_key)])
+@timed
+def post_portfolio_valuation(response: Response, body: PortfolioRequest) -> PortfolioResponse:
+    validate_portfolio(body)
+    try:
+        with track_staleness() as staleness:
+            result = value_portfolio(body.events, body.currency, body.end)
+        _mark_stale(response, staleness)
+        return result
+    except CircuitOpenError as exc:
+        raise _unavailable(exc) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc)) from exc
     except Exception as exc:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(exc)) from exc
@@ -1,45 +1,287 @@
 import hashlib
 import hmac
+import logging
+import threading
 import time
+import uuid
 from datetime import datetime, timezone
 from os import getenv
 
 import requests
+from requests.adapters import HTTPAdapter
 
+from ..metrics import track_upstream
 from .finapp import Finapp
 
+logger = logging.getLogger(__name__)
+
 BINANCE_BASE_URL = "https://api.binance.com"
 ADDRESS = "Binance"
 
+# Binance's REQUEST_WEIGHT limit per IP is 6000 per minute; start throttling well before it.
+WEIGHT_LIMIT = 6000
+WEIGHT_SOFT_RATIO = 0.8
+TIME_SYNC_INTERVAL = 300.0
+RECV_WINDOW = 5000
+# Slack on top of RECV_WINDOW for the error in the cached server-time offset
+CLOCK_MARGIN_MS = 1000
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5
+
+# Error codes returned in the JSON body
+INVALID_TIMESTAMP = -1021
+UNKNOWN_ORDER = -2013
+
+
+class BinanceError(ValueError):
+    def __init__(self, status_code: int, payload: dict):
+        super().__init__(payload)
+        self.status_code = status_code
+        self.payload = payload
+
+    @property
+    def code(self) -> int | None:
+        return self.payload.get("code") if isinstance(self.payload, dict) else None
+
+
 def _sign(params: dict, secret: str) -> str:
     query = "&".join(f"{k}={v}" for k, v in params.items())
     return hmac.new(secret.encode("utf-8"), query.encode("utf-8"), hashlib.sha256).hexdigest()
 
 
-def place_order(ticker: str, value: float) -> dict:
-    api_key = getenv("BINANCE_API_KEY", "")
-    api_secret = getenv("BINANCE_API_SECRET", "")
-    endpoint = "/api/v3/order"
+class BinanceClient:
+    """
+    Signed Binance REST client shared across requests.
 
-    params = {
-        "symbol": ticker,
-        "side": "BUY",
-        "type": "MARKET",
-        "quoteOrderQty": value,
-        "timestamp": int(time.time() * 1000),
-    }
-    params["signature"] = _sign(params, api_secret)
+    Keeps a pooled session, signs with the local clock corrected by the cached server-time offset,
+    slows down as X-MBX-USED-WEIGHT-1M approaches the limit and retries orders idempotently by
+    reusing the same newClientOrderId (checking whether the order already exists before resending).
+    """
 
-    resp = requests.post(
-        f"{BINANCE_BASE_URL}{endpoint}",
-        params=params,
-        headers={"X-MBX-APIKEY": api_key},
-        timeout=30,
-    )
-    print(resp.json())
-    if not resp.ok:
-        raise ValueError(resp.json())
-    return resp.json()
+    def __init__(
+        self,
+        api_key: str | None = None,
+        api_secret: str | None = None,
+        base_url: str = BINANCE_BASE_URL,
+        session: requests.Session | None = None,
+        weight_limit: int = WEIGHT_LIMIT,
+        max_retries: int = MAX_RETRIES,
+    ):
+        self.api_key = api_key if api_key is not None else getenv("BINANCE_API_KEY", "")
+        self._api_secret = api_secret if api_secret is not None else getenv("BINANCE_API_SECRET", "")
+        self.base_url = base_url
+        self.weight_limit = weight_limit
+        self.max_retries = max_retries
+
+        if session is None:
+            session = requests.Session()
+            session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+        self.session = session
+        self.session.headers["X-MBX-APIKEY"] = self.api_key
+
+        self._lock = threading.Lock()
+        self._time_offset_ms = 0
+        self._time_synced_at: float | None = None
+        self._used_weight = 0
+        self._weight_window = 0  # minute (epoch // 60) the used weight refers to
+        self._blocked_until = 0.0
+
+    # -- clock -----------------------------------------------------------------
+
+    def sync_time(self) -> int:
+        """Fetches /api/v3/time and caches the offset (server - local) in milliseconds."""
+        before = time.time()
+        data = self._request("GET", "/api/v3/time", retries=0)
+        after = time.time()
+        # Assume the server stamped the response halfway through the round trip
+        local_ms = int((before + after) / 2 * 1000)
+        with self._lock:
+            self._time_offset_ms = int(data["serverTime"]) - local_ms
+            self._time_synced_at = after
+        return self._time_offset_ms
+
+    def timestamp(self) -> int:
+        synced_at = self._time_synced_at
+        if synced_at is None or time.time() - synced_at > TIME_SYNC_INTERVAL:
+            self.sync_time()
+        return int(time.time() * 1000) + self._time_offset_ms
+
+    # -- throttling ------------------------------------------------------------
+
+    def _throttle(self) -> None:
+        with self._lock:
+            now = time.time()
+            wait = self._blocked_until - now
+            minute = int(now // 60)
+            if minute == self._weight_window and self._used_weight >= self.weight_limit * WEIGHT_SOFT_RATIO:
+                # Spread the remaining budget: the closer to the limit, the closer to the window reset
+                remaining = max(self.weight_limit - self._used_weight, 1)
+                until_reset = (minute + 1) * 60 - now
+                pressure = until_reset if self._used_weight >= self.weight_limit else until_reset / remaining
+                wait = max(wait, pressure)
+        if wait > 0:
+            logger.info("Binance throttle: sleeping %.2fs (used weight %s)", wait, self._used_weight)
+            time.sleep(wait)
+
+    def _record_headers(self, resp: requests.Response) -> None:
+        used = resp.headers.get("X-MBX-USED-WEIGHT-1M") or resp.headers.get("X-MBX-USED-WEIGHT")
+        retry_after = resp.headers.get("Retry-After")
+        with self._lock:
+            if used is not None:
+                self._used_weight = int(used)
+                self._weight_window = int(time.time() // 60)
+            if resp.status_code in (418, 429) and retry_after is not None:
+                self._blocked_until = max(self._blocked_until, time.time() + float(retry_after))
+
+    @property
+    def used_weight(self) -> int:
+        return self._used_weight
+
+    # -- transport -------------------------------------------------------------
+
+    def _request(self, method: str, path: str, params: dict | None = None, signed: bool = False,
+                 retries: int | None = None, timestamp: int | None = None) -> dict:
+        """`timestamp` signs every attempt with that server time instead of the current one."""
+        retries = self.max_retries if retries is None else retries
+        attempt = 0
+        while True:
+            query = dict(params or {})
+            if signed:
+                query["recvWindow"] = RECV_WINDOW
+                query["timestamp"] = self.timestamp() if timestamp is None else timestamp
+                query["signature"] = _sign(query, self._api_secret)
+
+            self._throttle()
+            try:
+                with track_upstream("binance") as call:
+                    resp = self.session.request(method, f"{self.base_url}{path}", params=query, timeout=30)
+                    call.response_bytes(len(resp.content or b""))
+                    call.status(resp.status_code)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= retries:
+                    raise
+                attempt += 1
+                time.sleep(BACKOFF_BASE * 2 ** (attempt - 1))
+                continue
+
+            self._record_headers(resp)
+            if resp.ok:
+                return resp.json()
+
+            payload = _json_or_text(resp)
+            error = BinanceError(resp.status_code, payload)
+            if attempt >= retries or not _is_retryable(error):
+                raise error
+            attempt += 1
+            if error.code == INVALID_TIMESTAMP:
+                self.sync_time()
+            elif "Retry-After" not in resp.headers:
+                # 418/429 with Retry-After are already deferred by _throttle
+                time.sleep(BACKOFF_BASE * 2 ** (attempt - 1))
+
+    # -- orders ----------------------------------------------------------------
+
+    def place_order(self, ticker: str, value: float, client_order_id: str | None = None) -> dict:
+        """
+        Places a MARKET BUY of `value` quote currency. Every attempt carries the same newClientOrderId,
+        and after an ambiguous failure (timeout, 5xx) the order is looked up before being resent. Binance
+        only rejects a duplicate id while the first order is open, which a MARKET order never is for long,
+        so the lookup keeps going until the first request's recvWindow has passed: after that it can no
+        longer be accepted, and an order still unknown is safe to resend.
+        """
+        client_order_id = client_order_id or f"fa-{uuid.uuid4().hex[:28]}"
+        params = {
+            "symbol": ticker,
+            "side": "BUY",
+            "type": "MARKET",
+            "quoteOrderQty": value,
+            "newClientOrderId": client_order_id,
+            "newOrderRespType": "FULL",
+        }
+
+        attempt = 0
+        while True:
+            timestamp = self.timestamp()
+            try:
+                return self._request("POST", "/api/v3/order", params, signed=True, retries=0, timestamp=timestamp)
+            except (requests.ConnectionError, requests.Timeout, BinanceError) as exc:
+                if isinstance(exc, BinanceError) and not _is_retryable(exc):
+                    raise
+                if attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                if isinstance(exc, BinanceError) and exc.code == INVALID_TIMESTAMP:
+                    # Rejected before reaching the matching engine: safe to resend as is
+                    self.sync_time()
+                    continue
+                time.sleep(BACKOFF_BASE * 2 ** (attempt - 1))
+                existing = self._find_order(ticker, client_order_id, timestamp + RECV_WINDOW + CLOCK_MARGIN_MS)
+                if existing is not None:
+                    logger.info("Binance order %s already placed, recovering it", client_order_id)
+                    return existing
+
+    def _find_order(self, ticker: str, client_order_id: str, deadline_ms: int) -> dict | None:
+        """
+        Looks the order up until it is found or a lookup started after `deadline_ms` (server time) finds
+        nothing; before the deadline an unknown order may still be in flight.
+        """
+        while True:
+            past_deadline = self.timestamp() > deadline_ms
+            order = self.get_order(ticker, client_order_id)
+            if order is not None or past_deadline:
+                return order
+            time.sleep(BACKOFF_BASE)
+
+    def get_order(self, ticker: str, client_order_id: str) -> dict | None:
+        """Returns the order (with fills rebuilt from myTrades) or None if Binance does not know it."""
+        try:
+            order = self._request(
+                "GET", "/api/v3/order", {"symbol": ticker, "origClientOrderId": client_order_id}, signed=True
+            )
+        except BinanceError as exc:
+            if exc.code == UNKNOWN_ORDER:
+                return None
+            raise
+
+        if order.get("status") == "FILLED" and "fills" not in order:
+            trades = self._request(
+                "GET", "/api/v3/myTrades", {"symbol": ticker, "orderId": order["orderId"]}, signed=True
+            )
+            order["fills"] = [
+                {
+                    "price": t["price"],
+                    "qty": t["qty"],
+                    "commission": t["commission"],
+                    "commissionAsset": t["commissionAsset"],
+                    "tradeId": t["id"],
+                }
+                for t in trades
+            ]
+        return order
+
+
+def _json_or_text(resp: requests.Response) -> dict:
+    try:
+        return resp.json()
+    except ValueError:
+        return {"msg": resp.text}
+
+
+def _is_retryable(error: BinanceError) -> bool:
+    return error.status_code in (418, 429) or error.status_code >= 500 or error.code == INVALID_TIMESTAMP
+
+
+_client: BinanceClient | None = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> BinanceClient:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = BinanceClient()
+    return _client
 
 
 def create_finapp_event(order: dict, value: float, ticker: str) -> dict:
@@ -98,13 +340,16 @@ def create_finapp_event(order: dict, value: float, ticker: str) -> dict:
         }
     }
 
-    resp = requests.post(
-        f"{finapp.base_url}/api/assets/{asset_id}/asset_events",
-        json=body,
-        headers={"Authorization": f"Bearer {token}"},
-        timeout=30,
-    )
-    resp.raise_for_status()
+    with track_upstream("finapp") as call:
+        resp = requests.post(
+            f"{finapp.base_url}/api/assets/{asset_id}/asset_events",
+            json=body,
+            headers={"Authorization": f"Bearer {token}"},
+            timeout=30,
+        )
+        call.status(resp.status_code)
+        resp.raise_for_status()
+        call.response_bytes(len(resp.content))
     return resp.json()
 
 
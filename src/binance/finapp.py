@@ -2,6 +2,8 @@ from os import getenv
 
 import requests
 
+from ..metrics import track_upstream
+
 
 class Finapp:
     def __init__(self):
@@ -11,11 +13,14 @@ class Finapp:
         self.token: str | None = None
 
     def login(self) -> str:
-        resp = requests.post(
-            f"{self.base_url}/api/sign_in",
-            json={"email": self._email, "password": self._password},
-            timeout=30,
-        )
+        with track_upstream("finapp") as call:
+            resp = requests.post(
+                f"{self.base_url}/api/sign_in",
+                json={"email": self._email, "password": self._password},
+                timeout=30,
+            )
+            call.response_bytes(len(resp.content))
+            call.status(resp.status_code)
         if not resp.ok:
             raise ValueError(resp.json())
         self.token = resp.json()["token"]
@@ -3,12 +3,12 @@ import logging
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
 
-from ..app.dependencies import get_api_key
-from .client import create_finapp_event, place_order
+from ..app.dependencies import get_metered_api_key
+from .client import create_finapp_event, get_client
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/binance", tags=["Binance"])
+router = APIRouter(prefix="/binance", tags=["Binance"], dependencies=[Depends(get_metered_api_key)])
 
 
 class BinanceBuyRequest(BaseModel):
@@ -16,11 +16,11 @@ class BinanceBuyRequest(BaseModel):
     value: float
 
 
-@router.post("/buy", dependencies=[Depends(get_api_key)])
+@router.post("/buy")
 def binance_buy_test(body: BinanceBuyRequest) -> dict:
     """Test a Binance market buy order without executing it (uses /api/v3/order/test)."""
     try:
-        result = place_order(body.ticker, body.value)
+        result = get_client().place_order(body.ticker, body.value)
         logger.info("Binance order: %s", result)
 
         if result.get("status") == "FILLED":
@@ -0,0 +1,340 @@
+"""
+Caches for upstream data.
+
+When an upstream is slow or down, history requests are answered from the last successful fetch
+(flagged as stale) while a single background refresh runs.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Generic, Hashable, Iterator, TypeVar
+
+from .metrics import CACHE_BYTES, record_cache
+from .scheduler import BACKGROUND, priority
+
+logger = logging.getLogger(__name__)
+
+K = TypeVar("K", bound=Hashable)
+T = TypeVar("T")
+
+
+# ---------------------------------------------------------------------------
+# Staleness reporting
+# ---------------------------------------------------------------------------
+
+class Staleness:
+    __slots__ = ("stale", "age")
+
+    def __init__(self):
+        self.stale = False
+        self.age = 0.0
+
+    def mark(self, age: float) -> None:
+        self.stale = True
+        self.age = max(self.age, age)
+
+
+_staleness: ContextVar[Staleness | None] = ContextVar("staleness", default=None)
+
+
+@contextmanager
+def track_staleness() -> Iterator[Staleness]:
+    """Collects whether any data served inside the block came from a stale cache entry."""
+    state = Staleness()
+    token = _staleness.set(state)
+    try:
+        yield state
+    finally:
+        _staleness.reset(token)
+
+
+def mark_stale(age: float) -> None:
+    state = _staleness.get()
+    if state is not None:
+        state.mark(age)
+
+
+# ---------------------------------------------------------------------------
+# LRU bounded by entry count and/or bytes
+# ---------------------------------------------------------------------------
+
+class LRU(Generic[K, T]):
+    """
+    Thread-safe LRU map. With `max_bytes`, entries are weighed with `sizeof` and the least recently
+    used ones are dropped until the total fits; a single entry larger than the budget is not kept.
+    """
+
+    def __init__(
+        self,
+        max_entries: int | None = None,
+        max_bytes: int | None = None,
+        sizeof: Callable[[T], int] | None = None,
+        name: str | None = None,
+    ):
+        if max_bytes is not None and sizeof is None:
+            raise ValueError("max_bytes requires sizeof")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._lock = threading.Lock()
+        # key -> (value, size)
+        self._entries: OrderedDict[K, tuple[T, int]] = OrderedDict()
+        self._bytes = 0
+        if name is not None:
+            CACHE_BYTES.set_function(lambda: self._bytes, cache=name)
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def get(self, key: K) -> T | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: K, value: T) -> None:
+        size = self._sizeof(value) if self._sizeof is not None else 0
+        with self._lock:
+            self._pop(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while (self.max_entries is not None and len(self._entries) > self.max_entries) or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+    def pop(self, key: K) -> T | None:
+        with self._lock:
+            return self._pop(key)
+
+    def _pop(self, key: K) -> T | None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        self._bytes -= entry[1]
+        return entry[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# ---------------------------------------------------------------------------
+# Cache weighted by hit rate and footprint
+# ---------------------------------------------------------------------------
+
+class HitRateCache(Generic[K, T]):
+    """
+    Thread-safe map bounded by bytes for derived values that are cheap to keep and costly to rebuild.
+    Past the budget it drops the entries with the fewest hits per second per byte, so a small, busy
+    entry outlives a large one nobody asks for. Hit rates are measured from insertion, counting the
+    insertion as a hit and at least MIN_AGE seconds, so new entries are not evicted on arrival.
+    """
+
+    MIN_AGE = 60.0
+
+    def __init__(self, max_bytes: int, sizeof: Callable[[T], int], name: str | None = None):
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._lock = threading.Lock()
+        # key -> [value, size, hits, inserted_at]
+        self._entries: dict[K, list] = {}
+        self._bytes = 0
+        if name is not None:
+            CACHE_BYTES.set_function(lambda: self._bytes, cache=name)
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def get(self, key: K) -> T | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            entry[2] += 1
+            return entry[0]
+
+    def put(self, key: K, value: T) -> None:
+        """Adds or replaces an entry; a replaced entry keeps its hit history."""
+        size = self._sizeof(value)
+        now = time.monotonic()
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            if size > self.max_bytes:
+                return
+            hits, inserted_at = (previous[2], previous[3]) if previous is not None else (1, now)
+            self._entries[key] = [value, size, hits, inserted_at]
+            self._bytes += size
+            if self._bytes > self.max_bytes:
+                self._evict(keep=key, now=now)
+
+    def _evict(self, keep: K, now: float) -> None:
+        def score(item: tuple[K, list]) -> float:
+            _, (_, size, hits, inserted_at) = item
+            return hits / max(now - inserted_at, self.MIN_AGE) / max(size, 1)
+
+        for key, (_, size, _, _) in sorted((i for i in self._entries.items() if i[0] != keep), key=score):
+            if self._bytes <= self.max_bytes:
+                break
+            del self._entries[key]
+            self._bytes -= size
+
+    def pop(self, key: K) -> T | None:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+            self._bytes -= entry[1]
+            return entry[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# ---------------------------------------------------------------------------
+# Stale-while-revalidate cache
+# ---------------------------------------------------------------------------
+
+_refresh_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="swr-refresh")
+
+
+class StaleWhileRevalidate(Generic[T]):
+    """
+    Caches loader results per key. Fresh entries are returned as is; entries past their TTL but
+    within `max_stale` are returned immediately (and marked stale) while one background refresh
+    per key reloads them. Only a missing (or too old) entry makes the caller wait for the loader, and
+    concurrent callers for the same key wait for one load instead of each running it.
+    A loader result that is itself stale (a fallback to older data) is kept as already expired.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl: float,
+        max_stale: float,
+        max_entries: int = 512,
+        max_bytes: int | None = None,
+        sizeof: Callable[[T], int] | None = None,
+    ):
+        self.name = name
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._lock = threading.Lock()
+        # key -> (value, fetched_at, ttl)
+        self._entries: LRU[Hashable, tuple[T, float, float]] = LRU(
+            max_entries=max_entries,
+            max_bytes=max_bytes,
+            sizeof=(lambda entry: sizeof(entry[0])) if sizeof is not None else None,
+            name=name if max_bytes is not None else None,
+        )
+        self._refreshing: set[Hashable] = set()
+        # key -> the in-progress synchronous load that concurrent misses wait on
+        self._loading: dict[Hashable, Future] = {}
+
+    def get(self, key: Hashable, loader: Callable[[], T], ttl: float | None = None) -> T:
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, fetched_at, entry_ttl = entry
+            age = now - fetched_at
+            if age < entry_ttl:
+                record_cache(self.name, "hit")
+                return value
+            if age < self.max_stale:
+                record_cache(self.name, "stale")
+                mark_stale(age)
+                self._refresh_in_background(key, loader, ttl)
+                return value
+
+        record_cache(self.name, "miss")
+        value, staleness = self._load_once(key, loader, ttl)
+        if staleness.stale:
+            mark_stale(staleness.age)
+        return value
+
+    def put(self, key: Hashable, value: T, ttl: float | None = None, age: float = 0.0) -> None:
+        self._entries.put(key, (value, time.monotonic() - age, self.ttl if ttl is None else ttl))
+
+    @staticmethod
+    def _load(loader: Callable[[], T]) -> tuple[T, Staleness]:
+        state = Staleness()
+        token = _staleness.set(state)
+        try:
+            return loader(), state
+        finally:
+            _staleness.reset(token)
+
+    def _load_once(self, key: Hashable, loader: Callable[[], T], ttl: float | None) -> tuple[T, Staleness]:
+        """Runs `loader` for the first caller missing `key`; callers arriving meanwhile share its result or error."""
+        with self._lock:
+            future = self._loading.get(key)
+            leader = future is None
+            if leader:
+                future = self._loading[key] = Future()
+        if not leader:
+            return future.result()
+        try:
+            value, staleness = self._load(loader)
+            self._put_loaded(key, value, staleness, ttl)
+            future.set_result((value, staleness))
+            return value, staleness
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            with self._lock:
+                del self._loading[key]
+
+    def _put_loaded(self, key: Hashable, value: T, staleness: Staleness, ttl: float | None) -> None:
+        if staleness.stale:
+            # Expired from the start: served flagged stale, and the next request refreshes it again
+            self.put(key, value, ttl=0.0, age=staleness.age)
+        else:
+            self.put(key, value, ttl)
+
+    def _refresh_in_background(self, key: Hashable, loader: Callable[[], T], ttl: float | None) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        _refresh_pool.submit(self._refresh, key, loader, ttl)
+
+    def _refresh(self, key: Hashable, loader: Callable[[], T], ttl: float | None) -> None:
+        try:
+            with priority(BACKGROUND):
+                value, staleness = self._load(loader)
+            self._put_loaded(key, value, staleness, ttl)
+        except Exception as exc:
+            logger.warning("Background refresh of %s %s failed: %s", self.name, key, exc)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,160 @@
+"""
+Trading and business-day calendars, computed offline from holiday rules.
+
+Each calendar is a NumPy busdaycalendar (weekmask + holidays for FIRST_YEAR..LAST_YEAR), so session
+checks, rolls and counts over whole ranges are single vectorized calls. Days are calendar dates in the
+venue's own timezone; Yahoo daily bars and BCB rates are stamped on that same date in UTC, so a session
+day d owns the UTC range [d 00:00, d+1 00:00).
+"""
+
+from datetime import date, timedelta
+from typing import Callable, Iterable
+
+import numpy as np
+
+from .series import DAY
+
+FIRST_YEAR = 1990
+LAST_YEAR = 2100
+
+# Closures outside the regular rules (national mourning, weather, 9/11)
+NYSE_SPECIAL_CLOSURES = (
+    date(1994, 4, 27), date(2001, 9, 11), date(2001, 9, 12), date(2001, 9, 13), date(2001, 9, 14),
+    date(2004, 6, 11), date(2007, 1, 2), date(2012, 10, 29), date(2012, 10, 30), date(2018, 12, 5),
+    date(2025, 1, 9),
+)
+B3_INDICES = {"^BVSP", "^IBX50"}
+
+
+def easter(year: int) -> date:
+    """Gregorian Easter Sunday (anonymous algorithm)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """The n-th `weekday` (Monday=0) of the month; n=-1 is the last one."""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(day: date) -> date:
+    """US rule: Saturday holidays are observed on Friday, Sunday ones on Monday."""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+def brazil_bank_holidays(year: int) -> list[date]:
+    """National holidays plus Carnival and Corpus Christi, when banks (and BCB's SGS series) do not run."""
+    e = easter(year)
+    days = [
+        date(year, 1, 1), e - timedelta(days=48), e - timedelta(days=47), e - timedelta(days=2),
+        date(year, 4, 21), date(year, 5, 1), e + timedelta(days=60), date(year, 9, 7), date(year, 10, 12),
+        date(year, 11, 2), date(year, 11, 15), date(year, 12, 25),
+    ]
+    if year >= 2024:
+        # Dia da Consciência Negra became a national holiday (Lei 14.759/2023)
+        days.append(date(year, 11, 20))
+    return days
+
+
+def b3_holidays(year: int) -> list[date]:
+    days = brazil_bank_holidays(year) + [date(year, 12, 24), date(year, 12, 31)]
+    if year < 2022:
+        # São Paulo city/state holidays; B3 trades on them since 2022
+        days += [date(year, 1, 25), date(year, 7, 9), date(year, 11, 20)]
+    return days
+
+
+def nyse_holidays(year: int) -> list[date]:
+    days = [
+        _nth_weekday(year, 2, 0, 3), easter(year) - timedelta(days=2), _nth_weekday(year, 5, 0, -1),
+        _observed(date(year, 7, 4)), _nth_weekday(year, 9, 0, 1), _nth_weekday(year, 11, 3, 4),
+        _observed(date(year, 12, 25)),
+    ]
+    # A Saturday New Year's Day is not observed on the Friday before (it would close the year's last session)
+    if date(year, 1, 1).weekday() != 5:
+        days.append(_observed(date(year, 1, 1)))
+    if year >= 1998:
+        days.append(_nth_weekday(year, 1, 0, 3))
+    if year >= 2022:
+        days.append(_observed(date(year, 6, 19)))
+    return days + [day for day in NYSE_SPECIAL_CLOSURES if day.year == year]
+
+
+def _day(epoch: int) -> np.datetime64:
+    return np.datetime64(epoch // DAY, "D")
+
+
+class Calendar:
+    def __init__(self, name: str, weekmask: str = "1111100", holidays: Callable[[int], Iterable[date]] | None = None):
+        self.name = name
+        days = [day for year in range(FIRST_YEAR, LAST_YEAR + 1) for day in (holidays(year) if holidays else ())]
+        self._busdays = np.busdaycalendar(weekmask=weekmask, holidays=np.array(days, dtype="datetime64[D]"))
+
+    def __repr__(self) -> str:
+        return f"Calendar({self.name!r})"
+
+    def is_session(self, day: date) -> bool:
+        return bool(np.is_busday(np.datetime64(day, "D"), busdaycal=self._busdays))
+
+    def previous_session(self, day: date) -> date:
+        """`day` if it is a session, else the last session before it."""
+        return np.busday_offset(np.datetime64(day, "D"), 0, roll="backward", busdaycal=self._busdays).item()
+
+    def next_session(self, day: date) -> date:
+        """`day` if it is a session, else the first session after it."""
+        return np.busday_offset(np.datetime64(day, "D"), 0, roll="forward", busdaycal=self._busdays).item()
+
+    def sessions(self, start: date, end: date) -> np.ndarray:
+        """Session days in [start, end) as datetime64[D]."""
+        days = np.arange(np.datetime64(start, "D"), np.datetime64(end, "D"))
+        return days[np.is_busday(days, busdaycal=self._busdays)]
+
+    def has_session(self, start: int, end: int) -> bool:
+        """Whether any session day overlaps the epoch range [start, end)."""
+        if end <= start:
+            return False
+        return int(np.busday_count(_day(start), _day(end - 1) + 1, busdaycal=self._busdays)) > 0
+
+    def session_start(self, epoch: int) -> int:
+        """UTC-midnight epoch of the session on or before the day containing `epoch`."""
+        day = np.busday_offset(_day(epoch), 0, roll="backward", busdaycal=self._busdays)
+        return int(day.astype(np.int64)) * DAY
+
+
+B3 = Calendar("B3", holidays=b3_holidays)
+NYSE = Calendar("NYSE", holidays=nyse_holidays)
+CRYPTO = Calendar("crypto", weekmask="1111111")
+BCB = Calendar("BCB", holidays=brazil_bank_holidays)
+
+
+def for_symbol(ticker: str) -> Calendar | None:
+    """
+    Calendar of a Yahoo symbol, inferred from its form like the quote currency: .SA and B3 indices trade
+    on B3, BASE-QUOTE pairs are crypto, plain symbols are US listings. Anything else (other exchanges,
+    FX, futures, indices) has no known calendar.
+    """
+    symbol = ticker.upper()
+    if symbol.endswith(".SA") or symbol in B3_INDICES:
+        return B3
+    if "=" in symbol or "^" in symbol or "." in symbol:
+        return None
+    base, dash, quote = symbol.rpartition("-")
+    if dash and base and len(quote) in (3, 4) and quote.isalpha():
+        return CRYPTO
+    return NYSE
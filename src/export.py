@@ -0,0 +1,137 @@
+"""
+Bulk export of price and SELIC series as Parquet or Arrow IPC (Feather v2) files.
+
+Series come from the same caches and store as the JSON endpoints (missing ranges are fetched once)
+and are written as one row group / record batch per ticker as they load, so a response or file grows
+incrementally instead of being built in memory. pyarrow is optional and imported on first use.
+"""
+
+import io
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import numpy as np
+
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+MEDIA_TYPES = {"parquet": "application/vnd.apache.parquet", "arrow": "application/vnd.apache.arrow.file"}
+MAX_EXPORT_TICKERS = 1_000
+# Tickers loaded concurrently per step; each step's row groups are written before the next loads
+LOAD_CHUNK = 8
+
+
+class ExportUnavailableError(RuntimeError):
+    pass
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401  (registers pyarrow.parquet)
+    except ImportError as exc:
+        raise ExportUnavailableError("Export needs pyarrow: pip install pyarrow") from exc
+    return pyarrow
+
+
+def price_schema():
+    pa = _pyarrow()
+    return pa.schema([
+        ("ticker", pa.string()),
+        ("time", pa.timestamp("s", tz="UTC")),
+        ("close", pa.float64()),
+    ])
+
+
+def selic_schema():
+    pa = _pyarrow()
+    # rate is BCB's daily value in percent (0.0519 = 0.0519% a day)
+    return pa.schema([("date", pa.timestamp("s", tz="UTC")), ("rate", pa.float64())])
+
+
+def price_batches(tickers: list[str], start: datetime, end: datetime | None) -> Iterator:
+    """One record batch per ticker (tickers without data are skipped)."""
+    from .service import _gather, _ticker_series
+
+    pa = _pyarrow()
+    schema = price_schema()
+    for offset in range(0, len(tickers), LOAD_CHUNK):
+        chunk = tickers[offset:offset + LOAD_CHUNK]
+        loaded = _gather([lambda t=ticker: _ticker_series(t, start, end) for ticker in chunk])
+        for ticker, series in zip(chunk, loaded):
+            if len(series) == 0:
+                continue
+            yield pa.record_batch([
+                # Plain strings: Arrow IPC files allow one dictionary per field, not one per batch
+                pa.array(np.full(len(series), ticker, dtype=object), pa.string()),
+                pa.array(series.epochs, pa.timestamp("s", tz="UTC")),
+                pa.array(series.values, pa.float64()),
+            ], schema=schema)
+
+
+def selic_batches(start: datetime, end: datetime | None) -> Iterator:
+    from .service import _selic_series
+
+    pa = _pyarrow()
+    series = _selic_series(start, end)
+    yield pa.record_batch([
+        pa.array(series.epochs, pa.timestamp("s", tz="UTC")), pa.array(series.values, pa.float64()),
+    ], schema=selic_schema())
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands written bytes back out between row groups."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream(batches: Iterable, schema, fmt: str) -> Iterator[bytes]:
+    """Encodes batches as `fmt`, yielding the bytes written after each batch and finally the footer."""
+    pa = _pyarrow()
+    sink = _ChunkSink()
+    if fmt == "parquet":
+        writer = pa.parquet.ParquetWriter(sink, schema, compression="zstd")
+        write = writer.write_batch
+    elif fmt == "arrow":
+        writer = pa.ipc.new_file(sink, schema)
+        write = writer.write_batch
+    else:
+        raise ValueError(f"Unknown export format '{fmt}'; expected one of {sorted(FORMATS)}")
+    try:
+        for batch in batches:
+            write(batch)
+            if data := sink.drain():
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def write_file(path: Path | str, batches: Iterable, schema, fmt: str) -> int:
+    """Writes an export to `path` (atomically); returns its size in bytes."""
+    path = Path(path)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    size = 0
+    with open(tmp, "wb") as f:
+        for data in stream(batches, schema, fmt):
+            f.write(data)
+            size += len(data)
+    tmp.replace(path)
+    return size
@@ -0,0 +1,302 @@
+"""
+Background jobs for requests too heavy to answer within the proxy timeout.
+
+A job is a directory under JOBS_DIR holding status.json and, once done, result.json (the same body the
+synchronous endpoint would return). Both are written atomically, so any API worker can answer polls.
+Jobs run in a bounded process pool: the NumPy work and JSON encoding happen outside the serving
+process, and each child reads the shared series store instead of refetching. Finished jobs expire
+after JOB_TTL seconds.
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import BrokenExecutor, Executor, Future, ProcessPoolExecutor
+from datetime import date, datetime
+from pathlib import Path
+from typing import Callable
+
+from pydantic import BaseModel, Field
+
+from .metrics import REGISTRY, Counter, Gauge
+from .models import CURRENCY_PATTERN, PortfolioRequest, SelicScenario
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOBS_DIR = Path(tempfile.gettempdir()) / "holdings-jobs"
+JOB_TTL = 3_600.0
+JOB_WORKERS = 2
+# Share of each upstream's budget (src/scheduler.py) the job pool gets in total, split evenly between its
+# workers; each child process would otherwise enforce the full budget on its own
+JOB_UPSTREAM_SHARE = 0.5
+# Jobs accepted but not finished, per API process
+MAX_PENDING = 32
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+JOBS = REGISTRY.register(Counter(
+    "jobs_total", "Background jobs by kind and final status.", ("kind", "status"),
+))
+JOBS_PENDING = REGISTRY.register(Gauge(
+    "jobs_pending", "Background jobs queued or running in this process.",
+))
+
+_JOB_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+class JobQueueFullError(RuntimeError):
+    pass
+
+
+# ---------------------------------------------------------------------------
+# Parameters: the same fields as the synchronous endpoints' query strings; the API checks their sizes
+# with the endpoints' own validators before submitting
+# ---------------------------------------------------------------------------
+
+class TickerJob(BaseModel):
+    ticker: str
+    start: datetime
+    end: datetime | None = None
+    currency: str | None = Field(default=None, pattern=CURRENCY_PATTERN)
+
+
+class SelicJob(BaseModel):
+    start: date
+    end: date | None = None
+    ir: bool = False
+    percentage: float = 100.0
+
+
+class CompareJob(BaseModel):
+    start: date
+    end: date | None = None
+    tickers: list[str] = []
+    # "100", "110:ir": the /compare query values
+    selic: list[str] = []
+
+
+class AnalyticsJob(BaseModel):
+    tickers: list[str]
+    start: date
+    end: date | None = None
+    windows: list[int] = [30, 365]
+    currency: str | None = Field(default=None, pattern=CURRENCY_PATTERN)
+
+
+def _midnight(day: date | None) -> datetime | None:
+    return datetime.combine(day, datetime.min.time()) if day else None
+
+
+def _run_ticker(p: TickerJob) -> BaseModel:
+    from .service import fetch_ticker
+    return fetch_ticker(p.ticker, p.start, p.end, p.currency)
+
+
+def _run_selic(p: SelicJob) -> BaseModel:
+    from .service import fetch_selic
+    return fetch_selic(start=_midnight(p.start), end=_midnight(p.end), ir=p.ir, percentage=p.percentage)
+
+
+def _run_compare(p: CompareJob) -> BaseModel:
+    from .service import compare
+    scenarios = [SelicScenario.parse(text) for text in p.selic]
+    return compare(p.tickers, scenarios, _midnight(p.start), _midnight(p.end))
+
+
+def _run_analytics(p: AnalyticsJob) -> BaseModel:
+    from .service import analyze
+    return analyze(p.tickers, _midnight(p.start), _midnight(p.end), p.windows, p.currency)
+
+
+def _run_portfolio(p: PortfolioRequest) -> BaseModel:
+    from .service import value_portfolio
+    return value_portfolio(p.events, p.currency, p.end)
+
+
+KINDS: dict[str, tuple[type[BaseModel], Callable[..., BaseModel]]] = {
+    "ticker": (TickerJob, _run_ticker),
+    "selic": (SelicJob, _run_selic),
+    "compare": (CompareJob, _run_compare),
+    "analytics": (AnalyticsJob, _run_analytics),
+    "portfolio": (PortfolioRequest, _run_portfolio),
+}
+
+
+# ---------------------------------------------------------------------------
+# Execution (runs in the pool's child process)
+# ---------------------------------------------------------------------------
+
+def _write_json(path: Path, data: dict) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.stem, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _update_status(job_dir: Path, **changes) -> dict:
+    status = json.loads((job_dir / "status.json").read_text())
+    status.update(changes)
+    _write_json(job_dir / "status.json", status)
+    return status
+
+
+def run_job(kind: str, params_json: str, job_dir: str) -> str:
+    """Executes one job and records its outcome on disk; returns the final status."""
+    path = Path(job_dir)
+    _update_status(path, status=RUNNING, started_at=time.time())
+    model, run = KINDS[kind]
+    try:
+        result = run(model.model_validate_json(params_json))
+        tmp = path / "result.json.tmp"
+        tmp.write_text(result.model_dump_json())
+        os.replace(tmp, path / "result.json")
+    except Exception as exc:
+        logger.warning("Job %s (%s) failed: %s", path.name, kind, exc)
+        _update_status(path, status=FAILED, error=f"{type(exc).__name__}: {exc}", finished_at=time.time())
+        return FAILED
+    _update_status(path, status=DONE, finished_at=time.time())
+    return DONE
+
+
+# ---------------------------------------------------------------------------
+# Submission and lookup (runs in the API process)
+# ---------------------------------------------------------------------------
+
+class JobManager:
+    def __init__(
+        self,
+        root: Path | str | None = None,
+        ttl: float = JOB_TTL,
+        max_pending: int = MAX_PENDING,
+        executor_factory: Callable[[], Executor] | None = None,
+    ):
+        self.root = Path(root or os.getenv("JOBS_DIR") or DEFAULT_JOBS_DIR)
+        self.ttl = ttl
+        self.max_pending = max_pending
+        self._executor_factory = executor_factory or _default_executor
+        self._executor: Executor | None = None
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    def _pool(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._executor_factory()
+            return self._executor
+
+    def _discard_pool(self) -> None:
+        # A child that died takes the whole ProcessPoolExecutor down with it; start a new one
+        with self._lock:
+            broken, self._executor = self._executor, None
+        if broken is not None:
+            broken.shutdown(wait=False)
+
+    def submit(self, kind: str, params: BaseModel) -> dict:
+        self.sweep()
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise JobQueueFullError(f"{self._pending} jobs pending; try again later")
+            self._pending += 1
+            JOBS_PENDING.set(self._pending)
+
+        job_id = uuid.uuid4().hex
+        job_dir = self.root / job_id
+        job_dir.mkdir(parents=True)
+        status = {"id": job_id, "kind": kind, "status": QUEUED, "submitted_at": time.time()}
+        _write_json(job_dir / "status.json", status)
+        try:
+            try:
+                future = self._pool().submit(run_job, kind, params.model_dump_json(), str(job_dir))
+            except BrokenExecutor:
+                self._discard_pool()
+                future = self._pool().submit(run_job, kind, params.model_dump_json(), str(job_dir))
+        except Exception:
+            self._finished(kind, None)
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise
+        future.add_done_callback(lambda f: self._finished(kind, f, job_dir))
+        return status
+
+    def _finished(self, kind: str, future: Future | None, job_dir: Path | None = None) -> None:
+        with self._lock:
+            self._pending -= 1
+            JOBS_PENDING.set(self._pending)
+        if future is None:
+            return
+        exc = future.exception()
+        if exc is not None:
+            # The child died (or could not start) before recording an outcome
+            logger.warning("Job %s crashed: %s", job_dir.name, exc)
+            if isinstance(exc, BrokenExecutor):
+                self._discard_pool()
+            _update_status(job_dir, status=FAILED, error=f"{type(exc).__name__}: {exc}", finished_at=time.time())
+            JOBS.inc(kind=kind, status=FAILED)
+        else:
+            JOBS.inc(kind=kind, status=future.result())
+
+    def _dir(self, job_id: str) -> Path | None:
+        if not _JOB_ID.match(job_id):
+            return None
+        job_dir = self.root / job_id
+        return job_dir if (job_dir / "status.json").exists() else None
+
+    def status(self, job_id: str) -> dict | None:
+        job_dir = self._dir(job_id)
+        if job_dir is None:
+            return None
+        status = json.loads((job_dir / "status.json").read_text())
+        if status.get("finished_at"):
+            if time.time() - status["finished_at"] > self.ttl:
+                shutil.rmtree(job_dir, ignore_errors=True)
+                return None
+            status["expires_at"] = status["finished_at"] + self.ttl
+        return status
+
+    def result_path(self, job_id: str) -> Path | None:
+        status = self.status(job_id)
+        if status is None or status["status"] != DONE:
+            return None
+        return self.root / job_id / "result.json"
+
+    def sweep(self) -> int:
+        """Deletes finished jobs past their TTL; returns how many were removed."""
+        removed = 0
+        if not self.root.exists():
+            return removed
+        now = time.time()
+        for job_dir in self.root.iterdir():
+            try:
+                status = json.loads((job_dir / "status.json").read_text())
+            except (OSError, ValueError):
+                continue
+            finished = status.get("finished_at")
+            if finished and now - finished > self.ttl:
+                shutil.rmtree(job_dir, ignore_errors=True)
+                removed += 1
+        return removed
+
+
+def _init_worker(workers: int) -> None:
+    from .scheduler import scheduler
+    scheduler.scale(JOB_UPSTREAM_SHARE / workers)
+
+
+def _default_executor() -> Executor:
+    # spawn: children must not inherit the API process's threads and locks
+    workers = int(os.getenv("JOB_WORKERS") or JOB_WORKERS)
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(workers,),
+    )
+
+
+manager = JobManager()
@@ -0,0 +1,132 @@
+"""
+Live price fan-out.
+
+One poller per process fetches the latest price of every ticker anyone is subscribed to, in a single
+batch per interval, and pushes changes to each subscriber's queue. Upstream load therefore follows
+the number of distinct tickers, not the number of open connections. The poller runs only while
+there are subscribers.
+"""
+
+import asyncio
+import contextvars
+import logging
+from typing import Callable
+
+import anyio.to_thread
+
+from .metrics import REGISTRY, Counter, Gauge
+from .models import TickerPriceResponse
+from .scheduler import BACKGROUND, priority
+from .service import fetch_latest_prices
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 5.0
+# Updates buffered per subscriber; a slow client loses the oldest ones, not the newest
+QUEUE_SIZE = 256
+
+SUBSCRIBERS = REGISTRY.register(Gauge(
+    "live_subscribers", "Open live price subscriptions.",
+))
+LIVE_TICKERS = REGISTRY.register(Gauge(
+    "live_tickers", "Distinct tickers polled for live subscriptions.",
+))
+LIVE_POLLS = REGISTRY.register(Counter(
+    "live_polls_total", "Batched live price polls.",
+))
+
+
+class Subscription:
+    __slots__ = ("tickers", "queue")
+
+    def __init__(self, tickers: frozenset[str]):
+        self.tickers = tickers
+        self.queue: asyncio.Queue[TickerPriceResponse] = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def push(self, price: TickerPriceResponse) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(price)
+
+    async def next(self, timeout: float | None = None) -> TickerPriceResponse | None:
+        """The next update, or None if none arrives within `timeout`."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class PriceHub:
+    def __init__(
+        self,
+        fetch: Callable[[list[str]], dict[str, TickerPriceResponse]] = fetch_latest_prices,
+        interval: float = POLL_INTERVAL,
+    ):
+        self._fetch = fetch
+        self.interval = interval
+        self._subscriptions: set[Subscription] = set()
+        self._latest: dict[str, TickerPriceResponse] = {}
+        self._task: asyncio.Task | None = None
+        self._wake: asyncio.Event | None = None
+
+    def tickers(self) -> list[str]:
+        return sorted(set().union(*(s.tickers for s in self._subscriptions)))
+
+    def subscribe(self, tickers: list[str]) -> Subscription:
+        """Must be called from the event loop; starts the poller if it is not running."""
+        subscription = Subscription(frozenset(tickers))
+        new_tickers = not subscription.tickers <= set(self.tickers())
+        self._subscriptions.add(subscription)
+        SUBSCRIBERS.set(len(self._subscriptions))
+        LIVE_TICKERS.set(len(self.tickers()))
+        # New subscribers get the last known prices right away instead of waiting for the next poll
+        for ticker in sorted(subscription.tickers):
+            if ticker in self._latest:
+                subscription.push(self._latest[ticker])
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._wake = asyncio.Event()
+            # The task would otherwise copy the first subscriber's request context (its timings, staleness
+            # tracking and interactive priority) for as long as it runs
+            self._task = contextvars.Context().run(loop.create_task, self._run())
+        elif new_tickers:
+            # Poll now rather than leaving the new tickers without a price for a whole interval
+            self._wake.set()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscriptions.discard(subscription)
+        SUBSCRIBERS.set(len(self._subscriptions))
+        LIVE_TICKERS.set(len(self.tickers()))
+
+    async def _run(self) -> None:
+        while self._subscriptions:
+            tickers = self.tickers()
+            try:
+                # Behind interactive requests: a poll of many tickers would otherwise take Yahoo's whole budget
+                with priority(BACKGROUND):
+                    prices = await anyio.to_thread.run_sync(self._fetch, tickers)
+            except Exception as exc:
+                logger.warning("Live price poll failed: %s", exc)
+                prices = {}
+            LIVE_POLLS.inc()
+            self.publish(prices)
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+        # Nobody is listening; the next subscriber fetches fresh prices
+        self._latest.clear()
+
+    def publish(self, prices: dict[str, TickerPriceResponse]) -> None:
+        """Pushes prices that changed since the last poll to every subscriber of their ticker."""
+        changed = [p for t, p in prices.items() if self._latest.get(t) != p]
+        self._latest.update(prices)
+        for subscription in list(self._subscriptions):
+            for price in changed:
+                if price.ticker in subscription.tickers:
+                    subscription.push(price)
+
+
+hub = PriceHub()
@@ -0,0 +1,264 @@
+"""
+In-process metrics rendered in the Prometheus text exposition format.
+
+Each metric keeps plain Python numbers per label tuple behind a lock, so recording is a dict lookup
+and a few additions; nothing is computed until /metrics is scraped.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (1e3, 1e4, 1e5, 1e6, 1e7)
+ROW_BUCKETS = (1, 10, 100, 1_000, 10_000, 100_000)
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+
+    def render(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+        self._callbacks: dict[tuple[str, ...], Callable[[], float]] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set_function(self, fn: Callable[[], float], **labels: str) -> None:
+        """Evaluates `fn` at scrape time instead of storing a value."""
+        key = self._key(labels)
+        with self._lock:
+            self._callbacks[key] = fn
+
+    def value(self, **labels: str) -> float:
+        key = self._key(labels)
+        if key in self._callbacks:
+            return float(self._callbacks[key]())
+        return self._values.get(key, 0.0)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = list(self._values.items())
+            callbacks = list(self._callbacks.items())
+        for key, fn in callbacks:
+            try:
+                items.append((key, float(fn())))
+            except Exception:
+                continue
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # per label tuple: [count per bucket (+Inf last)], sum, count
+        self._series: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0, 0])
+            series[0][index] += 1
+            series[1][0] += value
+            series[1][1] += 1
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(self._key(labels))
+        return int(series[1][1]) if series else 0
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = [(k, list(counts), list(totals)) for k, (counts, totals) in self._series.items()]
+        lines = []
+        for key, counts, (total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {int(count)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.header())
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUEST_LATENCY = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "Time spent serving HTTP requests.", ("method", "route", "status"),
+))
+UPSTREAM_LATENCY = REGISTRY.register(Histogram(
+    "upstream_request_duration_seconds", "Latency of calls to upstream APIs.", ("upstream",),
+))
+UPSTREAM_ERRORS = REGISTRY.register(Counter(
+    "upstream_errors_total", "Failed upstream calls by exception type or HTTP status (http_<code>).",
+    ("upstream", "error"),
+))
+UPSTREAM_RESPONSE_BYTES = REGISTRY.register(Histogram(
+    "upstream_response_bytes", "Size of upstream HTTP response bodies.", ("upstream",), buckets=SIZE_BUCKETS,
+))
+UPSTREAM_RESPONSE_ROWS = REGISTRY.register(Histogram(
+    "upstream_response_rows", "Rows or results returned by upstream calls.", ("upstream",), buckets=ROW_BUCKETS,
+))
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    "cache_requests_total", "Cache lookups by cache and result (hit/miss/stale).", ("cache", "result"),
+))
+CACHE_BYTES = REGISTRY.register(Gauge(
+    "cache_bytes", "Approximate memory held by byte-bounded caches.", ("cache",),
+))
+THREADPOOL_IN_USE = REGISTRY.register(Gauge(
+    "threadpool_threads_in_use", "Worker threads currently running sync endpoints.",
+))
+THREADPOOL_SIZE = REGISTRY.register(Gauge(
+    "threadpool_threads_total", "Size of the worker thread pool.",
+))
+
+
+class UpstreamCall:
+    """Handle yielded by track_upstream to attach the response size and status to the observation."""
+
+    __slots__ = ("upstream", "failed")
+
+    def __init__(self, upstream: str):
+        self.upstream = upstream
+        self.failed = False
+
+    def status(self, status_code: int) -> None:
+        """Counts a non-2xx/3xx HTTP response as an error, whether or not the caller raises for it."""
+        if status_code >= 400:
+            self.failed = True
+            UPSTREAM_ERRORS.inc(upstream=self.upstream, error=f"http_{status_code}")
+
+    def response_bytes(self, size: int) -> None:
+        UPSTREAM_RESPONSE_BYTES.observe(size, upstream=self.upstream)
+
+    def response_rows(self, rows: int) -> None:
+        UPSTREAM_RESPONSE_ROWS.observe(rows, upstream=self.upstream)
+
+
+@contextmanager
+def track_upstream(upstream: str) -> Iterator[UpstreamCall]:
+    """
+    Times an upstream call and counts it as an error if the block raises or reports an error status
+    (once: an exception raised for a status already counted is not counted again).
+    """
+    start = time.perf_counter()
+    call = UpstreamCall(upstream)
+    try:
+        yield call
+    except Exception as exc:
+        if not call.failed:
+            UPSTREAM_ERRORS.inc(upstream=upstream, error=type(exc).__name__)
+        raise
+    finally:
+        UPSTREAM_LATENCY.observe(time.perf_counter() - start, upstream=upstream)
+
+
+def record_cache(cache: str, result: str) -> None:
+    """`result` is "hit", "miss" or "stale" (served past its TTL)."""
+    CACHE_REQUESTS.inc(cache=cache, result=result)
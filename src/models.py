@@ -1,7 +1,11 @@
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
 from pydantic import BaseModel
 
+# ISO 4217-style code accepted wherever a conversion currency is passed, e.g. BRL
+CURRENCY_PATTERN = "^[A-Za-z]{3}$"
+
+
 class PricePoint(BaseModel):
     datetime: datetime
     price: float
@@ -35,3 +39,91 @@ class TickerPriceResponse(BaseModel):
     ticker: str
     datetime: datetime
     price: float
+
+
+class SelicScenario(BaseModel):
+    percentage: float = 100.0
+    ir: bool = False
+
+    @classmethod
+    def parse(cls, text: str) -> "SelicScenario":
+        """"110" is 110% of SELIC; a ":ir" suffix ("110:ir") applies Imposto de Renda. ValueError otherwise."""
+        percentage, _, flag = text.partition(":")
+        if flag not in ("", "ir"):
+            raise ValueError(f"Invalid SELIC scenario '{text}': expected e.g. 100 or 110:ir")
+        return cls(percentage=float(percentage), ir=flag == "ir")
+
+    @property
+    def label(self) -> str:
+        return f"SELIC {self.percentage:g}%" + (" IR" if self.ir else "")
+
+
+class CompareResponse(BaseModel):
+    """Columnar: values[i][j] is column i on dates[j], every column rebased to 1.0 on dates[0]."""
+    dates: list[date]
+    columns: list[str]
+    values: list[list[float]]
+
+
+class RollingReturns(BaseModel):
+    window_days: int
+    latest: float | None
+    mean: float | None
+    worst: float | None
+    best: float | None
+
+
+class TickerAnalytics(BaseModel):
+    ticker: str
+    points: int
+    total_return: float
+    annualized_return: float
+    volatility: float
+    max_drawdown: float
+    sharpe: float | None
+    rolling: list[RollingReturns]
+
+
+class AnalyticsResponse(BaseModel):
+    """Returns and volatility are annualized fractions (0.12 = 12% a year); risk_free is SELIC over the same range."""
+    risk_free: float
+    tickers: list[TickerAnalytics]
+
+
+class PortfolioEventType(str, Enum):
+    BUY = "buy"
+    SELL = "sell"
+    FIXED_INCOME = "fixed_income"
+
+
+class PortfolioEvent(BaseModel):
+    """
+    Finapp-style asset event. Buys and sells need ticker, quantity and asset_unit_price (fees are in the
+    same currency); fixed-income contributions need fiat_amount (negative for a redemption) and accrue at
+    `percentage` of SELIC. Amounts are in `currency`, defaulting to the ticker's quote currency (BRL for
+    fixed income).
+    """
+    event_type: PortfolioEventType
+    date: date
+    ticker: str | None = None
+    quantity: float | None = None
+    asset_unit_price: float | None = None
+    fees: float = 0.0
+    fiat_amount: float | None = None
+    percentage: float = 100.0
+    currency: str | None = None
+
+
+class PortfolioRequest(BaseModel):
+    events: list[PortfolioEvent]
+    currency: str = "BRL"
+    end: date | None = None
+
+
+class PortfolioResponse(BaseModel):
+    """Columnar daily series; twr is the cumulative time-weighted return (0.05 = +5%)."""
+    currency: str
+    dates: list[date]
+    value: list[float]
+    invested: list[float]
+    twr: list[float]
@@ -0,0 +1,39 @@
+"""
+Daily portfolio valuation from dated events, vectorized over days, assets and events.
+
+Positions and fixed-income units are built with one np.add.at scatter of every event delta into an
+(assets x days) matrix followed by a cumulative sum along days; value is the elementwise product with
+the matching price/curve matrix summed over assets.
+"""
+
+import numpy as np
+
+from .series import DAY, Series
+
+
+def calendar(first_day: int, last_day: int) -> np.ndarray:
+    """Midnight UTC epochs of every day from first_day to last_day (both day epochs, inclusive)."""
+    return np.arange(first_day, last_day + DAY, DAY, dtype=np.int64)
+
+
+def end_of_day(series: Series, days: np.ndarray) -> np.ndarray:
+    """The series' last value on or before each day (NaN before its first point)."""
+    return series.asof(days + DAY - 1)
+
+
+def cumulative(rows: int, days: int, row_index: np.ndarray, day_index: np.ndarray, deltas: np.ndarray) -> np.ndarray:
+    """(rows x days) running totals of `deltas` scattered at (row_index, day_index)."""
+    matrix = np.zeros((rows, days))
+    np.add.at(matrix, (row_index, day_index), deltas)
+    return np.cumsum(matrix, axis=1)
+
+
+def time_weighted_return(values: np.ndarray, flows: np.ndarray) -> np.ndarray:
+    """
+    Cumulative time-weighted return, with each day's external flow counted at the end of that day:
+    r_t = (V_t - F_t) / V_{t-1} - 1. Days starting from zero value contribute no return.
+    """
+    previous = np.concatenate([[0.0], values[:-1]])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        daily = np.where(previous > 0, (values - flows) / previous - 1.0, 0.0)
+    return np.cumprod(1.0 + daily) - 1.0
@@ -0,0 +1,231 @@
+"""
+Per-API-key quotas for the endpoints that spend upstream capacity.
+
+Each key has a sliding-window request limit and a weight. Admitted requests then queue for one of
+MAX_ACTIVE slots in weighted fair order (self-clocked fair queuing): every request gets a virtual finish
+time of max(now, the key's previous finish) + 1 / weight and the smallest finish runs next. A key
+flooding the API only queues behind its own requests, while a key with a few requests is served
+almost immediately. Waiting happens on the event loop, not in the request threadpool.
+"""
+
+import asyncio
+import hashlib
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+
+from .metrics import REGISTRY, Counter, Gauge
+
+# Requests per key per sliding window; 0 means unlimited
+DEFAULT_RATE_LIMIT = 120
+RATE_WINDOW = 60.0
+DEFAULT_WEIGHT = 1.0
+# Expensive requests running at once (below anyio's 40 threads, so cheap endpoints always get one)
+MAX_ACTIVE = 16
+# Requests one key may have waiting for a slot before it is told to back off
+MAX_QUEUED_PER_KEY = 32
+QUEUE_FULL_RETRY_AFTER = 1.0
+
+QUOTA_REJECTIONS = REGISTRY.register(Counter(
+    "quota_rejections_total", "Requests refused with 429 by key and reason.", ("key", "reason"),
+))
+FAIR_QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "fair_queue_depth", "Requests waiting for an expensive-endpoint slot.",
+))
+FAIR_QUEUE_ACTIVE = REGISTRY.register(Gauge(
+    "fair_queue_active", "Expensive-endpoint requests running.",
+))
+
+
+class QuotaExceededError(RuntimeError):
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ApiKey:
+    __slots__ = ("name", "rate_limit", "weight")
+
+    def __init__(self, name: str, rate_limit: int = DEFAULT_RATE_LIMIT, weight: float = DEFAULT_WEIGHT):
+        if rate_limit < 0 or weight <= 0:
+            raise ValueError(f"Invalid quota for API key '{name}': limit must be >= 0 and weight > 0")
+        self.name = name
+        self.rate_limit = rate_limit
+        self.weight = weight
+
+    def __repr__(self) -> str:
+        return f"ApiKey({self.name!r}, rate_limit={self.rate_limit}, weight={self.weight})"
+
+
+def digest(token: str) -> bytes:
+    # Keys are looked up by hash: lookup time does not depend on how much of a guess matches a real key
+    return hashlib.sha256(token.encode()).digest()
+
+
+def parse_keys(api_key: str | None, api_keys: str | None) -> dict[bytes, ApiKey]:
+    """
+    Key table from API_KEY (one unlimited key named "default", as before) and API_KEYS, a comma-separated
+    list of name:key[:requests_per_window[:weight]], e.g. "web:k1:600:4,nightly:k2:60".
+    """
+    table: dict[bytes, ApiKey] = {}
+    if api_key:
+        table[digest(api_key)] = ApiKey("default", rate_limit=0)
+    for entry in (api_keys or "").split(","):
+        if not entry.strip():
+            continue
+        name, key, *quota = entry.strip().split(":")
+        if not name or not key or len(quota) > 2:
+            raise ValueError(f"Invalid API_KEYS entry for '{name}': expected name:key[:limit[:weight]]")
+        limit = int(quota[0]) if quota else DEFAULT_RATE_LIMIT
+        weight = float(quota[1]) if len(quota) > 1 else DEFAULT_WEIGHT
+        table[digest(key)] = ApiKey(name, limit, weight)
+    return table
+
+
+class SlidingWindow:
+    """Exact sliding-window log: at most `limit` requests in any `window` seconds. Not thread-safe."""
+
+    def __init__(self, limit: int, window: float = RATE_WINDOW):
+        self.limit = limit
+        self.window = window
+        self._times: deque[float] = deque()
+
+    def try_acquire(self, now: float | None = None, count: int = 1) -> float:
+        """Records `count` requests and returns 0, or returns the seconds until they would be allowed."""
+        now = time.monotonic() if now is None else now
+        while self._times and self._times[0] <= now - self.window:
+            self._times.popleft()
+        excess = len(self._times) + count - self.limit
+        if excess > 0:
+            if count > self.limit:
+                return self.window
+            # Once the `excess` oldest requests leave the window there is room
+            return self._times[excess - 1] + self.window - now
+        self._times.extend([now] * count)
+        return 0.0
+
+
+class RateLimiter:
+    def __init__(self, window: float = RATE_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._windows: dict[str, SlidingWindow] = {}
+
+    def check(self, key: ApiKey, cost: int = 1) -> None:
+        """Counts `cost` requests against the key's limit; raises QuotaExceededError if it is used up."""
+        if key.rate_limit == 0:
+            return
+        with self._lock:
+            window = self._windows.get(key.name)
+            if window is None or window.limit != key.rate_limit:
+                window = self._windows[key.name] = SlidingWindow(key.rate_limit, self.window)
+            retry_after = window.try_acquire(count=cost)
+        if retry_after:
+            QUOTA_REJECTIONS.inc(key=key.name, reason="rate_limit")
+            raise QuotaExceededError(
+                f"Rate limit of {key.rate_limit} requests per {self.window:.0f}s exceeded", retry_after,
+            )
+
+    def reset(self) -> None:
+        with self._lock:
+            self._windows.clear()
+
+
+class FairQueue:
+    def __init__(self, slots: int = MAX_ACTIVE, max_queued_per_key: int = MAX_QUEUED_PER_KEY):
+        self.slots = slots
+        self.max_queued_per_key = max_queued_per_key
+        self._lock = threading.Lock()
+        self._active = 0
+        # (finish tag, arrival, key name, waiter)
+        self._queue: list[tuple[float, int, str, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._virtual_time = 0.0
+        self._finish: dict[str, float] = {}
+        self._queued: dict[str, int] = {}
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    async def acquire(self, key: ApiKey) -> None:
+        """Waits for a slot in weighted fair order; raises QuotaExceededError if the key has too many waiting."""
+        with self._lock:
+            if self._active < self.slots and not self._queue:
+                self._virtual_time = self._tag(key)
+                self._set_active(self._active + 1)
+                return
+            if self._queued.get(key.name, 0) >= self.max_queued_per_key:
+                QUOTA_REJECTIONS.inc(key=key.name, reason="queue_full")
+                raise QuotaExceededError(
+                    f"{self.max_queued_per_key} requests already waiting for this key", QUEUE_FULL_RETRY_AFTER,
+                )
+            waiter = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._queue, (self._tag(key), next(self._seq), key.name, waiter))
+            self._queued[key.name] = self._queued.get(key.name, 0) + 1
+            FAIR_QUEUE_DEPTH.set(len(self._queue))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            with self._lock:
+                entry = next((e for e in self._queue if e[3] is waiter), None)
+                if entry is not None:
+                    self._queue.remove(entry)
+                    heapq.heapify(self._queue)
+                    self._queued[key.name] -= 1
+                    FAIR_QUEUE_DEPTH.set(len(self._queue))
+                    raise
+            # Already dispatched: give the slot back (a grant still in flight does it when it sees the cancel)
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+
+    def _tag(self, key: ApiKey) -> float:
+        finish = max(self._virtual_time, self._finish.get(key.name, 0.0)) + 1.0 / key.weight
+        self._finish[key.name] = finish
+        return finish
+
+    def release(self) -> None:
+        with self._lock:
+            self._set_active(self._active - 1)
+            while self._queue and self._active < self.slots:
+                finish, _, name, waiter = heapq.heappop(self._queue)
+                self._queued[name] -= 1
+                self._virtual_time = finish
+                self._set_active(self._active + 1)
+                try:
+                    waiter.get_loop().call_soon_threadsafe(self._grant, waiter)
+                except RuntimeError:
+                    # The waiter's event loop has closed; nobody will use the slot
+                    self._set_active(self._active - 1)
+            FAIR_QUEUE_DEPTH.set(len(self._queue))
+
+    def _grant(self, waiter: asyncio.Future) -> None:
+        if waiter.cancelled():
+            self.release()
+        else:
+            waiter.set_result(None)
+
+    def _set_active(self, active: int) -> None:
+        self._active = active
+        FAIR_QUEUE_ACTIVE.set(active)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._active = 0
+            self._queue.clear()
+            self._virtual_time = 0.0
+            self._finish.clear()
+            self._queued.clear()
+            FAIR_QUEUE_DEPTH.set(0)
+            FAIR_QUEUE_ACTIVE.set(0)
+
+
+limiter = RateLimiter()
+fair_queue = FairQueue()
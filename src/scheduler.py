@@ -0,0 +1,323 @@
+"""
+Central scheduler for calls to rate-limited upstreams (Yahoo, BCB).
+
+Each upstream gets a token bucket (sustained rate + burst), a cap on concurrent calls and a
+priority queue, so interactive requests are admitted ahead of background refreshes. A throttling
+response pauses the whole upstream for a jittered, exponentially growing delay before retrying,
+and a circuit breaker makes calls fail fast once the upstream keeps failing.
+
+Budgets are per process: every uvicorn worker and every job worker (see src/jobs.py, which scales
+its copy down with UpstreamScheduler.scale) enforces its own, so the load an upstream sees is the sum.
+"""
+
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, TypeVar
+
+import requests
+from yfinance.exceptions import YFRateLimitError
+
+from .metrics import REGISTRY, Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+INTERACTIVE = 0
+BACKGROUND = 10
+
+_priority: ContextVar[int] = ContextVar("upstream_priority", default=INTERACTIVE)
+
+QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "upstream_queue_depth", "Calls waiting for an upstream slot.", ("upstream",),
+))
+IN_FLIGHT = REGISTRY.register(Gauge(
+    "upstream_in_flight", "Upstream calls currently running.", ("upstream",),
+))
+QUEUE_WAIT = REGISTRY.register(Histogram(
+    "upstream_queue_wait_seconds", "Time spent waiting for an upstream slot.", ("upstream", "priority"),
+))
+THROTTLED = REGISTRY.register(Counter(
+    "upstream_throttled_total", "Throttling responses that triggered a backoff.", ("upstream",),
+))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+BREAKER_STATE = REGISTRY.register(Gauge(
+    "circuit_breaker_state", "Circuit breaker state per upstream (0 closed, 1 half-open, 2 open).", ("upstream",),
+))
+
+
+class CircuitOpenError(RuntimeError):
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Upstream '{name}' is unavailable; retry in {retry_after:.0f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trial_running = False
+        BREAKER_STATE.set(0, upstream=name)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def _set_state(self, state: str) -> None:
+        self._state = state
+        BREAKER_STATE.set(_STATE_VALUES[state], upstream=self.name)
+
+    def before_call(self) -> None:
+        """Raises CircuitOpenError unless the call may go through (closed, or the single half-open trial)."""
+        with self._lock:
+            if self._state == CLOSED:
+                return
+            elapsed = time.monotonic() - self._opened_at
+            if elapsed < self.reset_timeout:
+                raise CircuitOpenError(self.name, self.reset_timeout - elapsed)
+            if self._trial_running:
+                raise CircuitOpenError(self.name, 1.0)
+            self._trial_running = True
+            self._set_state(HALF_OPEN)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._trial_running = False
+            self._set_state(CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    logger.warning("Circuit for %s opened after %s failures", self.name, self._failures)
+                self._opened_at = time.monotonic()
+                self._set_state(OPEN)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._trial_running = False
+            self._set_state(CLOSED)
+
+    def call(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        self.before_call()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+
+@contextmanager
+def priority(level: int) -> Iterator[None]:
+    """Runs upstream calls made inside the block with the given priority (lower runs first)."""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+def is_throttled(exc: Exception) -> bool:
+    if isinstance(exc, YFRateLimitError):
+        return True
+    response = getattr(exc, "response", None)
+    return isinstance(exc, requests.HTTPError) and response is not None and response.status_code == 429
+
+
+def _retry_after(exc: Exception) -> float:
+    response = getattr(exc, "response", None)
+    try:
+        return float(response.headers.get("Retry-After", 0)) if response is not None else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class TokenBucket:
+    """Not thread-safe on its own; Upstream only touches it under its condition lock."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def try_acquire(self, now: float | None = None) -> float:
+        """Takes a token and returns 0, or returns the seconds until one is available."""
+        now = time.monotonic() if now is None else now
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return 0.0
+        return (1.0 - self._tokens) / self.rate
+
+
+class Upstream:
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        burst: int,
+        max_concurrent: int,
+        max_retries: int = 3,
+        backoff_base: float = 1.0,
+        backoff_cap: float = 30.0,
+        breaker: CircuitBreaker | None = None,
+    ):
+        self.name = name
+        self.breaker = breaker or CircuitBreaker(name)
+        self.max_concurrent = max_concurrent
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self._bucket = TokenBucket(rate, burst)
+        self._cond = threading.Condition()
+        self._queue: list[tuple[int, int]] = []
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._paused_until = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def scale(self, factor: float) -> None:
+        """Multiplies the rate, burst and concurrency budget by `factor` (keeping at least one call)."""
+        with self._cond:
+            bucket = self._bucket
+            self._bucket = TokenBucket(bucket.rate * factor, max(bucket.capacity * factor, 1.0))
+            self.max_concurrent = max(int(self.max_concurrent * factor), 1)
+            self._cond.notify_all()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _acquire(self, level: int) -> None:
+        ticket = (level, next(self._seq))
+        enqueued = time.monotonic()
+        with self._cond:
+            heapq.heappush(self._queue, ticket)
+            QUEUE_DEPTH.set(len(self._queue), upstream=self.name)
+            try:
+                while True:
+                    if self._queue[0] != ticket or self._in_flight >= self.max_concurrent:
+                        self._cond.wait()
+                        continue
+                    now = time.monotonic()
+                    wait = max(self._paused_until - now, 0.0) or self._bucket.try_acquire(now)
+                    if wait == 0.0:
+                        break
+                    self._cond.wait(wait)
+            except BaseException:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+                QUEUE_DEPTH.set(len(self._queue), upstream=self.name)
+                self._cond.notify_all()
+                raise
+            heapq.heappop(self._queue)
+            self._in_flight += 1
+            QUEUE_DEPTH.set(len(self._queue), upstream=self.name)
+            IN_FLIGHT.set(self._in_flight, upstream=self.name)
+            # The next ticket in line may be admissible now
+            self._cond.notify_all()
+        QUEUE_WAIT.observe(time.monotonic() - enqueued, upstream=self.name, priority=str(level))
+
+    def _release(self) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            IN_FLIGHT.set(self._in_flight, upstream=self.name)
+            self._cond.notify_all()
+
+    def _backoff(self, attempt: int, exc: Exception) -> None:
+        # Full jitter, but never shorter than what the upstream asked for
+        delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+        delay = max(delay, _retry_after(exc))
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            self._cond.notify_all()
+        THROTTLED.inc(upstream=self.name)
+
+    def run(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        # Fail fast before queueing when the upstream is known to be down
+        self.breaker.before_call()
+        attempt = 0
+        while True:
+            self._acquire(current_priority())
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as exc:
+                if not is_throttled(exc) or attempt >= self.max_retries:
+                    self.breaker.record_failure()
+                    raise
+                attempt += 1
+                self._backoff(attempt, exc)
+            else:
+                self.breaker.record_success()
+                return result
+            finally:
+                self._release()
+
+
+class UpstreamScheduler:
+    def __init__(self):
+        self._upstreams: dict[str, Upstream] = {}
+
+    def register(self, upstream: Upstream) -> Upstream:
+        self._upstreams[upstream.name] = upstream
+        return upstream
+
+    def __getitem__(self, name: str) -> Upstream:
+        return self._upstreams[name]
+
+    def run(self, name: str, fn: Callable[..., T], *args, **kwargs) -> T:
+        return self._upstreams[name].run(fn, *args, **kwargs)
+
+    def reset(self) -> None:
+        for upstream in self._upstreams.values():
+            upstream.breaker.reset()
+
+    def scale(self, factor: float) -> None:
+        """Shrinks every upstream's budget, for a process that shares it with others."""
+        for upstream in self._upstreams.values():
+            upstream.scale(factor)
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {
+            name: {"queue_depth": u.queue_depth, "in_flight": u.in_flight, "max_concurrent": u.max_concurrent}
+            for name, u in self._upstreams.items()
+        }
+
+
+scheduler = UpstreamScheduler()
+# yfinance history and search share Yahoo's per-IP budget
+scheduler.register(Upstream("yahoo", rate=10.0, burst=20, max_concurrent=8))
+scheduler.register(Upstream("bcb", rate=2.0, burst=4, max_concurrent=2))
@@ -0,0 +1,101 @@
+"""
+Local prefix index over every symbol and name the service has seen.
+
+Keys (lower-cased symbol, full name and each name word) live in one sorted list, so a prefix
+lookup is a bisect plus a short scan. The index is seeded from a bundled listing file and grows
+with every Yahoo search result.
+"""
+
+import csv
+import threading
+from bisect import bisect_left, insort
+from pathlib import Path
+
+from .models import TickerSearchResult
+
+DEFAULT_LISTING = Path(__file__).parent / "data" / "listings.csv"
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def _keys(result: TickerSearchResult) -> set[str]:
+    name = normalize_query(result.name)
+    keys = {result.symbol.lower(), name}
+    keys.update(word for word in name.replace(",", " ").split() if len(word) > 1)
+    return keys
+
+
+class PrefixIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: dict[str, TickerSearchResult] = {}
+        # Sorted (key, symbol) pairs
+        self._keys: list[tuple[str, str]] = []
+        # Sorted lower-cased symbols
+        self._symbols: list[str] = []
+        # Queries whose Yahoo results were merged
+        self._searched: set[str] = set()
+
+    @classmethod
+    def from_listing(cls, path: Path | str | None = DEFAULT_LISTING) -> "PrefixIndex":
+        index = cls()
+        if path is not None and Path(path).exists():
+            index.load_listing(path)
+        return index
+
+    def load_listing(self, path: Path | str) -> None:
+        with open(path, newline="", encoding="utf-8") as f:
+            self.add(
+                TickerSearchResult(symbol=row["symbol"], name=row["name"], type=row["type"], exchange=row["exchange"])
+                for row in csv.DictReader(f)
+            )
+
+    def add(self, results) -> None:
+        with self._lock:
+            for result in results:
+                if result.symbol in self._entries:
+                    continue
+                self._entries[result.symbol] = result
+                insort(self._symbols, result.symbol.lower())
+                for key in _keys(result):
+                    insort(self._keys, (key, result.symbol))
+
+    def mark_searched(self, query: str) -> None:
+        with self._lock:
+            self._searched.add(normalize_query(query))
+
+    def knows(self, prefix: str) -> bool:
+        """True if Yahoo's results for `prefix` were merged, or some indexed symbol starts with it."""
+        with self._lock:
+            if prefix in self._searched:
+                return True
+            i = bisect_left(self._symbols, prefix)
+            return i < len(self._symbols) and self._symbols[i].startswith(prefix)
+
+    def search(self, prefix: str, limit: int) -> list[TickerSearchResult]:
+        prefix = normalize_query(prefix)
+        with self._lock:
+            i = bisect_left(self._keys, (prefix, ""))
+            matches: dict[str, int] = {}
+            while i < len(self._keys):
+                key, symbol = self._keys[i]
+                if not key.startswith(prefix):
+                    break
+                i += 1
+                lower = symbol.lower()
+                rank = 0 if lower == prefix else 1 if lower.startswith(prefix) else 2
+                matches[symbol] = min(rank, matches.get(symbol, rank))
+            ranked = sorted(matches, key=lambda s: (matches[s], len(s), s))
+            return [self._entries[s] for s in ranked[:limit]]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keys.clear()
+            self._symbols.clear()
+            self._searched.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,82 @@
+"""
+Compact in-memory form of a price or rate series.
+
+Two parallel arrays (int64 epoch seconds, float64 values) instead of a list of Pydantic points: 16 bytes
+per point. Slicing by time range returns views, so one cached series serves every sub-range request.
+"""
+
+from datetime import datetime
+
+import numpy as np
+
+DAY = 86_400
+# Object + two ndarray headers, counted on top of the array data when sizing cache entries
+OVERHEAD_BYTES = 256
+
+
+class Series:
+    __slots__ = ("epochs", "values")
+
+    def __init__(self, epochs: np.ndarray, values: np.ndarray):
+        self.epochs = epochs
+        self.values = values
+
+    @classmethod
+    def empty(cls) -> "Series":
+        return cls(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64))
+
+    def __len__(self) -> int:
+        return len(self.epochs)
+
+    @property
+    def nbytes(self) -> int:
+        return self.epochs.nbytes + self.values.nbytes + OVERHEAD_BYTES
+
+    def between(self, start: int, end: int) -> "Series":
+        """Points with start <= epoch < end, as views (no copy)."""
+        lo = int(np.searchsorted(self.epochs, start, side="left"))
+        hi = int(np.searchsorted(self.epochs, end, side="left"))
+        return Series(self.epochs[lo:hi], self.values[lo:hi])
+
+    def asof(self, epochs: np.ndarray) -> np.ndarray:
+        """Value of the last point at or before each epoch; NaN before the first point."""
+        index = np.searchsorted(self.epochs, epochs, side="right") - 1
+        out = np.full(len(epochs), np.nan)
+        known = index >= 0
+        out[known] = self.values[index[known]]
+        return out
+
+    def datetimes(self) -> list[datetime]:
+        """Timezone-naive UTC datetimes, as the API models expect."""
+        return self.epochs.astype("datetime64[s]").tolist()
+
+
+def align_daily(series: list["Series"]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Puts several series on one daily calendar: the union of the UTC days any of them has a point on.
+    Returns (day epochs, matrix) with one row per series, each forward-filled from its last point on or
+    before the day (the last point of a day wins); NaN before a series' first point.
+    """
+    days = np.unique(np.concatenate([s.epochs // DAY for s in series])) if series else np.empty(0, np.int64)
+    matrix = np.full((len(series), len(days)), np.nan)
+    for row, s in zip(matrix, series):
+        if len(s) == 0:
+            continue
+        # Index of the last point whose day is <= each calendar day
+        index = np.searchsorted(s.epochs // DAY, days, side="right") - 1
+        known = index >= 0
+        row[known] = s.values[index[known]]
+    return days * DAY, matrix
+
+
+def rebase(matrix: np.ndarray) -> tuple[int, np.ndarray]:
+    """
+    Divides every row by its value on the first column where all rows are defined. Returns that column
+    and the rebased matrix from it onwards (-1 and an empty matrix if the rows never overlap).
+    """
+    complete = np.flatnonzero(~np.isnan(matrix).any(axis=0))
+    if len(complete) == 0:
+        return -1, matrix[:, :0]
+    first = int(complete[0])
+    tail = matrix[:, first:]
+    return first, tail / tail[:, :1]
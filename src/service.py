@@ -1,44 +1,348 @@
-from datetime import datetime, timedelta, timezone
+import contextvars
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from os import getenv
+from typing import Callable, TypeVar
+import numpy as np
+import pandas as pd
 import requests
 import yfinance as yf
+from yfinance.exceptions import YFTickerMissingError
+from . import analytics, calendars, portfolio
+from .caching import HitRateCache, StaleWhileRevalidate, mark_stale
+from .metrics import record_cache, track_upstream
 from .models import (
     PricePoint, MultiplierPoint, TickerResponse, TickerSearchResult, TickerSearchResponse, SelicResponse,
-    TickerPriceResponse,
+    TickerPriceResponse, SelicScenario, CompareResponse, RollingReturns, TickerAnalytics, AnalyticsResponse,
+    PortfolioEvent, PortfolioEventType, PortfolioResponse,
 )
+from .scheduler import scheduler
+from .search_index import DEFAULT_LISTING, PrefixIndex, normalize_query
+from .series import DAY, OVERHEAD_BYTES, Series, align_daily, rebase
+from .storage import SeriesStore, StoredSeries
+from .timing import stage
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+# By default yfinance logs failed requests and returns an empty frame; raise them instead, so outages
+# reach the scheduler's circuit breaker and the stale fallbacks rather than reading as "no data"
+yf.config.debug.hide_exceptions = False
 
 BCB_SELIC_URL = "https://api.bcb.gov.br/dados/serie/bcdata.sgs.11/dados"
+SELIC_SERIES = "sgs11"
 INTERVAL = "1d"
+# For series without a known calendar, partial fills re-fetch this much before the stored coverage ends,
+# so the windows overlap (and the last, possibly intraday, bar is refreshed) even across weekends and holidays
+FILL_OVERLAP = 7 * DAY
+# Yahoo's adjusted closes are rewritten backwards after splits and dividends, so stored bars older than
+# this are refetched with the rest of the range instead of being merged with newly adjusted ones
+STORE_MAX_AGE = 86_400.0
+
+# Open-ended ranges (end defaults to now) go stale quickly; ranges that ended in the past barely change.
+# Past the TTL an entry is still served, flagged stale, for up to MAX_STALE while it is refreshed.
+LIVE_TTL = 300.0
+CLOSED_TTL = 86_400.0
+SELIC_LIVE_TTL = 3_600.0
+MAX_STALE = 7 * 86_400.0
+
+# Queries up to this length are answered from the local index once it knows them (a symbol starts
+# with the prefix, or Yahoo's answer for it was merged); new ones go to Yahoo first
+LOCAL_PREFIX_LEN = 2
+SEARCH_TTL = 86_400.0
+LISTING_PATH = getenv("TICKER_LISTING_PATH") or DEFAULT_LISTING
+
+# Quote currency by Yahoo symbol suffix; anything else (US listings, indices) is priced in USD
+SUFFIX_CURRENCIES = {
+    ".SA": "BRL", ".L": "GBP", ".TO": "CAD", ".V": "CAD", ".DE": "EUR", ".PA": "EUR", ".AS": "EUR", ".MC": "EUR",
+    ".MI": "EUR", ".SW": "CHF", ".T": "JPY", ".HK": "HKD", ".AX": "AUD", ".MX": "MXN",
+}
+INDEX_CURRENCIES = {"^BVSP": "BRL", "^IBX50": "BRL"}
+# Dollar stablecoins quote crypto pairs (BTC-USDT) but have no Yahoo FX pair (USDTBRL=X); they convert as USD
+USD_STABLECOINS = {"USDT", "USDC", "BUSD", "TUSD", "USDP", "FDUSD", "DAI"}
+# FX bars before the first asset bar, so the first asset point has a rate to join against
+FX_LOOKBACK = timedelta(days=7)
+
+# For tickers without a known calendar, the latest session within this window is the "current" price
+LATEST_LOOKBACK = timedelta(days=7)
+
+# Upstream fetches run concurrently for multi-series requests (bounded again per upstream by the scheduler)
+MAX_FANOUT = 8
+MAX_COMPARE_COLUMNS = 20
+MAX_ANALYTICS_TICKERS = 50
+MAX_ANALYTICS_WINDOWS = 10
+MAX_PORTFOLIO_EVENTS = 20_000
+MAX_PORTFOLIO_TICKERS = 100
+
+# Cached series are mostly views into the store's mappings; the budget bounds the worst case (fresh upstream arrays)
+HISTORY_CACHE_BYTES = 64 * 2**20
+SELIC_CACHE_BYTES = 8 * 2**20
+# Tabela regressiva de IR para renda fixa: (prazo máximo em dias desde o aporte, alíquota); 15% depois
+IR_BRACKETS = ((180, 0.225), (360, 0.20), (720, 0.175))
+IR_FINAL_RATE = 0.15
+# Materialized SELIC multiplier curves; ~16 bytes per BCB day each (~100 KB for 25 years)
+SELIC_CURVE_CACHE_BYTES = 32 * 2**20
 
-def fetch_ticker(ticker: str, start: datetime, end: datetime | None) -> TickerResponse:
+_history_cache = StaleWhileRevalidate(
+    "ticker_history", ttl=LIVE_TTL, max_stale=MAX_STALE, max_entries=4096,
+    max_bytes=HISTORY_CACHE_BYTES, sizeof=lambda series: series.nbytes,
+)
+_selic_cache = StaleWhileRevalidate(
+    "selic_rates", ttl=SELIC_LIVE_TTL, max_stale=MAX_STALE, max_entries=4096,
+    max_bytes=SELIC_CACHE_BYTES, sizeof=lambda series: series.nbytes,
+)
+_curve_cache = HitRateCache(
+    max_bytes=SELIC_CURVE_CACHE_BYTES, sizeof=lambda curve: curve.nbytes, name="selic_curves",
+)
+_search_cache = StaleWhileRevalidate("ticker_search", ttl=SEARCH_TTL, max_stale=MAX_STALE, max_entries=4096)
+_search_index = PrefixIndex.from_listing(LISTING_PATH)
+_store = SeriesStore()
+
+
+def _range_ttl(end: datetime | None, live_ttl: float) -> float:
     if end is None:
-        end = datetime.now(tz=timezone.utc)
+        return live_ttl
+    now = datetime.now(tz=end.tzinfo)
+    return CLOSED_TTL if end < now - timedelta(days=1) else live_ttl
+
+
+def _epoch(dt: datetime) -> int:
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+def _utc(epoch: int) -> datetime:
+    return datetime.fromtimestamp(epoch, tz=timezone.utc)
+
+
+def _missing_window(
+    stored: StoredSeries | None, start: int, end: int, calendar: calendars.Calendar | None = None
+) -> tuple[int, int]:
+    """
+    The part of [start, end) the store lacks, overlapping the stored coverage so the two merge. With a
+    calendar the tail fill starts exactly at the last stored session (its bar may be intraday).
+    """
+    if stored is None:
+        return start, end
+    if stored.covered_from <= start <= stored.covered_to:
+        if calendar is None:
+            return max(start, stored.covered_to - FILL_OVERLAP), end
+        return max(start, calendar.session_start(stored.covered_to - 1)), end
+    if start <= stored.covered_from <= end <= stored.covered_to:
+        return start, min(end, stored.covered_from + (0 if calendar else FILL_OVERLAP))
+    return start, end
+
+
+def _closed_gap(stored: StoredSeries | None, start: int, end: int, calendar: calendars.Calendar | None) -> bool:
+    """Whether every day of [start, end) the store does not cover is a closed day on `calendar`."""
+    if calendar is None:
+        return False
+    if stored is None or not (stored.covered_from <= end and start <= stored.covered_to):
+        return not calendar.has_session(start, end)
+    return not (
+        calendar.has_session(start, min(end, stored.covered_from))
+        or calendar.has_session(max(start, stored.covered_to), end)
+    )
+
+
+def _expired(stored: StoredSeries | None, max_age: float | None, now: float) -> bool:
+    """Whether the stored series' oldest points were fetched more than `max_age` seconds ago."""
+    return stored is not None and max_age is not None and now - stored.first_fetched_at >= max_age
+
+
+def _covers(stored: StoredSeries, start: int, end: int, now: float, live_ttl: float) -> bool:
+    """Whether `stored` has all of [start, end), or all of it up to a live edge less than `live_ttl` old."""
+    return stored.covered_from <= start and (end <= stored.covered_to or stored.covered_to > now - live_ttl)
+
+
+def _load_series(
+    kind: str, key: str, start: int, end: int, live: bool, live_ttl: float, fetch: Callable[[int, int], Series],
+    calendar: calendars.Calendar | None = None, max_age: float | None = None,
+) -> Series:
+    """
+    Returns the points in [start, end) from the shared store, fetching from the upstream only the
+    window the store lacks (or whose live edge is older than `live_ttl`). If the upstream fails, whatever
+    the store has is served and flagged stale. With a calendar, a missing part made only of closed days
+    does not call the upstream at all. With `max_age`, an older stored series is fetched again for the
+    requested range and replaced by it.
+    """
+    now = time.time()
+    stored = _store.read(kind, key)
+    # An expired series is only the fallback when the upstream fails
+    current = None if _expired(stored, max_age, now) else stored
+    if current is not None and _covers(current, start, end, now, live_ttl if live else 0.0):
+        record_cache(f"{kind}_store", "hit")
+        return current.between(start, end)
+
+    if _closed_gap(current, start, end, calendar):
+        # Nothing traded in what the store lacks, so it already holds every point there is
+        record_cache(f"{kind}_store", "hit")
+        return current.between(start, end) if current is not None else Series.empty()
+
+    record_cache(f"{kind}_store", "miss")
+    fetch_from, fetch_to = _missing_window(current, start, end, calendar)
+    try:
+        fetched = fetch(fetch_from, fetch_to)
+    except Exception:
+        if stored is not None and stored.covered_from <= start < stored.covered_to:
+            mark_stale(now - stored.fetched_at)
+            return stored.between(start, end)
+        raise
+
+    inside = fetched.between(fetch_from, fetch_to)
+    if len(inside) == 0:
+        # An empty answer may be an upstream hiccup: keep it out of the store so the range is asked again
+        if current is None and stored is not None and stored.covered_from <= start < stored.covered_to:
+            mark_stale(now - stored.fetched_at)
+            return stored.between(start, end)
+        return current.between(start, end) if current is not None else fetched
+    merged = _store.write(
+        kind, key, StoredSeries(inside.epochs, inside.values, fetch_from, fetch_to, now),
+        replace=current is not stored,
+    )
+    if (fetch_from, fetch_to) == (start, end):
+        # Return exactly what the upstream answered for the requested window
+        return fetched
+    return merged.between(start, end)
+
 
-    t = yf.Ticker(ticker)
-    df = t.history(start=start, end=end, interval=INTERVAL)
+def _history(ticker: str, start: datetime, end: datetime):
+    return scheduler.run("yahoo", _yahoo_history, ticker, start, end)
 
+
+def _yahoo_history(ticker: str, start: datetime, end: datetime):
+    with track_upstream("yfinance_history") as call:
+        try:
+            df = yf.Ticker(ticker).history(start=start, end=end, interval=INTERVAL)
+        except YFTickerMissingError as exc:
+            if "status_code" in getattr(exc, "debug_info", ""):
+                raise
+            # Yahoo answered: the symbol is unknown or has no bars in the range
+            df = pd.DataFrame()
+        call.response_rows(len(df))
+    return df
+
+
+def _fetch_closes(ticker: str, start: int, end: int) -> Series:
+    df = _history(ticker, _utc(start), _utc(end))
     if df.empty:
+        return Series.empty()
+    # asi8 is nanoseconds since the epoch whatever the index timezone
+    epochs = df.index.asi8 // 1_000_000_000
+    return Series(epochs.astype(np.int64), df["Close"].to_numpy(dtype=np.float64))
+
+
+def _price_series(ticker: str, start: datetime, end: datetime | None) -> Series:
+    now = time.time()
+    start_s = _epoch(start)
+    end_s = _epoch(end) if end is not None else int(now)
+    live = end_s > now - DAY
+    return _load_series(
+        "prices", f"{ticker}@{INTERVAL}", start_s, end_s, live, LIVE_TTL,
+        lambda a, b: _fetch_closes(ticker, a, b), calendars.for_symbol(ticker), STORE_MAX_AGE,
+    )
+
+
+def _ticker_series(ticker: str, start: datetime, end: datetime | None) -> Series:
+    return _history_cache.get(
+        (ticker, INTERVAL, start, end), lambda: _price_series(ticker, start, end), ttl=_range_ttl(end, LIVE_TTL)
+    )
+
+
+def fx_currency(code: str) -> str:
+    """The currency `code` converts as: itself, or USD for a dollar stablecoin."""
+    code = code.upper()
+    return "USD" if code in USD_STABLECOINS else code
+
+
+def asset_currency(ticker: str) -> str:
+    """
+    Quote currency of a Yahoo symbol, inferred offline from its form (PETR4.SA, BTC-USD, USDBRL=X);
+    dollar stablecoins (BTC-USDT) count as USD.
+    """
+    symbol = ticker.upper()
+    if symbol in INDEX_CURRENCIES:
+        return INDEX_CURRENCIES[symbol]
+    if symbol.endswith("=X"):
+        pair = symbol[:-2]
+        return pair[3:] if len(pair) == 6 else pair
+    base, dash, quote = symbol.rpartition("-")
+    if dash and base and quote.isalpha() and (len(quote) in (3, 4) or quote in USD_STABLECOINS):
+        return fx_currency(quote)
+    for suffix, currency in SUFFIX_CURRENCIES.items():
+        if symbol.endswith(suffix):
+            return currency
+    return "USD"
+
+
+def _fx_series(source: str, target: str, start: datetime, end: datetime | None) -> Series:
+    return _ticker_series(f"{source}{target}=X", start - FX_LOOKBACK, end)
+
+
+def _convert(series: Series, fx: Series) -> Series:
+    """As-of join: each point is multiplied by the last FX close at or before it; points with no rate yet are dropped."""
+    rates = fx.asof(series.epochs)
+    known = ~np.isnan(rates)
+    return Series(series.epochs[known], series.values[known] * rates[known])
+
+
+def _priced_series(ticker: str, start: datetime, end: datetime | None, currency: str | None = None) -> Series:
+    """The ticker's closes, converted to `currency` when it differs from the ticker's quote currency."""
+    source = asset_currency(ticker)
+    target = fx_currency(currency) if currency else source
+    if target == source:
+        return _ticker_series(ticker, start, end)
+    series, fx = _gather([lambda: _ticker_series(ticker, start, end), lambda: _fx_series(source, target, start, end)])
+    return _convert(series, fx)
+
+
+def fetch_ticker(ticker: str, start: datetime, end: datetime | None, currency: str | None = None) -> TickerResponse:
+    with stage("fetch"):
+        series = _priced_series(ticker, start, end, currency)
+
+    if len(series) == 0:
         return TickerResponse(prices=[], multipliers=[])
 
-    closes = df["Close"]
-    # Normalize index to timezone-naive UTC datetimes
-    datetimes = closes.index.tz_convert("UTC").tz_localize(None).to_pydatetime()
-    base = closes.iloc[0]
+    with stage("convert"):
+        closes = series.values
+        datetimes = series.datetimes()
+        prices = [PricePoint(datetime=dt, price=p) for dt, p in zip(datetimes, closes.tolist())]
 
-    prices = [PricePoint(datetime=dt, price=float(p)) for dt, p in zip(datetimes, closes)]
-    multipliers = [MultiplierPoint(datetime=dt, value=float(p / base)) for dt, p in zip(datetimes, closes)]
+    with stage("multipliers"):
+        ratios = (closes / closes[0]).tolist()
+        multipliers = [MultiplierPoint(datetime=dt, value=v) for dt, v in zip(datetimes, ratios)]
 
     return TickerResponse(prices=prices, multipliers=multipliers)
 
 
 # Fetches the closing price for a given date using a 1-day window from Yahoo Finance.
 # Past dates return the actual final closing price; today returns the last traded price at request time.
-# No averaging is done — Yahoo returns raw price points. Raises ValueError if the market was closed.
+# No averaging is done — Yahoo returns raw price points. Days the ticker's exchange calendar marks as
+# closed resolve to the previous session; raises ValueError if Yahoo has no price for the day.
 def fetch_last_price(ticker: str, date: datetime) -> TickerPriceResponse:
     start = date.replace(hour=0, minute=0, second=0, microsecond=0)
+    calendar = calendars.for_symbol(ticker)
+    if calendar is not None:
+        session = calendar.previous_session(start.date())
+        start = start.replace(year=session.year, month=session.month, day=session.day)
     end = start + timedelta(days=1)
 
-    t = yf.Ticker(ticker)
-    df = t.history(start=start, end=end, interval=INTERVAL)
+    # A day inside the stored coverage (today's up to a recent live edge) is answered without calling Yahoo
+    now = time.time()
+    stored = _store.read("prices", f"{ticker}@{INTERVAL}")
+    if stored is not None and not _expired(stored, STORE_MAX_AGE, now) and _covers(
+        stored, _epoch(start), _epoch(end), now, LIVE_TTL
+    ):
+        day = stored.between(_epoch(start), _epoch(end))
+        if len(day) == 0:
+            raise ValueError(f"No price data found for ticker '{ticker}' on {start.date()}")
+        return TickerPriceResponse(ticker=ticker, datetime=day.datetimes()[-1], price=float(day.values[-1]))
+
+    df = _history(ticker, start, end)
 
     if df.empty:
         raise ValueError(f"No price data found for ticker '{ticker}' on {start.date()}")
@@ -48,15 +352,33 @@ def fetch_last_price(ticker: str, date: datetime) -> TickerPriceResponse:
 
     return TickerPriceResponse(ticker=ticker, datetime=last_dt, price=float(last_row))
 
-def _ir_rate(days: int) -> float:
-    """Tabela regressiva de IR para renda fixa (prazo desde o aporte)."""
-    if days <= 180:
-        return 0.225
-    elif days <= 360:
-        return 0.20
-    elif days <= 720:
-        return 0.175
-    return 0.15
+def fetch_latest_prices(tickers: list[str]) -> dict[str, TickerPriceResponse]:
+    """
+    Last traded price per ticker: one Yahoo call per distinct ticker, run concurrently through the
+    scheduler. Tickers that fail or have no recent session are left out.
+    """
+    now = datetime.now(tz=timezone.utc)
+
+    def window_start(ticker: str) -> datetime:
+        # From the session before today's: today's may not have opened yet
+        calendar = calendars.for_symbol(ticker)
+        if calendar is None:
+            return now - LATEST_LOOKBACK
+        return _utc(calendar.session_start(_epoch(now) - DAY))
+
+    def latest(ticker: str) -> TickerPriceResponse | None:
+        try:
+            df = _history(ticker, window_start(ticker), now + timedelta(days=1))
+        except Exception as exc:
+            logger.warning("Latest price of %s failed: %s", ticker, exc)
+            return None
+        if df.empty:
+            return None
+        last_dt = df.index[-1].tz_convert("UTC").tz_localize(None).to_pydatetime()
+        return TickerPriceResponse(ticker=ticker, datetime=last_dt, price=float(df["Close"].iloc[-1]))
+
+    results = _gather([lambda t=ticker: latest(t) for ticker in dict.fromkeys(tickers)])
+    return {price.ticker: price for price in results if price is not None}
 
 
 def fetch_selic(
@@ -74,50 +396,399 @@ def fetch_selic(
         ir: If True, applies Imposto de Renda on the gain at each point (simulating redemption).
         percentage: CDB percentage of SELIC (e.g. 103.0 for a CDB that pays 103% of SELIC).
     """
+    with stage("fetch"):
+        rates = _selic_series(start, end)
+
     if end is None:
         end = datetime.now()
 
+    with stage("multipliers"):
+        curve = _selic_curve(rates, start, percentage, ir)
+
+    with stage("convert"):
+        return SelicResponse(multipliers=_multiplier_points(curve, end))
+
+
+def _selic_series(start: datetime, end: datetime | None) -> Series:
+    key = (start.date(), end.date() if end else None)
+    return _selic_cache.get(key, lambda: _selic_rates(start, end), ttl=_range_ttl(end, SELIC_LIVE_TTL))
+
+
+def _selic_rates(start: datetime, end: datetime | None) -> Series:
+    """Daily SELIC rates (in % per day) keyed by the UTC-midnight epoch of each BCB business day."""
+    start_s = _epoch(start.replace(hour=0, minute=0, second=0, microsecond=0))
+    if end is None:
+        end_s, live = int(time.time()), True
+    else:
+        # BCB's dataFinal is inclusive
+        end_s, live = _epoch(end.replace(hour=0, minute=0, second=0, microsecond=0)) + DAY, False
+    return _load_series(
+        "selic", SELIC_SERIES, start_s, end_s, live, SELIC_LIVE_TTL, _fetch_selic_rates, calendars.BCB,
+    )
+
+
+def _fetch_selic_rates(start: int, end: int) -> Series:
     params = {
         "formato": "json",
-        "dataInicial": start.strftime("%d/%m/%Y"),
-        "dataFinal": end.strftime("%d/%m/%Y"),
+        "dataInicial": _utc(start).strftime("%d/%m/%Y"),
+        "dataFinal": _utc(end - 1).strftime("%d/%m/%Y"),
     }
-    resp = requests.get(BCB_SELIC_URL, params=params, timeout=30)
-    resp.raise_for_status()
-    data = resp.json()
-
-    cumulative = 1.0
-    multipliers = []
+    data = scheduler.run("bcb", _bcb_rates, params)
+    days = [datetime.strptime(point["data"], "%d/%m/%Y").replace(tzinfo=timezone.utc) for point in data]
+    epochs = np.array([int(d.timestamp()) for d in days], dtype=np.int64)
+    return Series(epochs, np.array([float(point["valor"]) for point in data], dtype=np.float64))
 
-    for point in data:
-        dt = datetime.strptime(point["data"], "%d/%m/%Y")
-        # daily_rate: BCB returns values already in % (e.g. 0.0519 = 0.0519% per day)
-        daily_rate = float(point["valor"]) / 100.0 * (percentage / 100.0)
-        cumulative *= 1.0 + daily_rate
 
-        if ir:
-            days_elapsed = (dt - start).days
-            rate = _ir_rate(days_elapsed)
-            gain = cumulative - 1.0
-            net_value = 1.0 + gain * (1.0 - rate)
-        else:
-            net_value = cumulative
+def _bcb_rates(params: dict) -> list[dict]:
+    with track_upstream("bcb") as call:
+        resp = requests.get(BCB_SELIC_URL, params=params, timeout=30)
+        resp.raise_for_status()
+        call.response_bytes(len(resp.content))
+        data = resp.json()
+        call.response_rows(len(data))
+    return data
 
-        multipliers.append(MultiplierPoint(datetime=dt, value=net_value))
 
+def _multiplier_points(curve: Series, end: datetime) -> list[MultiplierPoint]:
+    if len(curve) == 0:
+        return []
     # BCB only publishes business days; ffill the last known value up to end
-    if multipliers:
-        last_dt = multipliers[-1].datetime
-        last_value = multipliers[-1].value
-        current = last_dt + timedelta(days=1)
-        while current.date() <= end.date():
-            multipliers.append(MultiplierPoint(datetime=current, value=last_value))
-            current += timedelta(days=1)
+    end_day = _epoch(datetime.combine(end.date(), datetime.min.time()))
+    filled = np.arange(curve.epochs[-1] + DAY, end_day + DAY, DAY, dtype=np.int64)
+    series = Series(
+        np.concatenate([curve.epochs, filled]), np.concatenate([curve.values, np.full(len(filled), curve.values[-1])]),
+    )
+    return [MultiplierPoint(datetime=dt, value=v) for dt, v in zip(series.datetimes(), series.values.tolist())]
+
+
+class _SelicCurve:
+    """
+    A materialized multiplier curve for one (start, percentage, ir) scenario: the compounded factor
+    (`gross`) and the multiplier after IR (`net`, the same array without IR) at each BCB day since start.
+    """
+
+    __slots__ = ("epochs", "gross", "net")
+
+    def __init__(self, epochs: np.ndarray, gross: np.ndarray, net: np.ndarray):
+        for array in (epochs, gross, net):
+            # Shared by every request for the scenario
+            array.setflags(write=False)
+        self.epochs = epochs
+        self.gross = gross
+        self.net = net
+
+    def __len__(self) -> int:
+        return len(self.epochs)
+
+    @property
+    def nbytes(self) -> int:
+        net = self.net.nbytes if self.net is not self.gross else 0
+        return self.epochs.nbytes + self.gross.nbytes + net + OVERHEAD_BYTES
+
+    def net_series(self, count: int) -> Series:
+        return Series(self.epochs[:count], self.net[:count])
+
+    @classmethod
+    def build(cls, rates: Series, start_s: int, percentage: float, ir: bool) -> "_SelicCurve":
+        gross = _compound(1.0, rates.values, percentage)
+        return cls(rates.epochs.copy(), gross, _apply_ir(gross, rates.epochs, start_s) if ir else gross)
+
+    def extend(self, rates: Series, start_s: int, percentage: float, ir: bool) -> "_SelicCurve":
+        """This curve plus one compounding step (and IR bracket) per day of `rates`, which follow its last day."""
+        tail = _compound(float(self.gross[-1]), rates.values, percentage)
+        epochs = np.concatenate([self.epochs, rates.epochs])
+        gross = np.concatenate([self.gross, tail])
+        if not ir:
+            return _SelicCurve(epochs, gross, gross)
+        return _SelicCurve(epochs, gross, np.concatenate([self.net, _apply_ir(tail, rates.epochs, start_s)]))
+
+
+def _compound(base: float, rates: np.ndarray, percentage: float) -> np.ndarray:
+    # BCB returns values already in % (e.g. 0.0519 = 0.0519% per day). Multiplying onto `base` step by
+    # step keeps an extended curve bit-identical to one compounded from the start.
+    return np.cumprod(np.concatenate([[base], 1.0 + rates / 100.0 * (percentage / 100.0)]))[1:]
+
+
+def _apply_ir(gross: np.ndarray, epochs: np.ndarray, start_s: int) -> np.ndarray:
+    """Multiplier net of Imposto de Renda on the gain, at each day's IR_BRACKETS rate."""
+    days_elapsed = (epochs - start_s) // DAY
+    ir_rate = np.select([days_elapsed <= days for days, _ in IR_BRACKETS], [rate for _, rate in IR_BRACKETS], IR_FINAL_RATE)
+    return 1.0 + (gross - 1.0) * (1.0 - ir_rate)
+
+
+def _selic_curve(rates: Series, start: datetime, percentage: float, ir: bool) -> Series:
+    """
+    Multiplier at each BCB day of `rates` (no forward fill). Curves are materialized per scenario: a
+    range ending earlier is a prefix of the cached curve, and new BCB days extend it in place of a rebuild.
+    """
+    if len(rates) == 0:
+        return Series.empty()
+    start_s = _epoch(start)
+    key = (start_s, percentage, ir)
+    count = len(rates)
+    curve = _curve_cache.get(key)
+    if curve is not None and curve.epochs[0] == rates.epochs[0]:
+        known = len(curve)
+        if count <= known and curve.epochs[count - 1] == rates.epochs[-1]:
+            record_cache("selic_curves", "hit")
+            return curve.net_series(count)
+        if count > known and rates.epochs[known - 1] == curve.epochs[-1]:
+            record_cache("selic_curves", "hit")
+            curve = curve.extend(Series(rates.epochs[known:], rates.values[known:]), start_s, percentage, ir)
+            _curve_cache.put(key, curve)
+            return curve.net_series(count)
+
+    record_cache("selic_curves", "miss")
+    curve = _SelicCurve.build(rates, start_s, percentage, ir)
+    _curve_cache.put(key, curve)
+    return curve.net_series(count)
+
+
+def _gather(loaders: list[Callable[[], T]]) -> list[T]:
+    """Runs the loaders concurrently, each in a copy of the caller's context (timings, staleness, priority)."""
+    if len(loaders) <= 1:
+        return [loader() for loader in loaders]
+    with ThreadPoolExecutor(max_workers=min(MAX_FANOUT, len(loaders)), thread_name_prefix="fanout") as pool:
+        futures = [pool.submit(contextvars.copy_context().run, loader) for loader in loaders]
+        return [future.result() for future in futures]
+
+
+def prefetch_series(
+    tickers: dict[str, tuple[datetime, datetime | None]], selic: tuple[datetime, datetime | None] | None = None
+) -> None:
+    """
+    Loads each ticker's range (and SELIC's) into the series store concurrently, so requests for parts of
+    them are answered from the store instead of fetching the same data again. Failures are only logged:
+    the requests that need the data fetch it themselves and report their own errors.
+    """
+    loaders = [lambda t=ticker, r=span: _price_series(t, *r) for ticker, span in tickers.items()]
+    if selic is not None:
+        loaders.append(lambda: _selic_rates(*selic))
+
+    def quietly(loader: Callable[[], Series]) -> None:
+        try:
+            loader()
+        except Exception as exc:
+            logger.warning("Prefetch failed: %s", exc)
+
+    _gather([lambda loader=loader: quietly(loader) for loader in loaders])
+
+
+def compare(
+    tickers: list[str], scenarios: list[SelicScenario], start: datetime, end: datetime | None
+) -> CompareResponse:
+    """
+    Tickers and SELIC scenarios over the same range, on the union of their trading days (each column
+    forward-filled), rebased to 1.0 on the first day every column has a value.
+    """
+    loaders = [lambda t=ticker: _ticker_series(t, start, end) for ticker in tickers]
+    if scenarios:
+        loaders.append(lambda: _selic_series(start, end))
+    with stage("fetch"):
+        loaded = _gather(loaders)
+
+    with stage("align"):
+        columns = list(loaded[:len(tickers)])
+        if scenarios:
+            columns += [_selic_curve(loaded[-1], start, s.percentage, s.ir) for s in scenarios]
+        for ticker, series in zip(tickers, columns):
+            if len(series) == 0:
+                raise ValueError(f"No price data found for ticker '{ticker}'")
+        days, matrix = align_daily(columns)
+        first, rebased = rebase(matrix)
+
+    with stage("convert"):
+        return CompareResponse(
+            dates=days[first:].astype("datetime64[D]").tolist() if first >= 0 else [],
+            columns=list(tickers) + [s.label for s in scenarios],
+            values=rebased.tolist(),
+        )
+
+
+def analyze(
+    tickers: list[str], start: datetime, end: datetime | None, windows: list[int], currency: str | None = None
+) -> AnalyticsResponse:
+    """Return/risk statistics per ticker, with Sharpe measured against SELIC (100%) over the same range."""
+    loaders = [lambda t=ticker: _priced_series(t, start, end, currency) for ticker in tickers]
+    loaders.append(lambda: _selic_series(start, end))
+    with stage("fetch"):
+        loaded = _gather(loaders)
+
+    with stage("analytics"):
+        selic = _selic_curve(loaded[-1], start, 100.0, False)
+        risk_free = analytics.annualized_return(selic) if len(selic) > 1 else 0.0
+        results = []
+        for ticker, series in zip(tickers, loaded[:-1]):
+            if len(series) < 2:
+                raise ValueError(f"Not enough price data for ticker '{ticker}'")
+            results.append(TickerAnalytics(
+                ticker=ticker,
+                points=len(series),
+                total_return=analytics.total_return(series),
+                annualized_return=analytics.annualized_return(series),
+                volatility=analytics.volatility(series),
+                max_drawdown=analytics.max_drawdown(series),
+                sharpe=analytics.sharpe(series, risk_free),
+                rolling=[_rolling_summary(series, days) for days in windows],
+            ))
+    return AnalyticsResponse(risk_free=risk_free, tickers=results)
+
+
+def _rolling_summary(series: Series, window_days: int) -> RollingReturns:
+    returns = analytics.rolling_returns(series, window_days)
+    if len(returns) == 0:
+        return RollingReturns(window_days=window_days, latest=None, mean=None, worst=None, best=None)
+    return RollingReturns(
+        window_days=window_days,
+        latest=float(returns[-1]),
+        mean=float(returns.mean()),
+        worst=float(returns.min()),
+        best=float(returns.max()),
+    )
+
+
+def value_portfolio(events: list[PortfolioEvent], currency: str = "BRL", end: date | None = None) -> PortfolioResponse:
+    """
+    Daily value, invested capital and time-weighted return of a portfolio of buys/sells and SELIC-indexed
+    fixed income, all in `currency`. Each ticker's prices, each FX pair and the SELIC series are loaded
+    once (concurrently); the valuation itself is array arithmetic over (assets x days) matrices.
+    """
+    currency = fx_currency(currency)
+    trades = [e for e in events if e.event_type != PortfolioEventType.FIXED_INCOME]
+    incomes = [e for e in events if e.event_type == PortfolioEventType.FIXED_INCOME]
+    for event in trades:
+        if not event.ticker or not event.quantity or event.quantity <= 0 or event.asset_unit_price is None:
+            raise ValueError(f"{event.event_type.value} on {event.date} needs ticker, a positive quantity and asset_unit_price")
+    for event in incomes:
+        if event.fiat_amount is None:
+            raise ValueError(f"fixed_income on {event.date} needs fiat_amount")
+
+    def day_epoch(day: date) -> int:
+        return _epoch(datetime.combine(day, datetime.min.time()))
+
+    first_day = min(day_epoch(e.date) for e in events)
+    last_day = day_epoch(end or datetime.now(tz=timezone.utc).date())
+    if last_day < first_day:
+        raise ValueError("end is before the first event")
+    start_dt = _utc(first_day)
+    # Yahoo's end is exclusive, BCB's inclusive
+    prices_end, selic_end = (_utc(last_day + DAY), _utc(last_day)) if end else (None, None)
+    days = portfolio.calendar(first_day, last_day)
+    day_index = {int(day): i for i, day in enumerate(days)}
+
+    tickers = sorted({e.ticker for e in trades})
+    if trades:
+        ticker_row = {t: i for i, t in enumerate(tickers)}
+        signs = np.array([1.0 if e.event_type == PortfolioEventType.BUY else -1.0 for e in trades])
+        quantity = np.array([e.quantity for e in trades])
+        rows = np.array([ticker_row[e.ticker] for e in trades])
+        trade_days = np.array([day_index[day_epoch(e.date)] for e in trades])
+        positions = portfolio.cumulative(len(tickers), len(days), rows, trade_days, signs * quantity)
+        # Checked before anything is fetched; the tolerance absorbs float error in sums of fractional units
+        short = np.argwhere(positions < -1e-9)
+        if len(short):
+            row, day = short[0]
+            raise ValueError(
+                f"Sells of {tickers[row]} exceed the quantity held on {_utc(int(days[day])).date()} "
+                f"(position {positions[row, day]:g})"
+            )
+    event_currencies = [fx_currency(e.currency or (asset_currency(e.ticker) if e.ticker else "BRL")) for e in events]
+    # Fixed income accrues in BRL whatever currency the contribution was made in
+    needed = {asset_currency(t) for t in tickers} | set(event_currencies) | ({"BRL"} if incomes else set())
+    currencies = sorted(needed - {currency})
+    rates_by = sorted({e.percentage for e in incomes})
+
+    loaders = [lambda t=ticker: _ticker_series(t, start_dt, prices_end) for ticker in tickers]
+    loaders += [lambda c=source: _fx_series(c, currency, start_dt, prices_end) for source in currencies]
+    if incomes:
+        loaders.append(lambda: _selic_series(start_dt, selic_end))
+    with stage("fetch"):
+        loaded = _gather(loaders)
+
+    with stage("valuation"):
+        # Target-currency value of one unit of each currency, per day
+        fx = {currency: np.ones(len(days))}
+        for source, series in zip(currencies, loaded[len(tickers):len(tickers) + len(currencies)]):
+            fx[source] = portfolio.end_of_day(series, days)
+
+        currency_row = {c: i for i, c in enumerate(fx)}
+        fx_matrix = np.vstack(list(fx.values()))
+        events_day = np.array([day_index[day_epoch(e.date)] for e in events])
+        events_fx = fx_matrix[[currency_row[c] for c in event_currencies], events_day]
+        if np.isnan(events_fx).any():
+            raise ValueError(f"No exchange rate available for some events' currency into {currency}")
+
+        flows = np.zeros(len(events))
+        value = np.zeros(len(days))
+        is_trade = np.array([e.event_type != PortfolioEventType.FIXED_INCOME for e in events])
+
+        if trades:
+            unit_price = np.array([e.asset_unit_price for e in trades])
+            fees = np.array([e.fees for e in trades])
+            # Buys bring in cost plus fees; sells take out proceeds net of fees
+            flows[is_trade] = (signs * quantity * unit_price + fees) * events_fx[is_trade]
+
+            prices = np.vstack([
+                portfolio.end_of_day(series, days) * fx[asset_currency(t)] for t, series in zip(tickers, loaded)
+            ])
+            # Before a ticker's first bar (or FX rate), value it at the first trade price
+            first_trade = np.full(len(tickers), np.nan)
+            for row, price, rate in zip(rows[::-1], unit_price[::-1], events_fx[is_trade][::-1]):
+                first_trade[row] = price * rate
+            prices = np.where(np.isnan(prices), first_trade[:, None], prices)
+            value += (positions * prices).sum(axis=0)
+
+        if incomes:
+            rates = loaded[-1]
+            curves = np.vstack([
+                portfolio.end_of_day(_selic_curve(rates, start_dt, p, False), days) for p in rates_by
+            ])
+            # Before the first BCB day in range nothing has accrued yet
+            curves = np.where(np.isnan(curves), 1.0, curves)
+            curve_row = np.array([rates_by.index(e.percentage) for e in incomes])
+            income_day = events_day[~is_trade]
+            amount = np.array([e.fiat_amount for e in incomes])
+            flows[~is_trade] = amount * events_fx[~is_trade]
+            brl = fx["BRL"][income_day]
+            if np.isnan(brl).any():
+                raise ValueError(f"No BRL exchange rate into {currency} on some fixed income dates")
+            # Contributions buy units of their curve in BRL; units grow with it
+            units = portfolio.cumulative(
+                len(rates_by), len(days), curve_row, income_day, flows[~is_trade] / brl / curves[curve_row, income_day],
+            )
+            value += (units * curves).sum(axis=0) * fx["BRL"]
+
+        daily_flows = np.bincount(events_day, weights=flows, minlength=len(days))
+        invested = np.cumsum(daily_flows)
+        twr = portfolio.time_weighted_return(value, daily_flows)
+
+    with stage("convert"):
+        return PortfolioResponse(
+            currency=currency,
+            dates=days.astype("datetime64[D]").tolist(),
+            value=value.tolist(),
+            invested=invested.tolist(),
+            twr=twr.tolist(),
+        )
 
-    return SelicResponse(multipliers=multipliers)
 
 def search_tickers(query: str, max_results: int = 10) -> TickerSearchResponse:
-    search = yf.Search(query, max_results=max_results)
+    """
+    Short prefixes the local index knows are served from it; anything else goes to Yahoo (cached per
+    query for SEARCH_TTL) and is merged back into the index. Yahoo's search is fuzzy and ranked, so a
+    short answer for one prefix says nothing about the longer ones.
+    """
+    prefix = normalize_query(query)
+    if len(prefix) <= LOCAL_PREFIX_LEN and _search_index.knows(prefix):
+        record_cache("ticker_search_index", "hit")
+        return TickerSearchResponse(results=_search_index.search(prefix, max_results))
+
+    results = _search_cache.get((prefix, max_results), lambda: _search_upstream(query, max_results))
+    return TickerSearchResponse(results=results)
+
+
+def _search_upstream(query: str, max_results: int) -> list[TickerSearchResult]:
+    search = scheduler.run("yahoo", _yahoo_search, query, max_results)
     results = [
         TickerSearchResult(
             symbol=q["symbol"],
@@ -127,4 +798,23 @@ def search_tickers(query: str, max_results: int = 10) -> TickerSearchResponse:
         )
         for q in search.quotes
     ]
-    return TickerSearchResponse(results=results)
+    _search_index.add(results)
+    _search_index.mark_searched(query)
+    return results
+
+
+def _yahoo_search(query: str, max_results: int):
+    with track_upstream("yfinance_search") as call:
+        search = yf.Search(query, max_results=max_results)
+        call.response_rows(len(search.quotes))
+    return search
+
+
+def clear_caches() -> None:
+    _store.clear()
+    _history_cache.clear()
+    _selic_cache.clear()
+    _curve_cache.clear()
+    _search_cache.clear()
+    _search_index.clear()
+    _search_index.load_listing(LISTING_PATH)
@@ -0,0 +1,171 @@
+"""
+Shared on-disk store of price and rate series, memory-mapped by every worker.
+
+One file per series (e.g. ticker + interval): a fixed 64-byte header followed by an int64 epoch
+array and a float64 value array. Readers map the file read-only and wrap the arrays without copying,
+so N uvicorn workers share one copy in the page cache. Writers take an exclusive lock file, merge
+with the current contents, write a temp file and os.replace() it: readers never block and never
+see a partial file (a mapping keeps the old inode alive until it is dropped).
+"""
+
+import fcntl
+import mmap
+import os
+import re
+import struct
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+
+from .caching import LRU
+from .series import Series
+
+MAGIC = b"FASERIE1"
+# magic, count, covered_from, covered_to, fetched_at, first_fetched_at, padding
+HEADER = struct.Struct("<8sqqqdd16x")
+assert HEADER.size == 64
+
+DEFAULT_STORE_DIR = Path(tempfile.gettempdir()) / "holdings-series"
+# Mappings kept open per process; they live in the shared page cache, not the heap, so this is generous
+MAX_MAPPED_BYTES = 512 * 2**20
+# Each mapping also holds a file descriptor open (mmap duplicates it), so their number is capped too
+MAX_MAPPED_FILES = 256
+
+
+class StoredSeries(Series):
+    """
+    A series plus the time range it is known to cover; arrays are read-only views into the mapping.
+    `fetched_at` is when the newest points were fetched, `first_fetched_at` when the oldest ones were.
+    """
+
+    __slots__ = ("covered_from", "covered_to", "fetched_at", "first_fetched_at")
+
+    def __init__(
+        self, epochs: np.ndarray, values: np.ndarray, covered_from: int, covered_to: int, fetched_at: float,
+        first_fetched_at: float | None = None,
+    ):
+        super().__init__(epochs, values)
+        self.covered_from = covered_from
+        self.covered_to = covered_to
+        self.fetched_at = fetched_at
+        self.first_fetched_at = fetched_at if first_fetched_at is None else first_fetched_at
+
+    def covers(self, start: int, end: int) -> bool:
+        return self.covered_from <= start and end <= self.covered_to
+
+
+def merge(existing: StoredSeries | None, new: StoredSeries) -> StoredSeries:
+    """
+    Overlays `new` on `existing`. Overlapping or adjacent coverage is unioned (new points win inside
+    the new range); a disjoint range replaces the old one so coverage stays a single interval.
+    """
+    if existing is None or new.covered_from > existing.covered_to or new.covered_to < existing.covered_from:
+        return new
+    keep = (existing.epochs < new.covered_from) | (existing.epochs >= new.covered_to)
+    epochs = np.concatenate([existing.epochs[keep], new.epochs])
+    values = np.concatenate([existing.values[keep], new.values])
+    order = np.argsort(epochs, kind="stable")
+    fetched_at = new.fetched_at if new.covered_to >= existing.covered_to else existing.fetched_at
+    first_fetched_at = min(existing.first_fetched_at, new.first_fetched_at) if keep.any() else new.first_fetched_at
+    return StoredSeries(
+        epochs[order],
+        values[order],
+        min(existing.covered_from, new.covered_from),
+        max(existing.covered_to, new.covered_to),
+        fetched_at,
+        first_fetched_at,
+    )
+
+
+class SeriesStore:
+    def __init__(
+        self,
+        root: Path | str | None = None,
+        max_mapped_bytes: int = MAX_MAPPED_BYTES,
+        max_mapped_files: int = MAX_MAPPED_FILES,
+    ):
+        self.root = Path(root or os.getenv("SERIES_STORE_DIR") or DEFAULT_STORE_DIR)
+        # path -> ((inode, mtime_ns, size), StoredSeries) so unchanged files are not remapped
+        self._mapped: LRU[Path, tuple[tuple[int, int, int], StoredSeries]] = LRU(
+            max_entries=max_mapped_files, max_bytes=max_mapped_bytes, sizeof=lambda entry: entry[1].nbytes
+        )
+
+    def path(self, kind: str, key: str) -> Path:
+        safe = re.sub(r"[^A-Za-z0-9._=^@-]", "_", key)
+        return self.root / kind / f"{safe}.bin"
+
+    def read(self, kind: str, key: str) -> StoredSeries | None:
+        path = self.path(kind, key)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        cached = self._mapped.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        series = self._map(path)
+        if series is not None:
+            self._mapped.put(path, (signature, series))
+        return series
+
+    @staticmethod
+    def _map(path: Path) -> StoredSeries | None:
+        try:
+            with open(path, "rb") as f:
+                if os.fstat(f.fileno()).st_size < HEADER.size:
+                    return None
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return None
+        magic, count, covered_from, covered_to, fetched_at, first_fetched_at = HEADER.unpack_from(mapping, 0)
+        if magic != MAGIC:
+            return None
+        # np.frombuffer keeps the mapping alive for as long as the arrays are referenced
+        epochs = np.frombuffer(mapping, dtype="<i8", count=count, offset=HEADER.size)
+        values = np.frombuffer(mapping, dtype="<f8", count=count, offset=HEADER.size + 8 * count)
+        return StoredSeries(epochs, values, covered_from, covered_to, fetched_at, first_fetched_at)
+
+    @contextmanager
+    def _writer_lock(self, path: Path) -> Iterator[None]:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path.with_suffix(".lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def write(self, kind: str, key: str, series: StoredSeries, replace: bool = False) -> StoredSeries:
+        """
+        Merges `series` into the stored one (under the writer lock) and returns the result; with `replace`
+        the stored one is dropped instead.
+        """
+        path = self.path(kind, key)
+        with self._writer_lock(path):
+            merged = series if replace else merge(self._map(path), series)
+            epochs = np.ascontiguousarray(merged.epochs, dtype="<i8")
+            values = np.ascontiguousarray(merged.values, dtype="<f8")
+            header = HEADER.pack(
+                MAGIC, len(epochs), merged.covered_from, merged.covered_to, merged.fetched_at, merged.first_fetched_at,
+            )
+            fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.stem, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(header)
+                    f.write(epochs.tobytes())
+                    f.write(values.tobytes())
+                os.replace(tmp, path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        return StoredSeries(
+            epochs, values, merged.covered_from, merged.covered_to, merged.fetched_at, merged.first_fetched_at,
+        )
+
+    def clear(self) -> None:
+        self._mapped.clear()
@@ -0,0 +1,60 @@
+"""
+Request-scoped stage timings reported in the Server-Timing header.
+
+The middleware activates a Timings object in a context variable; because anyio copies the context
+into the worker thread, service code running there appends to the same object.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Iterator
+
+_current: ContextVar["Timings | None"] = ContextVar("timings", default=None)
+
+
+class Timings:
+    __slots__ = ("stages", "endpoint_done", "profile", "profile_report", "profile_path")
+
+    def __init__(self, profile: str | None = None):
+        self.stages: list[tuple[str, float]] = []
+        self.endpoint_done: float | None = None
+        # None, "file" (save to disk) or "text" (return the report as the body)
+        self.profile = profile
+        self.profile_report: str | None = None
+        self.profile_path: str | None = None
+
+    def add(self, name: str, seconds: float) -> None:
+        self.stages.append((name, seconds))
+
+    def header(self) -> str:
+        # Stages may repeat (e.g. one fetch per lot); merge them keeping first-seen order
+        merged: dict[str, float] = {}
+        for name, seconds in self.stages:
+            merged[name] = merged.get(name, 0.0) + seconds
+        return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in merged.items())
+
+
+def activate(timings: Timings) -> Token:
+    return _current.set(timings)
+
+
+def deactivate(token: Token) -> None:
+    _current.reset(token)
+
+
+def current() -> Timings | None:
+    return _current.get()
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start)
@@ -0,0 +1,21 @@
+import pytest
+
+from src import quotas, service
+from src.scheduler import scheduler
+from src.service import clear_caches
+from src.storage import SeriesStore
+
+
+@pytest.fixture(autouse=True)
+def fresh_upstream_state(tmp_path, monkeypatch):
+    """Caches, the series store, circuit breakers and quotas are process-wide; give every test a clean slate."""
+    monkeypatch.setattr(service, "_store", SeriesStore(tmp_path / "series"))
+    clear_caches()
+    scheduler.reset()
+    quotas.limiter.reset()
+    quotas.fair_queue.reset()
+    yield
+    clear_caches()
+    scheduler.reset()
+    quotas.limiter.reset()
+    quotas.fair_queue.reset()
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from src import analytics
+from src.series import DAY, Series
+
+
+def _daily(values: list[float]) -> Series:
+    return Series(np.arange(len(values), dtype=np.int64) * DAY, np.array(values, dtype=np.float64))
+
+
+def test_annualized_return_of_one_year_equals_total_return():
+    series = Series(np.array([0, int(analytics.YEAR)]), np.array([100.0, 110.0]))
+
+    assert analytics.annualized_return(series) == pytest.approx(0.10)
+    assert analytics.total_return(series) == pytest.approx(0.10)
+
+
+def test_max_drawdown():
+    series = _daily([100.0, 120.0, 90.0, 130.0, 117.0])
+
+    assert analytics.max_drawdown(series) == pytest.approx(90.0 / 120.0 - 1.0)
+
+
+def test_max_drawdown_of_rising_series_is_zero():
+    assert analytics.max_drawdown(_daily([1.0, 2.0, 3.0])) == 0.0
+
+
+def test_volatility_of_constant_growth_is_zero_and_sharpe_undefined():
+    series = _daily([1.01 ** i for i in range(30)])
+
+    assert analytics.volatility(series) == pytest.approx(0.0, abs=1e-12)
+    assert analytics.sharpe(Series(series.epochs, np.ones(30)), 0.1) is None
+
+
+def test_volatility_annualizes_by_observed_frequency():
+    rng = np.random.default_rng(0)
+    log_returns = rng.normal(0, 0.01, 2_000)
+    series = _daily(list(np.exp(np.concatenate([[0.0], np.cumsum(log_returns)]))))
+
+    assert analytics.volatility(series) == pytest.approx(0.01 * np.sqrt(365.25), rel=0.05)
+
+
+def test_rolling_returns_use_trailing_calendar_window():
+    series = _daily([100.0, 101.0, 102.0, 110.0])
+
+    returns = analytics.rolling_returns(series, 2)
+
+    # Points 2 and 3 have a point two days back
+    assert returns.tolist() == pytest.approx([102.0 / 100.0 - 1.0, 110.0 / 101.0 - 1.0])
@@ -0,0 +1,158 @@
+import json
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from src import quotas
+from src.app.batch import MAX_BATCH_REQUESTS
+from src.app.dependencies import load_api_keys
+from src.app.main import app
+from src.models import SelicResponse, TickerPriceResponse
+
+AUTH = {"Authorization": "Bearer test-key"}
+EMPTY_SELIC = SelicResponse(multipliers=[])
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("API_KEY", "test-key")
+    load_api_keys()
+    return TestClient(app)
+
+
+def _daily_df(days: int) -> pd.DataFrame:
+    index = pd.date_range(start="2024-01-01", periods=days, freq="1D", tz="UTC")
+    return pd.DataFrame({"Close": [100.0 + i for i in range(days)]}, index=index)
+
+
+def test_results_are_in_request_order(client):
+    price = TickerPriceResponse(ticker="BTC-USD", datetime="2024-03-01T00:00:00", price=42000.0)
+    requests = [
+        {"path": "/selic", "params": {"start": "2024-01-01"}},
+        {"id": "btc", "path": "/ticker/price", "params": {"ticker": "BTC-USD", "date": "2024-03-01"}},
+    ]
+    with (
+        patch("src.app.routes.fetch_selic", return_value=EMPTY_SELIC),
+        patch("src.app.routes.fetch_last_price", return_value=price),
+    ):
+        response = client.post("/batch", json={"requests": requests}, headers=AUTH)
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [(r["id"], r["status"]) for r in results] == [("0", 200), ("btc", 200)]
+    assert results[1]["body"]["price"] == 42000.0
+
+
+def test_bad_sub_requests_fail_alone(client):
+    requests = [
+        {"path": "/nope"},
+        {"path": "/ticker", "params": {"ticker": "BTC-USD"}},
+        {"path": "/selic", "params": {"start": "2024-01-01"}},
+        {"path": "/selic", "params": {"start": "2024-01-01", "ir": True}},
+    ]
+
+    def fetch_selic(start, end, ir, percentage):
+        if ir:
+            raise RuntimeError("BCB down")
+        return EMPTY_SELIC
+
+    with patch("src.app.routes.fetch_selic", side_effect=fetch_selic), patch("src.app.batch.prefetch_series"):
+        response = client.post("/batch", json={"requests": requests}, headers=AUTH)
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["status"] for r in results] == [404, 422, 200, 500]
+    assert results[3]["body"] == {"detail": "BCB down"}
+
+
+def test_shared_ticker_is_fetched_once(client):
+    requests = [
+        {"path": "/ticker", "params": {"ticker": "BTC-USD", "start": "2024-01-01", "end": "2024-01-10"}},
+        {"path": "/ticker/prices", "params": {"ticker": "BTC-USD", "from_date": "2024-01-03", "to_date": "2024-01-05"}},
+    ]
+    with patch("src.service.yf.Ticker") as mock_ticker_cls:
+        mock_ticker_cls.return_value.history.return_value = _daily_df(9)
+        response = client.post("/batch", json={"requests": requests}, headers=AUTH)
+
+    results = response.json()["results"]
+    assert [r["status"] for r in results] == [200, 200]
+    assert len(results[0]["body"]["prices"]) == 9
+    assert [p["price"] for p in results[1]["body"]] == [102.0, 103.0]
+    assert mock_ticker_cls.return_value.history.call_count == 1
+
+
+def test_todays_price_is_read_from_the_shared_live_series(client):
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    requests = [
+        {"path": "/ticker", "params": {"ticker": "BTC-USD", "start": (today - timedelta(days=9)).isoformat()}},
+        {"path": "/ticker/price", "params": {"ticker": "BTC-USD", "date": today.isoformat()}},
+    ]
+    bars = pd.DataFrame(
+        {"Close": [100.0 + i for i in range(10)]},
+        index=pd.date_range(end=today, periods=10, freq="1D", tz="UTC"),
+    )
+    with patch("src.service.yf.Ticker") as mock_ticker_cls:
+        mock_ticker_cls.return_value.history.return_value = bars
+        response = client.post("/batch", json={"requests": requests}, headers=AUTH)
+
+    results = response.json()["results"]
+    assert [r["status"] for r in results] == [200, 200]
+    assert results[1]["body"]["price"] == 109.0
+    assert mock_ticker_cls.return_value.history.call_count == 1
+
+
+def test_stream_returns_one_json_line_per_result(client):
+    requests = [{"path": "/selic", "params": {"start": "2024-01-01"}} for _ in range(3)]
+    with patch("src.app.routes.fetch_selic", return_value=EMPTY_SELIC), patch("src.app.batch.prefetch_series"):
+        response = client.post("/batch", params={"stream": True}, json={"requests": requests}, headers=AUTH)
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(line["id"] for line in lines) == ["0", "1", "2"]
+    assert all(line["status"] == 200 for line in lines)
+
+
+def test_streamed_batch_holds_its_slot_until_sent(client):
+    active = []
+
+    def fetch_selic(**kwargs):
+        active.append(quotas.fair_queue.active)
+        return EMPTY_SELIC
+
+    requests = [{"path": "/selic", "params": {"start": "2024-01-01"}} for _ in range(2)]
+    with patch("src.app.routes.fetch_selic", side_effect=fetch_selic), patch("src.app.batch.prefetch_series"):
+        response = client.post("/batch", params={"stream": True}, json={"requests": requests}, headers=AUTH)
+
+    assert len(response.text.splitlines()) == 2
+    assert active == [1, 1]
+    assert quotas.fair_queue.active == 0
+
+
+def test_each_sub_request_counts_against_the_rate_limit(monkeypatch, client):
+    monkeypatch.delenv("API_KEY")
+    monkeypatch.setenv("API_KEYS", "web:web-key:3")
+    load_api_keys()
+    headers = {"Authorization": "Bearer web-key"}
+    requests = [{"path": "/selic", "params": {"start": "2024-01-01"}} for _ in range(2)]
+
+    with (
+        patch("src.app.routes.fetch_selic", return_value=EMPTY_SELIC) as mock_fetch,
+        patch("src.app.batch.prefetch_series"),
+    ):
+        first = client.post("/batch", json={"requests": requests}, headers=headers)
+        second = client.post("/batch", json={"requests": requests}, headers=headers)
+
+    assert first.status_code == 200
+    assert second.status_code == 429
+    assert mock_fetch.call_count == 2
+
+
+def test_batch_size_is_limited(client):
+    requests = [{"path": "/selic", "params": {"start": "2024-01-01"}}] * (MAX_BATCH_REQUESTS + 1)
+
+    response = client.post("/batch", json={"requests": requests}, headers=AUTH)
+
+    assert response.status_code == 422
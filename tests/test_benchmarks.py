@@ -0,0 +1,62 @@
+from benchmarks.compare import compare
+from benchmarks.run import MAX_HOURLY_DAYS, RANGES, reset_service_state, scenario_matrix
+from benchmarks.standins import chart_payload, selic_payload
+from src import service
+from src.series import Series
+
+
+def _report(commit: str, p95: float, rps: float) -> dict:
+    return {
+        "commit": commit,
+        "scenarios": [{
+            "endpoint": "/ticker", "range": "1y", "interval": "1d", "concurrency": 8,
+            "p50_ms": 10.0, "p95_ms": p95, "p99_ms": p95, "throughput_rps": rps,
+        }],
+    }
+
+
+def test_compare_flags_latency_regression():
+    regressions = compare(_report("a", 100.0, 50.0), _report("b", 130.0, 50.0), threshold=0.15)
+
+    assert any("p95_ms" in line for line in regressions)
+
+
+def test_compare_flags_throughput_drop():
+    regressions = compare(_report("a", 100.0, 50.0), _report("b", 100.0, 30.0), threshold=0.15)
+
+    assert any("throughput_rps" in line for line in regressions)
+
+
+def test_compare_ignores_improvements():
+    assert compare(_report("a", 100.0, 50.0), _report("b", 50.0, 90.0), threshold=0.15) == []
+
+
+def test_matrix_skips_hourly_beyond_yahoo_limit():
+    matrix = scenario_matrix(["/ticker", "/selic"], list(RANGES), ["1d", "1h"], [1])
+
+    assert all(RANGES[r] <= MAX_HOURLY_DAYS for _, r, interval, _ in matrix if interval == "1h")
+    assert not any(endpoint == "/selic" and interval == "1h" for endpoint, _, interval, _ in matrix)
+
+
+def test_chart_standin_is_deterministic():
+    first = chart_payload("AAPL", 1_700_000_000, 1_700_864_000, "1d")
+    second = chart_payload("AAPL", 1_700_000_000, 1_700_864_000, "1d")
+
+    assert first == second
+    assert len(first["chart"]["result"][0]["timestamp"]) > 0
+
+
+def test_selic_standin_skips_weekends():
+    points = selic_payload("01/01/2024", "07/01/2024")
+
+    assert [p["data"] for p in points] == ["01/01/2024", "02/01/2024", "03/01/2024", "04/01/2024", "05/01/2024"]
+
+
+def test_scenarios_start_from_empty_caches():
+    service._history_cache.put(("AAPL", "1d", None, None), Series.empty())
+    store = service._store
+
+    reset_service_state()
+
+    assert len(service._history_cache) == 0
+    assert service._store is not store
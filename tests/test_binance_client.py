@@ -0,0 +1,256 @@
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from src.binance.client import CLOCK_MARGIN_MS, RECV_WINDOW, BinanceClient, BinanceError, _sign
+from src.binance.finapp import Finapp
+from src.metrics import UPSTREAM_ERRORS
+
+
+def _resp(status: int = 200, body=None, headers: dict | None = None) -> MagicMock:
+    resp = MagicMock()
+    resp.status_code = status
+    resp.ok = status < 400
+    resp.json.return_value = body if body is not None else {}
+    resp.headers = headers or {}
+    return resp
+
+
+def _server_time(offset_ms: int = 0) -> MagicMock:
+    return _resp(body={"serverTime": int(time.time() * 1000) + offset_ms})
+
+
+def _client(*responses) -> BinanceClient:
+    session = MagicMock()
+    session.headers = {}
+    session.request.side_effect = list(responses)
+    return BinanceClient(api_key="key", api_secret="secret", session=session)
+
+
+FILLED = {
+    "orderId": 1,
+    "status": "FILLED",
+    "fills": [{"price": "100", "qty": "0.1", "commission": "0", "commissionAsset": "BNB"}],
+}
+
+
+@pytest.fixture(autouse=True)
+def no_sleep():
+    with patch("src.binance.client.time.sleep") as mock_sleep:
+        yield mock_sleep
+
+
+@pytest.fixture
+def clock(no_sleep):
+    """A local clock that only moves when the client sleeps."""
+    now = [1_700_000_000.0]
+    no_sleep.side_effect = lambda seconds: now.__setitem__(0, now[0] + seconds)
+    with patch("src.binance.client.time.time", side_effect=lambda: now[0]):
+        yield now
+
+
+def _order_session(post: list, lookups: list) -> MagicMock:
+    """Answers /api/v3/time, then POSTs and order lookups from their own queues; the last lookup repeats."""
+    def request(method, url, params=None, timeout=None):
+        if url.endswith("/api/v3/time"):
+            return _resp(body={"serverTime": int(time.time() * 1000)})
+        if method == "POST":
+            response = post.pop(0)
+        else:
+            response = lookups.pop(0) if len(lookups) > 1 else lookups[0]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    session = MagicMock()
+    session.headers = {}
+    session.request.side_effect = request
+    return session
+
+
+# ---------------------------------------------------------------------------
+# Signing and clock
+# ---------------------------------------------------------------------------
+
+def test_sign_is_hmac_of_query_string():
+    assert _sign({"a": 1, "b": "x"}, "secret") == _sign({"a": 1, "b": "x"}, "secret")
+    assert _sign({"a": 1}, "secret") != _sign({"a": 2}, "secret")
+
+
+def test_timestamp_uses_server_offset():
+    client = _client(_server_time(offset_ms=60_000))
+
+    ts = client.timestamp()
+
+    assert ts - int(time.time() * 1000) == pytest.approx(60_000, abs=1_000)
+
+
+def test_time_offset_is_cached():
+    client = _client(_server_time(), _resp(body=FILLED))
+
+    client.timestamp()
+    client.timestamp()
+
+    assert client.session.request.call_count == 1
+
+
+def test_session_is_reused_and_sends_api_key():
+    client = _client(_server_time(), _resp(body=FILLED), _resp(body=FILLED))
+
+    client.place_order("BTCBRL", 10.0)
+    client.place_order("BTCBRL", 10.0)
+
+    assert client.session.headers["X-MBX-APIKEY"] == "key"
+    assert client.session.request.call_count == 3
+
+
+# ---------------------------------------------------------------------------
+# place_order
+# ---------------------------------------------------------------------------
+
+def test_place_order_sends_client_order_id_and_signature():
+    client = _client(_server_time(), _resp(body=FILLED))
+
+    result = client.place_order("BTCBRL", 10.0, client_order_id="abc")
+
+    assert result["status"] == "FILLED"
+    _, kwargs = client.session.request.call_args
+    assert kwargs["params"]["newClientOrderId"] == "abc"
+    assert "signature" in kwargs["params"]
+
+
+def test_place_order_recovers_existing_order_after_timeout():
+    client = _client(
+        _server_time(),
+        requests.Timeout("read timed out"),
+        _resp(body={"orderId": 1, "status": "FILLED"}),
+        _resp(body=[{"price": "100", "qty": "0.1", "commission": "0", "commissionAsset": "BNB", "id": 9}]),
+    )
+
+    result = client.place_order("BTCBRL", 10.0, client_order_id="abc")
+
+    posts = [c for c in client.session.request.call_args_list if c.args[0] == "POST"]
+    assert len(posts) == 1
+    assert result["fills"][0]["tradeId"] == 9
+
+
+def test_place_order_resends_same_id_when_order_still_unknown_after_recv_window(clock):
+    unknown = _resp(400, {"code": -2013, "msg": "Order does not exist."})
+    session = _order_session(post=[_resp(503, {"code": -1001, "msg": "Internal error"}), _resp(body=FILLED)],
+                             lookups=[unknown])
+    client = BinanceClient(api_key="key", api_secret="secret", session=session)
+    started = clock[0]
+
+    result = client.place_order("BTCBRL", 10.0, client_order_id="abc")
+
+    posts = [c for c in session.request.call_args_list if c.args[0] == "POST"]
+    assert result["status"] == "FILLED"
+    assert [p.kwargs["params"]["newClientOrderId"] for p in posts] == ["abc", "abc"]
+    # Not resent before the first request's timestamp + recvWindow had passed
+    assert clock[0] - started > (RECV_WINDOW + CLOCK_MARGIN_MS) / 1000
+    lookups = [c for c in session.request.call_args_list if c.args[0] == "GET" and c.args[1].endswith("/order")]
+    assert len(lookups) > 1
+
+
+def test_place_order_keeps_looking_up_an_order_that_shows_up_late(clock):
+    unknown = _resp(400, {"code": -2013, "msg": "Order does not exist."})
+    session = _order_session(
+        post=[requests.ConnectionError("connection reset")],
+        lookups=[unknown, unknown, _resp(body=FILLED)],
+    )
+    client = BinanceClient(api_key="key", api_secret="secret", session=session)
+
+    result = client.place_order("BTCBRL", 10.0, client_order_id="abc")
+
+    posts = [c for c in session.request.call_args_list if c.args[0] == "POST"]
+    assert result["status"] == "FILLED"
+    assert len(posts) == 1
+
+
+def test_place_order_resyncs_clock_on_invalid_timestamp():
+    client = _client(
+        _server_time(),
+        _resp(400, {"code": -1021, "msg": "Timestamp outside recvWindow"}),
+        _server_time(),
+        _resp(body=FILLED),
+    )
+
+    result = client.place_order("BTCBRL", 10.0)
+
+    assert result["status"] == "FILLED"
+    paths = [c.args[1] for c in client.session.request.call_args_list]
+    assert paths.count("https://api.binance.com/api/v3/time") == 2
+
+
+def test_place_order_does_not_retry_client_errors():
+    client = _client(_server_time(), _resp(400, {"code": -2010, "msg": "Insufficient balance"}))
+
+    with pytest.raises(BinanceError, match="Insufficient balance"):
+        client.place_order("BTCBRL", 10.0)
+
+    assert client.session.request.call_count == 2
+
+
+# ---------------------------------------------------------------------------
+# Weight-based throttling
+# ---------------------------------------------------------------------------
+
+def test_used_weight_header_is_recorded():
+    client = _client(_resp(body={"serverTime": int(time.time() * 1000)}, headers={"X-MBX-USED-WEIGHT-1M": "42"}))
+
+    client.sync_time()
+
+    assert client.used_weight == 42
+
+
+def test_throttles_when_weight_near_limit(no_sleep):
+    client = _client(
+        _resp(body={"serverTime": int(time.time() * 1000)}, headers={"X-MBX-USED-WEIGHT-1M": "5900"}),
+        _resp(body=FILLED),
+    )
+
+    client.timestamp()
+    client.place_order("BTCBRL", 10.0)
+
+    assert no_sleep.called
+
+
+def test_retry_after_is_honoured(no_sleep):
+    client = _client(
+        _server_time(),
+        _resp(429, {"code": -1003, "msg": "Too many requests"}, headers={"Retry-After": "2"}),
+        _resp(400, {"code": -2013, "msg": "Order does not exist."}),
+        _resp(body=FILLED),
+    )
+
+    result = client.place_order("BTCBRL", 10.0)
+
+    assert result["status"] == "FILLED"
+    assert any(c.args[0] >= 1.5 for c in no_sleep.call_args_list)
+
+
+# ---------------------------------------------------------------------------
+# Error metrics
+# ---------------------------------------------------------------------------
+
+@pytest.mark.parametrize("status", [500, 429])
+def test_error_responses_are_counted_as_upstream_errors(status):
+    before = UPSTREAM_ERRORS.value(upstream="binance", error=f"http_{status}")
+    client = _client(_resp(status, {"code": -1003, "msg": "Too many requests"}))
+
+    with pytest.raises(BinanceError):
+        client._request("GET", "/api/v3/ticker/price", retries=0)
+
+    assert UPSTREAM_ERRORS.value(upstream="binance", error=f"http_{status}") == before + 1
+
+
+def test_failed_finapp_sign_in_is_counted_as_upstream_error():
+    before = UPSTREAM_ERRORS.value(upstream="finapp", error="http_401")
+
+    with patch("src.binance.finapp.requests.post", return_value=_resp(401, {"error": "Invalid credentials"})):
+        with pytest.raises(ValueError):
+            Finapp().login()
+
+    assert UPSTREAM_ERRORS.value(upstream="finapp", error="http_401") == before + 1
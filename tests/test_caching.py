@@ -0,0 +1,241 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.caching import LRU, HitRateCache, StaleWhileRevalidate, mark_stale, track_staleness
+
+
+def _wait_for(predicate, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.005)
+
+
+def test_miss_calls_loader_and_caches():
+    cache = StaleWhileRevalidate("test", ttl=60, max_stale=600)
+    loader = MagicMock(return_value="v1")
+
+    assert cache.get("k", loader) == "v1"
+    assert cache.get("k", loader) == "v1"
+    assert loader.call_count == 1
+
+
+def test_stale_entry_is_served_and_refreshed_in_background():
+    cache = StaleWhileRevalidate("test", ttl=0.0, max_stale=600)
+    cache.put("k", "old")
+    refreshed = threading.Event()
+
+    def loader():
+        refreshed.set()
+        return "new"
+
+    with track_staleness() as staleness:
+        assert cache.get("k", loader) == "old"
+
+    assert staleness.stale
+    assert refreshed.wait(2.0)
+    _wait_for(lambda: cache.get("k", loader, ttl=60) == "new")
+
+
+def test_single_background_refresh_per_key():
+    cache = StaleWhileRevalidate("test", ttl=0.0, max_stale=600)
+    cache.put("k", "old")
+    release = threading.Event()
+    loader = MagicMock(side_effect=lambda: release.wait(2.0) and "new")
+
+    for _ in range(5):
+        cache.get("k", loader)
+    release.set()
+
+    _wait_for(lambda: loader.call_count >= 1)
+    time.sleep(0.05)
+    assert loader.call_count == 1
+
+
+def test_failed_refresh_keeps_stale_value():
+    cache = StaleWhileRevalidate("test", ttl=0.0, max_stale=600)
+    cache.put("k", "old")
+    loader = MagicMock(side_effect=RuntimeError("down"))
+
+    assert cache.get("k", loader) == "old"
+    _wait_for(lambda: loader.call_count == 1)
+    time.sleep(0.05)
+    assert cache.get("k", loader) == "old"
+
+
+def test_stale_loader_result_is_not_kept_as_fresh():
+    cache = StaleWhileRevalidate("test", ttl=60, max_stale=600)
+
+    def fallback():
+        mark_stale(120.0)
+        return "stored"
+
+    with track_staleness() as first:
+        assert cache.get("k", fallback) == "stored"
+    with track_staleness() as second:
+        assert cache.get("k", MagicMock(return_value="fresh")) == "stored"
+
+    assert first.stale and first.age == 120.0
+    # Served again flagged stale (not as a fresh hit) while a refresh runs
+    assert second.stale and second.age >= 120.0
+    _wait_for(lambda: cache.get("k", MagicMock()) == "fresh")
+
+
+def test_entry_past_max_stale_is_reloaded_synchronously():
+    cache = StaleWhileRevalidate("test", ttl=0.0, max_stale=0.0)
+    cache.put("k", "old")
+
+    with pytest.raises(RuntimeError):
+        cache.get("k", MagicMock(side_effect=RuntimeError("down")))
+
+
+
+def test_concurrent_misses_share_one_load():
+    cache = StaleWhileRevalidate("test", ttl=60, max_stale=600)
+    release = threading.Event()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        release.wait(2)
+        return "v1"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("k", loader))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    _wait_for(lambda: calls)
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["v1"] * 8
+    assert len(calls) == 1
+
+
+def test_concurrent_misses_share_the_loader_error():
+    cache = StaleWhileRevalidate("test", ttl=60, max_stale=600)
+    release = threading.Event()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        release.wait(2)
+        raise RuntimeError("down")
+
+    errors = []
+
+    def get():
+        try:
+            cache.get("k", loader)
+        except RuntimeError as exc:
+            errors.append(str(exc))
+
+    threads = [threading.Thread(target=get) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    _wait_for(lambda: calls)
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert errors == ["down"] * 4
+    assert len(calls) == 1
+    # The failed load is not remembered: the next miss tries again
+    assert cache.get("k", MagicMock(return_value="v2")) == "v2"
+
+def test_lru_eviction():
+    cache = StaleWhileRevalidate("test", ttl=60, max_stale=600, max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.put("c", 3)
+
+    assert len(cache) == 2
+    assert cache.get("a", lambda: "reloaded") == "reloaded"
+
+
+def test_lru_evicts_least_recently_used_past_byte_budget():
+    lru = LRU(max_bytes=10, sizeof=len)
+    lru.put("a", "xxxx")
+    lru.put("b", "xxxx")
+    lru.get("a")
+    lru.put("c", "xxxx")
+
+    assert lru.get("b") is None
+    assert lru.get("a") == "xxxx"
+    assert lru.nbytes == 8
+
+
+def test_lru_does_not_keep_entries_larger_than_budget():
+    lru = LRU(max_bytes=3, sizeof=len)
+    lru.put("a", "xxxx")
+
+    assert len(lru) == 0
+    assert lru.nbytes == 0
+
+
+def test_lru_replacing_a_key_updates_size():
+    lru = LRU(max_bytes=10, sizeof=len)
+    lru.put("a", "xxxx")
+    lru.put("a", "xx")
+
+    assert lru.nbytes == 2
+
+
+def test_swr_bounded_by_bytes():
+    cache = StaleWhileRevalidate("test", ttl=60, max_stale=600, max_bytes=10, sizeof=len)
+    cache.put("a", "xxxxxx")
+    cache.put("b", "xxxxxx")
+
+    assert len(cache) == 1
+
+
+def test_hit_rate_cache_evicts_fewest_hits_per_byte():
+    cache = HitRateCache(max_bytes=12, sizeof=len)
+    cache.put("busy", "xxxx")
+    cache.put("idle", "xxxx")
+    for _ in range(3):
+        cache.get("busy")
+    cache.put("new", "xxxxxx")
+
+    assert cache.get("idle") is None
+    assert cache.get("busy") == "xxxx"
+    assert cache.get("new") == "xxxxxx"
+    assert cache.nbytes == 10
+
+
+def test_hit_rate_cache_prefers_small_entries_at_equal_hits():
+    cache = HitRateCache(max_bytes=10, sizeof=len)
+    cache.put("large", "xxxxxx")
+    cache.put("small", "xx")
+    cache.put("new", "xxxx")
+
+    assert cache.get("large") is None
+    assert len(cache) == 2
+
+
+def test_hit_rate_cache_replacement_keeps_hits():
+    cache = HitRateCache(max_bytes=10, sizeof=len)
+    cache.put("a", "xx")
+    cache.put("b", "xx")
+    for _ in range(3):
+        cache.get("a")
+    cache.put("a", "xxxx")
+    cache.put("c", "xxxxx")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "xxxx"
+
+
+def test_hit_rate_cache_does_not_keep_entries_larger_than_budget():
+    cache = HitRateCache(max_bytes=3, sizeof=len)
+    cache.put("a", "xxxx")
+
+    assert len(cache) == 0
+    assert cache.nbytes == 0
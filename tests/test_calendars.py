@@ -0,0 +1,91 @@
+from datetime import date
+
+import numpy as np
+import pytest
+from dateutil.easter import easter as dateutil_easter
+
+from src.calendars import B3, BCB, CRYPTO, NYSE, easter, for_symbol
+from src.series import DAY
+
+
+def _epoch(day: date) -> int:
+    return (day - date(1970, 1, 1)).days * DAY
+
+
+def test_easter_matches_dateutil():
+    assert all(easter(year) == dateutil_easter(year) for year in range(1990, 2101))
+
+
+@pytest.mark.parametrize("day", [
+    date(2024, 1, 1), date(2024, 1, 15), date(2024, 2, 19), date(2024, 3, 29), date(2024, 5, 27),
+    date(2024, 6, 19), date(2024, 7, 4), date(2024, 9, 2), date(2024, 11, 28), date(2024, 12, 25),
+    # Christmas 2021 fell on a Saturday; Independence Day 2026 does too
+    date(2021, 12, 24), date(2026, 7, 3),
+    date(2018, 12, 5),
+])
+def test_nyse_holidays(day):
+    assert not NYSE.is_session(day)
+
+
+def test_nyse_does_not_observe_saturday_new_year():
+    assert NYSE.is_session(date(2021, 12, 31))
+
+
+@pytest.mark.parametrize("day", [
+    date(2024, 2, 12), date(2024, 2, 13), date(2024, 3, 29), date(2024, 5, 30), date(2024, 11, 20),
+    date(2024, 12, 24), date(2024, 12, 31), date(2021, 1, 25),
+])
+def test_b3_holidays(day):
+    assert not B3.is_session(day)
+
+
+def test_b3_trades_on_sao_paulo_holidays_since_2022():
+    assert B3.is_session(date(2022, 1, 25))
+    assert B3.is_session(date(2023, 11, 20))
+
+
+def test_bcb_runs_on_b3_only_closures():
+    assert BCB.is_session(date(2024, 12, 24))
+    assert not BCB.is_session(date(2024, 12, 25))
+
+
+def test_crypto_trades_every_day():
+    assert len(CRYPTO.sessions(date(2024, 1, 1), date(2025, 1, 1))) == 366
+
+
+def test_rolls_to_neighbouring_sessions():
+    # Good Friday + Easter weekend
+    assert B3.previous_session(date(2024, 3, 31)) == date(2024, 3, 28)
+    assert B3.next_session(date(2024, 3, 29)) == date(2024, 4, 1)
+    assert B3.previous_session(date(2024, 4, 1)) == date(2024, 4, 1)
+
+
+def test_sessions_in_range():
+    sessions = NYSE.sessions(date(2024, 3, 25), date(2024, 4, 2))
+
+    assert sessions.tolist() == [date(2024, 3, d) for d in (25, 26, 27, 28)] + [date(2024, 4, 1)]
+    assert sessions.dtype == np.dtype("datetime64[D]")
+
+
+def test_has_session_over_epoch_ranges():
+    saturday, monday = _epoch(date(2024, 3, 9)), _epoch(date(2024, 3, 11))
+
+    assert not NYSE.has_session(saturday, monday)
+    assert NYSE.has_session(saturday, monday + 1)
+    assert NYSE.has_session(saturday - 1, monday)
+    assert not NYSE.has_session(monday, monday)
+
+
+def test_session_start_is_midnight_of_last_session():
+    sunday_noon = _epoch(date(2024, 3, 31)) + DAY // 2
+
+    assert B3.session_start(sunday_noon) == _epoch(date(2024, 3, 28))
+    assert CRYPTO.session_start(sunday_noon) == _epoch(date(2024, 3, 31))
+
+
+@pytest.mark.parametrize("ticker, calendar", [
+    ("PETR4.SA", B3), ("^BVSP", B3), ("AAPL", NYSE), ("BRK-B", NYSE), ("BTC-USD", CRYPTO), ("eth-brl", CRYPTO),
+    ("VOD.L", None), ("USDBRL=X", None), ("^GSPC", None), ("ES=F", None),
+])
+def test_for_symbol(ticker, calendar):
+    assert for_symbol(ticker) is calendar
@@ -0,0 +1,110 @@
+import sys
+from unittest.mock import patch
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from fastapi.testclient import TestClient
+
+from src.app import cli
+from src.app.dependencies import load_api_keys
+from src.app.main import app
+from src.export import MAX_EXPORT_TICKERS, _ChunkSink
+from src.series import DAY, Series
+
+AUTH = {"Authorization": "Bearer test-key"}
+T0 = 1_704_067_200  # 2024-01-01 UTC
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("API_KEY", "test-key")
+    load_api_keys()
+    return TestClient(app)
+
+
+@pytest.fixture
+def without_pyarrow(monkeypatch):
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    monkeypatch.setitem(sys.modules, "pyarrow.parquet", None)
+
+
+def _series(ticker, start, end):
+    if ticker == "EMPTY":
+        return Series.empty()
+    base = 100.0 if ticker == "AAA" else 10.0
+    return Series(T0 + np.arange(3, dtype=np.int64) * DAY, base + np.arange(3, dtype=np.float64))
+
+
+def test_chunk_sink_hands_out_written_bytes_once():
+    sink = _ChunkSink()
+    sink.write(b"PAR1")
+    sink.write(memoryview(b"data"))
+
+    assert sink.tell() == 8
+    assert sink.drain() == b"PAR1data"
+    assert sink.drain() == b""
+    assert sink.tell() == 8
+
+
+def test_export_without_pyarrow_is_501(client, without_pyarrow):
+    response = client.get("/export/prices", params={"tickers": "AAA", "start": "2024-01-01"}, headers=AUTH)
+
+    assert response.status_code == 501
+    assert "pyarrow" in response.json()["detail"]
+
+
+def test_cli_without_pyarrow_exits_with_error(tmp_path, without_pyarrow, capsys):
+    code = cli.main(["export", "--tickers", "AAA", "--start", "2024-01-01", "--out", str(tmp_path)])
+
+    assert code == 1
+    assert "pyarrow" in capsys.readouterr().err
+
+
+def test_export_rejects_too_many_tickers(client):
+    tickers = [f"T{i}" for i in range(MAX_EXPORT_TICKERS + 1)]
+
+    response = client.get("/export/prices", params={"tickers": tickers, "start": "2024-01-01"}, headers=AUTH)
+
+    assert response.status_code == 422
+
+
+def test_export_rejects_unknown_format(client):
+    response = client.get(
+        "/export/prices", params={"tickers": "AAA", "start": "2024-01-01", "format": "csv"}, headers=AUTH,
+    )
+
+    assert response.status_code == 422
+
+
+@patch("src.service._ticker_series", side_effect=_series)
+def test_arrow_export_has_one_batch_per_ticker(mock_series, client):
+    response = client.get(
+        "/export/prices",
+        params={"tickers": ["AAA", "EMPTY", "BBB", "AAA"], "start": "2024-01-01", "format": "arrow"},
+        headers=AUTH,
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == 'attachment; filename="prices.arrow"'
+    reader = pa.ipc.open_file(pa.BufferReader(response.content))
+    assert reader.num_record_batches == 2
+    table = reader.read_all()
+    assert table.column("ticker").to_pylist() == ["AAA"] * 3 + ["BBB"] * 3
+    assert table.column("close").to_pylist() == [100.0, 101.0, 102.0, 10.0, 11.0, 12.0]
+    assert mock_series.call_count == 3
+
+
+@patch("src.service._ticker_series", side_effect=_series)
+@patch("src.service._selic_series", return_value=Series(np.array([T0], np.int64), np.array([0.0452])))
+def test_cli_writes_parquet_row_groups(mock_selic, mock_series, tmp_path):
+    code = cli.main([
+        "export", "--tickers", "AAA", "BBB", "--start", "2024-01-01", "--selic", "--out", str(tmp_path),
+    ])
+
+    assert code == 0
+    prices = pq.ParquetFile(tmp_path / "prices.parquet")
+    assert prices.num_row_groups == 2
+    assert prices.read().num_rows == 6
+    assert pq.read_table(tmp_path / "selic.parquet").column("rate").to_pylist() == [0.0452]
@@ -0,0 +1,177 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src import jobs
+from src.app.dependencies import load_api_keys
+from src.app.main import app
+from src.jobs import DONE, FAILED, JobManager, JobQueueFullError, SelicJob, TickerJob
+from src.models import CompareResponse, MultiplierPoint, SelicResponse
+from src.scheduler import Upstream, UpstreamScheduler
+from src.service import MAX_ANALYTICS_TICKERS, MAX_COMPARE_COLUMNS
+
+AUTH = {"Authorization": "Bearer test-key"}
+SELIC_RESULT = SelicResponse(multipliers=[MultiplierPoint(datetime=datetime(2024, 1, 2), value=1.0004)])
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    # Threads instead of processes so patched service functions apply
+    manager = JobManager(tmp_path / "jobs", executor_factory=lambda: ThreadPoolExecutor(max_workers=2))
+    monkeypatch.setattr("src.app.jobs.manager", manager)
+    monkeypatch.setenv("API_KEY", "test-key")
+    load_api_keys()
+    return manager
+
+
+def _wait_until_finished(manager: JobManager, job_id: str) -> dict:
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        status = manager.status(job_id)
+        if status["status"] in (DONE, FAILED):
+            return status
+        time.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+def test_job_result_is_written_to_disk(manager):
+    with patch("src.service.fetch_selic", return_value=SELIC_RESULT) as mock_fn:
+        job = manager.submit("selic", SelicJob(start="2024-01-01", percentage=110))
+        status = _wait_until_finished(manager, job["id"])
+
+    assert status["status"] == DONE
+    assert mock_fn.call_args.kwargs["percentage"] == 110
+    result = json.loads(manager.result_path(job["id"]).read_text())
+    assert result["multipliers"][0]["value"] == 1.0004
+
+
+def test_failed_job_records_error(manager):
+    with patch("src.service.fetch_ticker", side_effect=RuntimeError("Yahoo down")):
+        job = manager.submit("ticker", TickerJob(ticker="AAPL", start="2024-01-01T00:00:00Z"))
+        status = _wait_until_finished(manager, job["id"])
+
+    assert status["status"] == FAILED
+    assert "Yahoo down" in status["error"]
+    assert manager.result_path(job["id"]) is None
+
+
+def test_finished_jobs_expire(manager):
+    with patch("src.service.fetch_selic", return_value=SELIC_RESULT):
+        job = manager.submit("selic", SelicJob(start="2024-01-01"))
+        _wait_until_finished(manager, job["id"])
+    manager.ttl = 0.0
+    time.sleep(0.01)
+
+    assert manager.status(job["id"]) is None
+    assert not (manager.root / job["id"]).exists()
+
+
+def test_pending_jobs_are_bounded(tmp_path):
+    manager = JobManager(tmp_path, max_pending=0, executor_factory=lambda: ThreadPoolExecutor(max_workers=1))
+
+    with pytest.raises(JobQueueFullError):
+        manager.submit("selic", SelicJob(start="2024-01-01"))
+
+
+def test_unknown_or_malformed_job_id(manager):
+    assert manager.status("0" * 32) is None
+    assert manager.status("../../etc") is None
+
+
+def test_default_executor_uses_processes():
+    executor = jobs._default_executor()
+    try:
+        assert executor._mp_context.get_start_method() == "spawn"
+        assert executor._initializer is jobs._init_worker
+    finally:
+        executor.shutdown()
+
+
+def test_workers_split_the_upstream_budget(monkeypatch):
+    scheduler = UpstreamScheduler()
+    yahoo = scheduler.register(Upstream("yahoo", rate=10.0, burst=20, max_concurrent=8))
+    monkeypatch.setattr("src.scheduler.scheduler", scheduler)
+
+    jobs._init_worker(2)
+
+    assert yahoo._bucket.rate == 10.0 * jobs.JOB_UPSTREAM_SHARE / 2
+    assert yahoo.max_concurrent == 2
+
+
+# ---------------------------------------------------------------------------
+# HTTP API
+# ---------------------------------------------------------------------------
+
+client = TestClient(app, raise_server_exceptions=False)
+
+
+def test_submit_poll_and_download(manager):
+    with patch("src.service.fetch_selic", return_value=SELIC_RESULT):
+        response = client.post("/jobs/selic", json={"start": "2024-01-01", "ir": True}, headers=AUTH)
+        assert response.status_code == 202
+        job_id = response.json()["id"]
+        _wait_until_finished(manager, job_id)
+
+    status = client.get(f"/jobs/{job_id}", headers=AUTH).json()
+    assert status["status"] == DONE
+    assert status["expires_at"] > status["finished_at"]
+
+    result = client.get(status["result_url"], headers=AUTH)
+    assert result.status_code == 200
+    assert result.json()["multipliers"][0]["value"] == 1.0004
+
+
+def test_result_of_running_job_returns_409(manager):
+    job = {"id": "a" * 32, "kind": "selic", "status": "running", "submitted_at": time.time()}
+    (manager.root / job["id"]).mkdir(parents=True)
+    (manager.root / job["id"] / "status.json").write_text(json.dumps(job))
+
+    assert client.get(f"/jobs/{job['id']}/result", headers=AUTH).status_code == 409
+
+
+def test_unknown_job_returns_404(manager):
+    assert client.get("/jobs/" + "0" * 32, headers=AUTH).status_code == 404
+
+
+def test_invalid_parameters_return_422(manager):
+    assert client.post("/jobs/ticker", json={"start": "2024-01-01"}, headers=AUTH).status_code == 422
+
+
+
+def test_compare_job_takes_the_same_params_as_the_endpoint(manager):
+    def compare(tickers, scenarios, start, end):
+        columns = tickers + [scenario.label for scenario in scenarios]
+        return CompareResponse(dates=[start.date()], columns=columns, values=[[1.0] for _ in columns])
+
+    params = {"start": "2024-01-01", "tickers": ["BTC-USD"], "selic": ["100", "110:ir"]}
+    with patch("src.app.routes.compare", side_effect=compare), patch("src.service.compare", side_effect=compare):
+        synchronous = client.get("/compare", params=params, headers=AUTH)
+        job_id = client.post("/jobs/compare", json=params, headers=AUTH).json()["id"]
+        _wait_until_finished(manager, job_id)
+
+    result = client.get(f"/jobs/{job_id}/result", headers=AUTH)
+    assert synchronous.json()["columns"] == ["BTC-USD", "SELIC 100%", "SELIC 110% IR"]
+    assert result.json() == synchronous.json()
+
+@pytest.mark.parametrize("path, body", [
+    ("/jobs/ticker", {"ticker": "BTC-USD", "start": "2024-01-01", "currency": "reais"}),
+    ("/jobs/analytics", {"tickers": ["BTC-USD"], "start": "2024-01-01", "windows": [0]}),
+    ("/jobs/analytics", {"tickers": ["BTC-USD"] * (MAX_ANALYTICS_TICKERS + 1), "start": "2024-01-01"}),
+    ("/jobs/compare", {"start": "2024-01-01"}),
+    ("/jobs/compare", {"start": "2024-01-01", "selic": ["110:xx"]}),
+    ("/jobs/compare", {"start": "2024-01-01", "tickers": ["BTC-USD"] * (MAX_COMPARE_COLUMNS + 1)}),
+])
+def test_submissions_are_validated_like_the_endpoints(manager, path, body):
+    response = client.post(path, json=body, headers=AUTH)
+
+    assert response.status_code == 422
+    assert not manager.root.exists()
+
+
+def test_jobs_require_token(manager):
+    assert client.post("/jobs/selic", json={"start": "2024-01-01"}).status_code == 403
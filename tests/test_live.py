@@ -0,0 +1,139 @@
+import asyncio
+import contextvars
+import json
+import threading
+from datetime import datetime
+
+import requests
+from fastapi.testclient import TestClient
+
+from benchmarks.run import ApiServer
+from src.app.dependencies import load_api_keys
+from src.app.main import app
+from src.live import PriceHub
+from src.models import TickerPriceResponse
+from src.scheduler import BACKGROUND, INTERACTIVE, current_priority
+
+
+def _price(ticker: str, price: float) -> TickerPriceResponse:
+    return TickerPriceResponse(ticker=ticker, datetime=datetime(2024, 1, 2, 15), price=price)
+
+
+class FakeUpstream:
+    def __init__(self):
+        self.calls: list[list[str]] = []
+        self.prices = {"AAPL": 190.0, "BTC-USD": 42_000.0, "PETR4.SA": 38.0}
+        self.lock = threading.Lock()
+
+    def __call__(self, tickers: list[str]) -> dict[str, TickerPriceResponse]:
+        with self.lock:
+            self.calls.append(tickers)
+            return {t: _price(t, self.prices[t]) for t in tickers if t in self.prices}
+
+
+def test_one_batched_poll_serves_every_subscriber():
+    upstream = FakeUpstream()
+    hub = PriceHub(fetch=upstream, interval=0.01)
+
+    async def scenario():
+        first = hub.subscribe(["AAPL", "BTC-USD"])
+        second = hub.subscribe(["AAPL"])
+        updates = [await first.next(1), await first.next(1), await second.next(1)]
+        hub.unsubscribe(first)
+        hub.unsubscribe(second)
+        return updates
+
+    updates = asyncio.run(scenario())
+
+    assert {u.ticker for u in updates[:2]} == {"AAPL", "BTC-USD"}
+    assert updates[2].ticker == "AAPL"
+    # Every poll asks for the union of subscriptions once, however many subscribers share a ticker
+    assert all(sorted(call) == call and len(set(call)) == len(call) for call in upstream.calls)
+
+
+def test_only_changed_prices_are_pushed():
+    upstream = FakeUpstream()
+    hub = PriceHub(fetch=upstream, interval=0.01)
+
+    async def scenario():
+        subscription = hub.subscribe(["AAPL"])
+        first = await subscription.next(1)
+        # Unchanged price over several polls: nothing new
+        quiet = await subscription.next(0.05)
+        upstream.prices["AAPL"] = 191.0
+        changed = await subscription.next(1)
+        hub.unsubscribe(subscription)
+        return first, quiet, changed
+
+    first, quiet, changed = asyncio.run(scenario())
+
+    assert first.price == 190.0
+    assert quiet is None
+    assert changed.price == 191.0
+
+
+def test_poller_stops_without_subscribers():
+    upstream = FakeUpstream()
+    hub = PriceHub(fetch=upstream, interval=0.01)
+
+    async def scenario():
+        subscription = hub.subscribe(["AAPL"])
+        await subscription.next(1)
+        hub.unsubscribe(subscription)
+        await asyncio.sleep(0.05)
+        return hub._task.done()
+
+    assert asyncio.run(scenario())
+
+
+
+def test_poller_runs_in_a_clean_background_context():
+    request_state = contextvars.ContextVar("request_state", default=None)
+    seen = []
+
+    def fetch(tickers):
+        seen.append((current_priority(), request_state.get()))
+        return {}
+
+    hub = PriceHub(fetch=fetch, interval=0.01)
+
+    async def scenario():
+        request_state.set("first subscriber")
+        subscription = hub.subscribe(["AAPL"])
+        while not seen:
+            await asyncio.sleep(0.01)
+        hub.unsubscribe(subscription)
+        return current_priority()
+
+    assert asyncio.run(scenario()) == INTERACTIVE
+    assert seen[0] == (BACKGROUND, None)
+
+def test_stream_endpoint_sends_price_events(monkeypatch):
+    # TestClient buffers whole responses, so an endless stream needs a real server
+    monkeypatch.setenv("API_KEY", "test-key")
+    load_api_keys()
+    monkeypatch.setattr("src.app.live.hub", PriceHub(fetch=FakeUpstream(), interval=0.01))
+    monkeypatch.setattr("src.app.live.KEEPALIVE_INTERVAL", 0.05)
+    server = ApiServer().start()
+    try:
+        with requests.get(
+            f"{server.url}/ticker/price/stream",
+            params={"tickers": ["PETR4.SA"]},
+            headers={"Authorization": "Bearer test-key"},
+            stream=True,
+            timeout=5,
+        ) as response:
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/event-stream")
+            lines = response.iter_lines(decode_unicode=True)
+            assert next(lines) == "event: price"
+            data = json.loads(next(lines).removeprefix("data: "))
+    finally:
+        server.stop()
+
+    assert data["ticker"] == "PETR4.SA"
+    assert data["price"] == 38.0
+
+
+def test_stream_requires_token():
+    assert TestClient(app).get("/ticker/price/stream", params={"tickers": ["AAPL"]}).status_code == 403
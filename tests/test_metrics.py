@@ -0,0 +1,70 @@
+import pytest
+
+from src.metrics import Counter, Gauge, Histogram, Registry, track_upstream, UPSTREAM_ERRORS, UPSTREAM_LATENCY
+
+
+def test_counter_increments_per_label():
+    counter = Counter("c_total", "help", ("cache",))
+
+    counter.inc(cache="a")
+    counter.inc(2, cache="a")
+    counter.inc(cache="b")
+
+    assert counter.value(cache="a") == 3
+    assert counter.value(cache="b") == 1
+
+
+def test_histogram_renders_cumulative_buckets():
+    hist = Histogram("h_seconds", "help", ("route",), buckets=(0.1, 1.0))
+
+    hist.observe(0.05, route="/x")
+    hist.observe(0.5, route="/x")
+    hist.observe(5.0, route="/x")
+    lines = hist.render()
+
+    assert 'h_seconds_bucket{route="/x",le="0.1"} 1' in lines
+    assert 'h_seconds_bucket{route="/x",le="1.0"} 2' in lines
+    assert 'h_seconds_bucket{route="/x",le="+Inf"} 3' in lines
+    assert 'h_seconds_count{route="/x"} 3' in lines
+
+
+def test_gauge_function_is_evaluated_on_render():
+    gauge = Gauge("g", "help")
+    gauge.set_function(lambda: 7)
+
+    assert gauge.render() == ["g 7.0"]
+
+
+def test_registry_renders_help_and_type():
+    registry = Registry()
+    registry.register(Counter("c_total", "Things counted."))
+
+    text = registry.render()
+
+    assert "# HELP c_total Things counted." in text
+    assert "# TYPE c_total counter" in text
+
+
+def test_track_upstream_records_latency_and_errors():
+    before = UPSTREAM_LATENCY.count(upstream="test_upstream")
+
+    with pytest.raises(ValueError):
+        with track_upstream("test_upstream"):
+            raise ValueError("boom")
+
+    assert UPSTREAM_LATENCY.count(upstream="test_upstream") == before + 1
+    assert UPSTREAM_ERRORS.value(upstream="test_upstream", error="ValueError") >= 1
+
+
+def test_track_upstream_counts_error_status_once():
+    before = UPSTREAM_ERRORS.value(upstream="status_upstream", error="http_503")
+
+    with track_upstream("status_upstream") as call:
+        call.status(200)
+    with pytest.raises(RuntimeError):
+        with track_upstream("status_upstream") as call:
+            call.status(503)
+            raise RuntimeError("raised for the status")
+
+    assert UPSTREAM_ERRORS.value(upstream="status_upstream", error="http_503") == before + 1
+    assert UPSTREAM_ERRORS.value(upstream="status_upstream", error="RuntimeError") == 0
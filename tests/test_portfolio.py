@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+from src import portfolio
+from src.series import DAY
+
+
+def test_calendar_is_inclusive():
+    assert portfolio.calendar(0, 2 * DAY).tolist() == [0, DAY, 2 * DAY]
+
+
+def test_cumulative_scatters_and_accumulates():
+    positions = portfolio.cumulative(2, 4, np.array([0, 1, 0]), np.array([0, 1, 2]), np.array([10.0, 3.0, -4.0]))
+
+    assert positions.tolist() == [[10.0, 10.0, 6.0, 6.0], [0.0, 3.0, 3.0, 3.0]]
+
+
+def test_time_weighted_return_ignores_flows():
+    # 100 in, +10%, then another 100 in, then +10%
+    values = np.array([100.0, 110.0, 210.0, 231.0])
+    flows = np.array([100.0, 0.0, 100.0, 0.0])
+
+    twr = portfolio.time_weighted_return(values, flows)
+
+    assert twr.tolist() == pytest.approx([0.0, 0.1, 0.1, 0.21])
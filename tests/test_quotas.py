@@ -0,0 +1,191 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.app.dependencies import is_valid_api_key, load_api_keys, lookup_api_key
+from src.app.main import app
+from src.models import SelicResponse, TickerSearchResponse
+from src.series import Series
+from src.quotas import ApiKey, FairQueue, QuotaExceededError, RateLimiter, SlidingWindow, parse_keys
+
+SELIC_PARAMS = {"start": "2024-01-01"}
+EMPTY_SELIC = SelicResponse(multipliers=[])
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.delenv("API_KEY", raising=False)
+    monkeypatch.setenv("API_KEYS", "web:web-key:2:4,nightly:nightly-key")
+    load_api_keys()
+    return TestClient(app)
+
+
+def test_parse_keys():
+    table = parse_keys("legacy", "web:k1:600:4, nightly:k2")
+
+    keys = sorted(table.values(), key=lambda key: key.name)
+    assert [(k.name, k.rate_limit, k.weight) for k in keys] == [
+        ("default", 0, 1.0), ("nightly", 120, 1.0), ("web", 600, 4.0),
+    ]
+
+
+@pytest.mark.parametrize("entry", ["web", "web:", "web:k1:1:2:3", "web:k1:-1", "web:k1:10:0"])
+def test_parse_keys_rejects_malformed_entries(entry):
+    with pytest.raises(ValueError):
+        parse_keys(None, entry)
+
+
+def test_keys_are_read_from_the_environment_once(monkeypatch):
+    monkeypatch.setenv("API_KEY", "one")
+    monkeypatch.setenv("API_KEYS", "web:two")
+    load_api_keys()
+
+    assert lookup_api_key("two").name == "web"
+    assert is_valid_api_key("one")
+    assert not is_valid_api_key("three")
+
+    monkeypatch.delenv("API_KEYS")
+    assert is_valid_api_key("two")
+    load_api_keys()
+    assert not is_valid_api_key("two")
+
+
+def test_malformed_keys_fail_at_load(monkeypatch):
+    monkeypatch.setenv("API_KEYS", "web:k1:lots")
+
+    with pytest.raises(ValueError):
+        load_api_keys()
+
+
+def test_sliding_window():
+    window = SlidingWindow(limit=2, window=10.0)
+
+    assert window.try_acquire(now=0.0) == 0.0
+    assert window.try_acquire(now=4.0) == 0.0
+    assert window.try_acquire(now=6.0) == pytest.approx(4.0)
+    # The request at t=0 has left the window; the refused one was not counted
+    assert window.try_acquire(now=10.0) == 0.0
+    assert window.try_acquire(now=11.0) == pytest.approx(3.0)
+
+
+def test_rate_limiter_is_per_key():
+    limiter = RateLimiter(window=60.0)
+    web, nightly = ApiKey("web", rate_limit=1), ApiKey("nightly", rate_limit=1)
+
+    limiter.check(web)
+    limiter.check(nightly)
+    with pytest.raises(QuotaExceededError) as exc_info:
+        limiter.check(web)
+    assert 0 < exc_info.value.retry_after <= 60.0
+
+
+def test_unlimited_key_is_never_refused():
+    limiter = RateLimiter()
+    for _ in range(1_000):
+        limiter.check(ApiKey("default", rate_limit=0))
+
+
+def test_fair_queue_serves_keys_by_weight():
+    queue = FairQueue(slots=1)
+    batch, interactive = ApiKey("batch", weight=1), ApiKey("interactive", weight=4)
+    order = []
+
+    async def request(key: ApiKey):
+        await queue.acquire(key)
+        order.append(key.name)
+        await asyncio.sleep(0)
+        queue.release()
+
+    async def main():
+        await queue.acquire(batch)  # holds the only slot while the rest queue up
+        tasks = [asyncio.create_task(request(batch)) for _ in range(4)]
+        await asyncio.sleep(0)
+        tasks += [asyncio.create_task(request(interactive)) for _ in range(4)]
+        await asyncio.sleep(0)
+        queue.release()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+
+    # The batch key queued first, but each interactive request costs a quarter of a batch one
+    assert order == ["interactive"] * 3 + ["batch", "interactive"] + ["batch"] * 3
+    assert queue.active == 0
+
+
+def test_fair_queue_refuses_past_per_key_limit():
+    queue = FairQueue(slots=1, max_queued_per_key=1)
+    key = ApiKey("batch")
+
+    async def main():
+        await queue.acquire(key)
+        waiting = asyncio.create_task(queue.acquire(key))
+        await asyncio.sleep(0)
+        with pytest.raises(QuotaExceededError):
+            await queue.acquire(key)
+        # Another key may still queue
+        other = asyncio.create_task(queue.acquire(ApiKey("web")))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        other.cancel()
+        await asyncio.gather(waiting, other, return_exceptions=True)
+        queue.release()
+
+    asyncio.run(main())
+
+    assert queue.active == 0
+    assert queue.queue_depth == 0
+
+
+@patch("src.app.routes.fetch_selic", return_value=EMPTY_SELIC)
+def test_key_over_its_limit_gets_429(mock_fetch, client):
+    headers = {"Authorization": "Bearer web-key"}
+
+    statuses = [client.get("/selic", params=SELIC_PARAMS, headers=headers).status_code for _ in range(3)]
+    other = client.get("/selic", params=SELIC_PARAMS, headers={"Authorization": "Bearer nightly-key"})
+    refused = client.get("/selic", params=SELIC_PARAMS, headers=headers)
+
+    assert statuses == [200, 200, 429]
+    assert other.status_code == 200
+    assert 1 <= int(refused.headers["Retry-After"]) <= 60
+    assert mock_fetch.call_count == 3
+
+
+@patch("src.app.routes.search_tickers", return_value=TickerSearchResponse(results=[]))
+def test_cheap_endpoints_are_not_metered(mock_search, client):
+    headers = {"Authorization": "Bearer web-key"}
+
+    statuses = [client.get("/tickers/search", params={"q": "bitcoin"}, headers=headers).status_code for _ in range(4)]
+
+    assert statuses == [200] * 4
+
+
+@patch("src.service._ticker_series", return_value=Series.empty())
+def test_export_counts_one_request_per_ticker(mock_series, client):
+    headers = {"Authorization": "Bearer web-key"}
+    params = {"tickers": ["AAA", "BBB", "CCC"], "start": "2024-01-01"}
+
+    response = client.get("/export/prices", params=params, headers=headers)
+
+    assert response.status_code == 429
+    mock_series.assert_not_called()
+
+
+@patch("src.app.jobs.manager")
+def test_job_submissions_are_metered_and_polls_are_not(mock_manager, client):
+    headers = {"Authorization": "Bearer web-key"}
+    mock_manager.submit.return_value = {"id": "0" * 32, "kind": "selic", "status": "queued", "submitted_at": 0.0}
+    mock_manager.status.return_value = None
+
+    statuses = [client.post("/jobs/selic", json=SELIC_PARAMS, headers=headers).status_code for _ in range(3)]
+    polls = [client.get("/jobs/" + "0" * 32, headers=headers).status_code for _ in range(3)]
+
+    assert statuses == [202, 202, 429]
+    assert polls == [404] * 3
+
+
+def test_unknown_key_is_401(client):
+    response = client.get("/selic", params=SELIC_PARAMS, headers={"Authorization": "Bearer nope"})
+
+    assert response.status_code == 401
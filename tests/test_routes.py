@@ -1,14 +1,18 @@
 import os
+import time
+import pandas as pd
 import pytest
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 from unittest.mock import patch
 
 from fastapi.testclient import TestClient
 
+from src.app.dependencies import load_api_keys
 from src.app.main import app
+from src.scheduler import CircuitOpenError
 from src.models import (
     PricePoint, MultiplierPoint, TickerResponse, TickerSearchResult, TickerSearchResponse, SelicResponse,
-    TickerPriceResponse,
+    TickerPriceResponse, CompareResponse, AnalyticsResponse, PortfolioResponse,
 )
 
 MOCK_PRICES_RESPONSE = TickerResponse(
@@ -39,6 +43,7 @@ TICKER_PARAMS = {"ticker": "BTC-USD", "start": "2024-01-01T00:00:00Z"}
 @pytest.fixture(autouse=True)
 def set_api_key(monkeypatch):
     monkeypatch.setenv("API_KEY", VALID_TOKEN)
+    load_api_keys()
 
 
 def test_valid_token_returns_200():
@@ -312,3 +317,186 @@ def test_ticker_price_service_error_returns_500():
     with patch("src.app.routes.fetch_last_price", side_effect=RuntimeError("yfinance down")):
         response = client.get("/ticker/price", params=PRICE_PARAMS, headers=AUTH)
     assert response.status_code == 500
+
+
+# ---------------------------------------------------------------------------
+# GET /metrics
+# ---------------------------------------------------------------------------
+
+
+def test_metrics_requires_token():
+    response = client.get("/metrics")
+    assert response.status_code == 403
+
+
+def test_metrics_exposes_route_latency_histogram():
+    with patch("src.app.routes.fetch_ticker", return_value=MOCK_RESPONSE):
+        client.get("/ticker", params=TICKER_PARAMS, headers=AUTH)
+    response = client.get("/metrics", headers=AUTH)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'http_request_duration_seconds_count{method="GET",route="/ticker",status="200"}' in response.text
+    assert "threadpool_threads_total" in response.text
+
+
+def test_metrics_counts_upstream_errors():
+    with patch("src.service.yf.Ticker", side_effect=RuntimeError("yfinance down")):
+        client.get("/ticker", params=TICKER_PARAMS, headers=AUTH)
+    response = client.get("/metrics", headers=AUTH)
+    assert 'upstream_errors_total{upstream="yfinance_history",error="RuntimeError"}' in response.text
+
+
+# ---------------------------------------------------------------------------
+# Server-Timing and profiling
+# ---------------------------------------------------------------------------
+
+
+def _history_df():
+    index = pd.date_range("2024-01-01", periods=3, freq="1D", tz="UTC")
+    return pd.DataFrame({"Close": [1.0, 2.0, 3.0]}, index=index)
+
+
+def test_server_timing_reports_stages():
+    with patch("src.service.yf.Ticker") as mock_ticker_cls:
+        mock_ticker_cls.return_value.history.return_value = _history_df()
+        response = client.get("/ticker", params=TICKER_PARAMS, headers=AUTH)
+    assert response.status_code == 200
+    stages = [part.split(";")[0].strip() for part in response.headers["Server-Timing"].split(",")]
+    for name in ("fetch", "convert", "multipliers", "serialize", "total"):
+        assert name in stages
+
+
+def test_profile_text_returns_report():
+    with patch("src.app.routes.fetch_ticker", return_value=MOCK_RESPONSE):
+        response = client.get("/ticker", params=TICKER_PARAMS, headers={**AUTH, "X-Profile": "text"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "function calls" in response.text
+
+
+def test_profile_file_is_saved(monkeypatch, tmp_path):
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path))
+    with patch("src.app.routes.fetch_ticker", return_value=MOCK_RESPONSE):
+        response = client.get("/ticker", params=TICKER_PARAMS, headers={**AUTH, "X-Profile": "1"})
+    assert response.status_code == 200
+    assert response.json()["prices"]
+    assert response.headers["X-Profile-File"].startswith(str(tmp_path))
+    assert list(tmp_path.glob("*.prof"))
+
+
+def test_profile_ignored_without_valid_token():
+    response = client.get(
+        "/ticker", params=TICKER_PARAMS, headers={"Authorization": "Bearer wrong-key", "X-Profile": "text"}
+    )
+    assert response.status_code == 401
+    assert "X-Profile-File" not in response.headers
+
+
+# ---------------------------------------------------------------------------
+# Stale-while-revalidate and circuit breaker
+# ---------------------------------------------------------------------------
+
+
+def test_stale_history_is_served_with_header():
+    with patch("src.service._range_ttl", return_value=0.0):
+        with patch("src.service.yf.Ticker") as mock_ticker_cls:
+            mock_ticker_cls.return_value.history.return_value = _history_df()
+            first = client.get("/ticker", params=TICKER_PARAMS, headers=AUTH)
+        with patch("src.service.yf.Ticker", side_effect=RuntimeError("yfinance down")) as failing:
+            second = client.get("/ticker", params=TICKER_PARAMS, headers=AUTH)
+            # Let the background refresh hit the failing mock rather than the network
+            deadline = time.monotonic() + 2.0
+            while not failing.called and time.monotonic() < deadline:
+                time.sleep(0.005)
+
+    assert "X-Data-Stale" not in first.headers
+    assert second.status_code == 200
+    assert second.headers["X-Data-Stale"] == "true"
+    assert second.json() == first.json()
+
+
+def test_open_circuit_returns_503():
+    with patch("src.app.routes.fetch_ticker", side_effect=CircuitOpenError("yahoo", 12.0)):
+        response = client.get("/ticker", params=TICKER_PARAMS, headers=AUTH)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "12"
+
+
+# ---------------------------------------------------------------------------
+# GET /compare
+# ---------------------------------------------------------------------------
+
+MOCK_COMPARE_RESPONSE = CompareResponse(
+    dates=[date(2024, 1, 2), date(2024, 1, 3)],
+    columns=["BTC-USD", "SELIC 100%"],
+    values=[[1.0, 1.03], [1.0, 1.0004]],
+)
+
+
+def test_compare_returns_columnar_matrix():
+    with patch("src.app.routes.compare", return_value=MOCK_COMPARE_RESPONSE) as mock_fn:
+        response = client.get(
+            "/compare", params={"start": "2024-01-01", "tickers": ["BTC-USD"], "selic": ["100", "110:ir"]}, headers=AUTH
+        )
+    assert response.status_code == 200
+    assert response.json()["columns"] == ["BTC-USD", "SELIC 100%"]
+    tickers, scenarios, _, _ = mock_fn.call_args.args
+    assert tickers == ["BTC-USD"]
+    assert [(s.percentage, s.ir) for s in scenarios] == [(100.0, False), (110.0, True)]
+
+
+def test_compare_invalid_scenario_returns_422():
+    response = client.get("/compare", params={"start": "2024-01-01", "selic": ["lots"]}, headers=AUTH)
+    assert response.status_code == 422
+
+
+def test_compare_nothing_to_compare_returns_422():
+    response = client.get("/compare", params={"start": "2024-01-01"}, headers=AUTH)
+    assert response.status_code == 422
+
+
+def test_compare_missing_data_returns_404():
+    with patch("src.app.routes.compare", side_effect=ValueError("No price data found for ticker 'NOPE'")):
+        response = client.get("/compare", params={"start": "2024-01-01", "tickers": ["NOPE"]}, headers=AUTH)
+    assert response.status_code == 404
+
+
+def test_ticker_passes_currency():
+    with patch("src.app.routes.fetch_ticker", return_value=MOCK_RESPONSE) as mock_fn:
+        response = client.get("/ticker", params={**TICKER_PARAMS, "currency": "BRL"}, headers=AUTH)
+    assert response.status_code == 200
+    assert mock_fn.call_args.args[3] == "BRL"
+
+
+def test_ticker_invalid_currency_returns_422():
+    response = client.get("/ticker", params={**TICKER_PARAMS, "currency": "reais"}, headers=AUTH)
+    assert response.status_code == 422
+
+
+def test_analytics_passes_windows():
+    with patch("src.app.routes.analyze", return_value=AnalyticsResponse(risk_free=0.1, tickers=[])) as mock_fn:
+        response = client.get(
+            "/analytics", params={"tickers": ["AAPL"], "start": "2020-01-01", "windows": [30, 90]}, headers=AUTH
+        )
+    assert response.status_code == 200
+    assert mock_fn.call_args.args[3] == [30, 90]
+
+
+def test_analytics_invalid_window_returns_422():
+    response = client.get("/analytics", params={"tickers": ["AAPL"], "start": "2020-01-01", "windows": [0]}, headers=AUTH)
+    assert response.status_code == 422
+
+
+def test_portfolio_valuation_returns_200():
+    mock = PortfolioResponse(currency="BRL", dates=[date(2024, 1, 2)], value=[100.0], invested=[100.0], twr=[0.0])
+    body = {"events": [{"event_type": "buy", "date": "2024-01-02", "ticker": "PETR4.SA", "quantity": 1, "asset_unit_price": 100}]}
+    with patch("src.app.routes.value_portfolio", return_value=mock) as mock_fn:
+        response = client.post("/portfolio/valuation", json=body, headers=AUTH)
+    assert response.status_code == 200
+    assert response.json()["value"] == [100.0]
+    assert mock_fn.call_args.args[1] == "BRL"
+
+
+def test_portfolio_valuation_without_events_returns_422():
+    response = client.post("/portfolio/valuation", json={"events": []}, headers=AUTH)
+    assert response.status_code == 422
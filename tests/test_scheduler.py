@@ -0,0 +1,181 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+from yfinance.exceptions import YFRateLimitError
+
+from src.scheduler import (
+    BACKGROUND, CLOSED, HALF_OPEN, INTERACTIVE, OPEN, CircuitBreaker, CircuitOpenError, TokenBucket, Upstream,
+    UpstreamScheduler, is_throttled, priority,
+)
+
+
+def _http_error(status: int) -> requests.HTTPError:
+    response = MagicMock()
+    response.status_code = status
+    response.headers = {}
+    return requests.HTTPError(response=response)
+
+
+def test_token_bucket_allows_burst_then_waits():
+    bucket = TokenBucket(rate=10.0, capacity=2)
+    now = time.monotonic()
+
+    assert bucket.try_acquire(now) == 0.0
+    assert bucket.try_acquire(now) == 0.0
+    assert bucket.try_acquire(now) == pytest.approx(0.1, abs=0.01)
+
+
+def test_token_bucket_refills_over_time():
+    bucket = TokenBucket(rate=10.0, capacity=1)
+    now = time.monotonic()
+    bucket.try_acquire(now)
+
+    assert bucket.try_acquire(now + 0.2) == 0.0
+
+
+def test_is_throttled():
+    assert is_throttled(YFRateLimitError())
+    assert is_throttled(_http_error(429))
+    assert not is_throttled(_http_error(500))
+    assert not is_throttled(RuntimeError("boom"))
+
+
+def test_run_returns_result():
+    upstream = Upstream("test", rate=100.0, burst=10, max_concurrent=2)
+
+    assert upstream.run(lambda x: x * 2, 21) == 42
+    assert upstream.in_flight == 0
+
+
+def test_run_limits_concurrency():
+    upstream = Upstream("test", rate=1000.0, burst=100, max_concurrent=2)
+    active, peak = 0, 0
+    lock = threading.Lock()
+
+    def work():
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.02)
+        with lock:
+            active -= 1
+
+    threads = [threading.Thread(target=upstream.run, args=(work,)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert peak == 2
+
+
+
+def test_scale_shrinks_the_budget():
+    scheduler = UpstreamScheduler()
+    yahoo = scheduler.register(Upstream("yahoo", rate=10.0, burst=20, max_concurrent=8))
+    bcb = scheduler.register(Upstream("bcb", rate=2.0, burst=4, max_concurrent=2))
+
+    scheduler.scale(0.25)
+
+    assert (yahoo._bucket.rate, yahoo._bucket.capacity, yahoo.max_concurrent) == (2.5, 5.0, 2)
+    # Never scaled below one call at a time
+    assert (bcb._bucket.rate, bcb._bucket.capacity, bcb.max_concurrent) == (0.5, 1.0, 1)
+
+def test_interactive_calls_run_before_background():
+    upstream = Upstream("test", rate=1000.0, burst=100, max_concurrent=1)
+    order = []
+    gate = threading.Event()
+
+    def blocker():
+        gate.wait()
+
+    def queued(name: str, level: int):
+        with priority(level):
+            upstream.run(order.append, name)
+
+    first = threading.Thread(target=upstream.run, args=(blocker,))
+    first.start()
+    time.sleep(0.02)
+    background = threading.Thread(target=queued, args=("background", BACKGROUND))
+    background.start()
+    time.sleep(0.02)
+    interactive = threading.Thread(target=queued, args=("interactive", INTERACTIVE))
+    interactive.start()
+    time.sleep(0.02)
+    assert upstream.queue_depth == 2
+
+    gate.set()
+    for t in (first, background, interactive):
+        t.join()
+
+    assert order == ["interactive", "background"]
+
+
+def test_throttled_call_is_retried_with_backoff():
+    upstream = Upstream("test", rate=1000.0, burst=100, max_concurrent=1, backoff_base=0.01)
+    fn = MagicMock(side_effect=[YFRateLimitError(), "ok"])
+
+    assert upstream.run(fn) == "ok"
+    assert fn.call_count == 2
+
+
+def test_throttled_call_gives_up_after_max_retries():
+    upstream = Upstream("test", rate=1000.0, burst=100, max_concurrent=1, max_retries=1, backoff_base=0.01)
+    fn = MagicMock(side_effect=YFRateLimitError())
+
+    with pytest.raises(YFRateLimitError):
+        upstream.run(fn)
+    assert fn.call_count == 2
+
+
+def test_other_errors_are_not_retried():
+    upstream = Upstream("test", rate=1000.0, burst=100, max_concurrent=1)
+    fn = MagicMock(side_effect=RuntimeError("down"))
+
+    with pytest.raises(RuntimeError):
+        upstream.run(fn)
+    assert fn.call_count == 1
+    assert upstream.in_flight == 0
+
+
+# ---------------------------------------------------------------------------
+# Circuit breaker
+# ---------------------------------------------------------------------------
+
+def test_breaker_opens_after_threshold_and_fails_fast():
+    upstream = Upstream("test", rate=1000.0, burst=100, max_concurrent=1,
+                        breaker=CircuitBreaker("test", failure_threshold=2, reset_timeout=60))
+    fn = MagicMock(side_effect=RuntimeError("down"))
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            upstream.run(fn)
+    with pytest.raises(CircuitOpenError):
+        upstream.run(fn)
+
+    assert fn.call_count == 2
+
+
+def test_breaker_half_open_trial_closes_on_success():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    assert breaker.state in (OPEN, HALF_OPEN)
+
+    time.sleep(0.02)
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == CLOSED
+
+
+def test_breaker_half_open_trial_reopens_on_failure():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+
+    with pytest.raises(RuntimeError):
+        breaker.call(MagicMock(side_effect=RuntimeError("still down")))
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: "ok")
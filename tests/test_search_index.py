@@ -0,0 +1,48 @@
+from src.models import TickerSearchResult
+from src.search_index import DEFAULT_LISTING, PrefixIndex
+
+
+def _result(symbol: str, name: str) -> TickerSearchResult:
+    return TickerSearchResult(symbol=symbol, name=name, type="EQUITY", exchange="NASDAQ")
+
+
+def test_matches_symbol_and_name_words():
+    index = PrefixIndex()
+    index.add([_result("AAPL", "Apple Inc."), _result("MSFT", "Microsoft Corporation")])
+
+    assert [r.symbol for r in index.search("aa", 10)] == ["AAPL"]
+    assert [r.symbol for r in index.search("apple", 10)] == ["AAPL"]
+    assert [r.symbol for r in index.search("corp", 10)] == ["MSFT"]
+
+
+def test_symbol_matches_rank_before_name_matches():
+    index = PrefixIndex()
+    index.add([_result("XYZ", "Vale Holdings"), _result("VALE3.SA", "Vale S.A."), _result("VALE", "Vale S.A.")])
+
+    assert [r.symbol for r in index.search("vale", 10)] == ["VALE", "VALE3.SA", "XYZ"]
+
+
+def test_limit_and_no_duplicates():
+    index = PrefixIndex()
+    index.add([_result("BTC-USD", "Bitcoin USD"), _result("BTC-USD", "Bitcoin USD"), _result("BTC-BRL", "Bitcoin BRL")])
+
+    assert len(index) == 2
+    assert len(index.search("b", 1)) == 1
+
+
+def test_knows_symbol_prefixes_and_searched_queries():
+    index = PrefixIndex()
+    index.add([_result("CMIG4.SA", "Cia Energetica de Minas Gerais")])
+
+    assert index.knows("cm")
+    # A name word is not enough: Yahoo may have a symbol that starts with it
+    assert not index.knows("ge")
+    index.mark_searched("GE")
+    assert index.knows("ge")
+
+
+def test_bundled_listing_is_loaded():
+    index = PrefixIndex.from_listing(DEFAULT_LISTING)
+
+    assert len(index) > 50
+    assert index.search("petr4", 5)[0].symbol == "PETR4.SA"
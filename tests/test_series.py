@@ -0,0 +1,65 @@
+from datetime import datetime
+
+import numpy as np
+
+from src.series import OVERHEAD_BYTES, Series, align_daily, rebase
+
+
+def _series(n: int) -> Series:
+    epochs = np.arange(n, dtype=np.int64) * 86_400 + 1_704_067_200  # daily from 2024-01-01
+    return Series(epochs, np.arange(n, dtype=np.float64))
+
+
+def test_between_is_a_view():
+    series = _series(10)
+
+    window = series.between(series.epochs[2], series.epochs[5])
+
+    assert window.values.tolist() == [2.0, 3.0, 4.0]
+    assert np.shares_memory(window.values, series.values)
+    assert np.shares_memory(window.epochs, series.epochs)
+
+
+def test_between_outside_range_is_empty():
+    assert len(_series(5).between(0, 1_000)) == 0
+
+
+def test_nbytes_is_sixteen_per_point_plus_overhead():
+    assert _series(1_000).nbytes == 16_000 + OVERHEAD_BYTES
+
+
+def test_datetimes_are_naive_utc():
+    assert _series(2).datetimes() == [datetime(2024, 1, 1), datetime(2024, 1, 2)]
+
+
+def test_has_no_instance_dict():
+    assert not hasattr(_series(1), "__dict__")
+
+
+def test_align_daily_forward_fills_on_union_calendar():
+    day = 86_400
+    crypto = Series(np.array([0, 1, 2, 3]) * day, np.array([10.0, 11.0, 12.0, 13.0]))
+    stock = Series(np.array([1, 3]) * day + 3_600, np.array([100.0, 110.0]))
+
+    days, matrix = align_daily([crypto, stock])
+
+    assert days.tolist() == [0, day, 2 * day, 3 * day]
+    assert matrix[0].tolist() == [10.0, 11.0, 12.0, 13.0]
+    assert np.isnan(matrix[1, 0])
+    assert matrix[1, 1:].tolist() == [100.0, 100.0, 110.0]
+
+
+def test_rebase_starts_at_first_complete_column():
+    matrix = np.array([[10.0, 11.0, 22.0], [np.nan, 5.0, 10.0]])
+
+    first, rebased = rebase(matrix)
+
+    assert first == 1
+    assert rebased.tolist() == [[1.0, 2.0], [1.0, 2.0]]
+
+
+def test_rebase_without_overlap_is_empty():
+    first, rebased = rebase(np.array([[1.0, np.nan], [np.nan, 1.0]]))
+
+    assert first == -1
+    assert rebased.shape == (2, 0)
@@ -1,8 +1,13 @@
 import pandas as pd
 import pytest
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 from unittest.mock import MagicMock, patch
 
+import yfinance as yf
+from yfinance.exceptions import YFPricesMissingError, YFTzMissingError
+
+from src import service
+from src.models import PortfolioEvent, SelicScenario
 from src.service import fetch_ticker, search_tickers, fetch_last_price
 
 def _make_df(closes: list[float], start_iso: str = "2024-01-01 10:00:00+00:00") -> pd.DataFrame:
@@ -252,3 +257,459 @@ def test_fetch_last_price_raises_on_empty_df(mock_ticker_cls):
 
     with pytest.raises(ValueError, match="No price data found for ticker 'UNKNOWN' on 2024-01-03"):
         fetch_last_price("UNKNOWN", datetime(2024, 1, 3, tzinfo=timezone.utc))
+
+
+# ---------------------------------------------------------------------------
+# search_tickers — cache and local prefix index
+# ---------------------------------------------------------------------------
+
+@patch("src.service.yf.Search")
+def test_search_short_prefix_is_answered_locally(mock_search_cls):
+    result = search_tickers("pe")
+
+    mock_search_cls.assert_not_called()
+    assert "PETR4.SA" in [r.symbol for r in result.results]
+
+
+@patch("src.service.yf.Search")
+def test_search_new_short_prefix_goes_to_yahoo_once(mock_search_cls):
+    mock_search_cls.return_value = _make_search_mock([
+        {"symbol": "F", "longname": "Ford Motor Company", "quoteType": "EQUITY", "exchDisp": "NYSE"},
+    ])
+
+    first = search_tickers("f")
+    second = search_tickers("f")
+
+    assert mock_search_cls.call_count == 1
+    assert first.results[0].symbol == "F"
+    assert second.results[0].symbol == "F"
+
+
+@patch("src.service.yf.Search")
+def test_search_repeated_query_is_cached(mock_search_cls):
+    mock_search_cls.return_value = _make_search_mock([
+        {"symbol": "BTC-USD", "longname": "Bitcoin USD", "quoteType": "CRYPTOCURRENCY", "exchDisp": "CCC"},
+    ])
+
+    search_tickers("bitcoin")
+    search_tickers("Bitcoin ")
+
+    assert mock_search_cls.call_count == 1
+
+
+@patch("src.service.yf.Search")
+def test_search_results_are_merged_into_index(mock_search_cls):
+    mock_search_cls.return_value = _make_search_mock([
+        {"symbol": "ZZZQ3.SA", "longname": "Zzzq Participações", "quoteType": "EQUITY", "exchDisp": "São Paulo"},
+    ])
+
+    search_tickers("zzzq")
+    result = search_tickers("zz")
+
+    assert [r.symbol for r in result.results] == ["ZZZQ3.SA"]
+
+
+@patch("src.service.yf.Search")
+def test_search_longer_prefix_still_goes_to_yahoo(mock_search_cls):
+    # Yahoo's search is fuzzy: few results for "zzzq" do not mean it returned every "zzzq3..." symbol
+    mock_search_cls.return_value = _make_search_mock([
+        {"symbol": "ZZZQ3.SA", "longname": "Zzzq Participações", "quoteType": "EQUITY", "exchDisp": "São Paulo"},
+    ])
+
+    search_tickers("zzzq")
+    result = search_tickers("zzzq3")
+
+    assert mock_search_cls.call_count == 2
+    assert result.results[0].symbol == "ZZZQ3.SA"
+
+
+# ---------------------------------------------------------------------------
+# Shared series store
+# ---------------------------------------------------------------------------
+
+def _daily_df(closes: list[float], start_iso: str) -> pd.DataFrame:
+    index = pd.date_range(start=start_iso, periods=len(closes), freq="1D", tz="UTC")
+    return pd.DataFrame({"Close": closes}, index=index)
+
+
+@patch("src.service.yf.Ticker")
+def test_closed_range_is_served_from_store_after_first_fetch(mock_ticker_cls):
+    mock_ticker_cls.return_value.history.return_value = _daily_df([10.0, 11.0, 12.0], "2024-03-01")
+    start, end = datetime(2024, 3, 1, tzinfo=timezone.utc), datetime(2024, 3, 4, tzinfo=timezone.utc)
+
+    fetch_ticker("AAPL", start, end)
+    # Another worker: nothing in its in-process caches, same files on disk
+    service._history_cache.clear()
+    result = fetch_ticker("AAPL", start, end)
+
+    assert mock_ticker_cls.return_value.history.call_count == 1
+    assert [p.price for p in result.prices] == [10.0, 11.0, 12.0]
+
+
+@patch("src.service.yf.Ticker")
+def test_yahoo_errors_are_raised_not_read_as_empty(mock_ticker_cls):
+    assert yf.config.debug.hide_exceptions is False
+    history = mock_ticker_cls.return_value.history
+    history.side_effect = YFPricesMissingError("AAPL", "(1d 2024-03-01 -> 2024-03-04)(Yahoo status_code = 503)")
+    start, end = datetime(2024, 3, 1, tzinfo=timezone.utc), datetime(2024, 3, 4, tzinfo=timezone.utc)
+
+    with pytest.raises(YFPricesMissingError):
+        fetch_ticker("AAPL", start, end)
+
+    # Yahoo answering with no bars (or not knowing the symbol) is still just empty
+    history.side_effect = YFPricesMissingError("AAPL", "(1d 2024-03-01 -> 2024-03-04)")
+    assert fetch_ticker("AAPL", start, end).prices == []
+    history.side_effect = YFTzMissingError("NOPE")
+    assert fetch_ticker("NOPE", start, end).prices == []
+
+
+@patch("src.service.yf.Ticker")
+def test_empty_answer_is_not_stored(mock_ticker_cls):
+    history = mock_ticker_cls.return_value.history
+    history.return_value = pd.DataFrame()
+    start, end = datetime(2024, 3, 1, tzinfo=timezone.utc), datetime(2024, 3, 4, tzinfo=timezone.utc)
+    fetch_ticker("AAPL", start, end)
+
+    history.return_value = _daily_df([10.0, 11.0, 12.0], "2024-03-01")
+    service._history_cache.clear()
+    result = fetch_ticker("AAPL", start, end)
+
+    assert history.call_count == 2
+    assert [p.price for p in result.prices] == [10.0, 11.0, 12.0]
+
+
+@patch("src.service.yf.Ticker")
+def test_extending_a_stored_range_fetches_only_the_tail(mock_ticker_cls):
+    history = mock_ticker_cls.return_value.history
+    history.return_value = _daily_df([float(i) for i in range(1, 31)], "2024-03-01")
+    start = datetime(2024, 3, 1, tzinfo=timezone.utc)
+    fetch_ticker("AAPL", start, datetime(2024, 3, 31, tzinfo=timezone.utc))
+
+    history.return_value = _daily_df([float(i) for i in range(24, 36)], "2024-03-24")
+    result = fetch_ticker("AAPL", start, datetime(2024, 4, 5, tzinfo=timezone.utc))
+
+    tail = history.call_args.kwargs
+    # The last NYSE session the store covers is Thu 2024-03-28 (Friday the 29th was Good Friday)
+    assert tail["start"] == datetime(2024, 3, 28, tzinfo=timezone.utc)
+    assert tail["end"] == datetime(2024, 4, 5, tzinfo=timezone.utc)
+    assert [p.price for p in result.prices] == [float(i) for i in range(1, 36)]
+
+
+@patch("src.service.yf.Ticker")
+def test_extending_a_series_without_calendar_overlaps_a_week(mock_ticker_cls):
+    history = mock_ticker_cls.return_value.history
+    history.return_value = _daily_df([float(i) for i in range(1, 31)], "2024-03-01")
+    start = datetime(2024, 3, 1, tzinfo=timezone.utc)
+    fetch_ticker("VOD.L", start, datetime(2024, 3, 31, tzinfo=timezone.utc))
+
+    history.return_value = _daily_df([float(i) for i in range(24, 36)], "2024-03-24")
+    fetch_ticker("VOD.L", start, datetime(2024, 4, 5, tzinfo=timezone.utc))
+
+    assert history.call_args.kwargs["start"] == datetime(2024, 3, 24, tzinfo=timezone.utc)
+
+
+@patch("src.service.yf.Ticker")
+def test_expired_stored_range_is_fetched_again_whole(mock_ticker_cls, monkeypatch):
+    history = mock_ticker_cls.return_value.history
+    history.return_value = _daily_df([float(i) for i in range(1, 31)], "2024-03-01")
+    start = datetime(2024, 3, 1, tzinfo=timezone.utc)
+    fetch_ticker("AAPL", start, datetime(2024, 3, 31, tzinfo=timezone.utc))
+
+    # A 2:1 split since: Yahoo now answers every past close halved
+    monkeypatch.setattr(service, "STORE_MAX_AGE", 0.0)
+    history.return_value = _daily_df([i / 2 for i in range(1, 36)], "2024-03-01")
+    result = fetch_ticker("AAPL", start, datetime(2024, 4, 5, tzinfo=timezone.utc))
+
+    assert history.call_args.kwargs["start"] == start
+    assert [p.price for p in result.prices] == [i / 2 for i in range(1, 36)]
+
+
+@patch("src.service.yf.Ticker")
+def test_extending_a_stored_range_over_closed_days_skips_yahoo(mock_ticker_cls):
+    history = mock_ticker_cls.return_value.history
+    history.return_value = _daily_df([10.0, 11.0, 12.0, 13.0, 14.0], "2024-03-04")
+    start = datetime(2024, 3, 4, tzinfo=timezone.utc)
+    fetch_ticker("AAPL", start, datetime(2024, 3, 9, tzinfo=timezone.utc))
+
+    # Sat 9th and Sun 10th: NYSE is closed, the store already has everything there is
+    result = fetch_ticker("AAPL", start, datetime(2024, 3, 11, tzinfo=timezone.utc))
+
+    assert history.call_count == 1
+    assert [p.price for p in result.prices] == [10.0, 11.0, 12.0, 13.0, 14.0]
+
+
+@patch("src.service.yf.Ticker")
+def test_fetch_last_price_inside_stored_range_skips_yahoo(mock_ticker_cls):
+    history = mock_ticker_cls.return_value.history
+    history.return_value = _daily_df([10.0, 11.0, 12.0], "2024-03-01")
+    fetch_ticker("AAPL", datetime(2024, 3, 1, tzinfo=timezone.utc), datetime(2024, 3, 4, tzinfo=timezone.utc))
+
+    result = fetch_last_price("AAPL", datetime(2024, 3, 1, tzinfo=timezone.utc))
+
+    assert history.call_count == 1
+    assert result.price == 10.0
+    assert result.datetime == datetime(2024, 3, 1)
+
+
+@patch("src.service.yf.Ticker")
+def test_fetch_last_price_on_closed_day_resolves_to_previous_session(mock_ticker_cls):
+    history = mock_ticker_cls.return_value.history
+    history.return_value = _daily_df([30.0], "2024-03-28")
+
+    # Good Friday 2024: B3 is closed, the answer is Thursday's close
+    result = fetch_last_price("PETR4.SA", datetime(2024, 3, 29, 15, tzinfo=timezone.utc))
+
+    assert history.call_args.kwargs["start"] == datetime(2024, 3, 28, tzinfo=timezone.utc)
+    assert history.call_args.kwargs["end"] == datetime(2024, 3, 29, tzinfo=timezone.utc)
+    assert result.price == 30.0
+    assert result.datetime == datetime(2024, 3, 28)
+
+
+# ---------------------------------------------------------------------------
+# Compare
+# ---------------------------------------------------------------------------
+
+def _bcb_response(rates: dict[str, float]) -> MagicMock:
+    resp = MagicMock()
+    resp.json.return_value = [{"data": day, "valor": str(value)} for day, value in rates.items()]
+    resp.content = b"[]"
+    return resp
+
+
+@patch("src.service.requests.get")
+@patch("src.service.yf.Ticker")
+def test_compare_aligns_ticker_and_selic_rebased(mock_ticker_cls, mock_get):
+    # Crypto trades on the weekend (2024-03-02/03), BCB does not
+    mock_ticker_cls.return_value.history.return_value = _daily_df([10.0, 11.0, 12.0, 13.0], "2024-03-01")
+    mock_get.return_value = _bcb_response({"01/03/2024": 1.0, "04/03/2024": 1.0})
+    start, end = datetime(2024, 3, 1), datetime(2024, 3, 4)
+
+    result = service.compare(["BTC-USD"], [SelicScenario(percentage=100.0)], start, end)
+
+    assert result.columns == ["BTC-USD", "SELIC 100%"]
+    assert [d.isoformat() for d in result.dates] == ["2024-03-01", "2024-03-02", "2024-03-03", "2024-03-04"]
+    assert result.values[0] == pytest.approx([1.0, 1.1, 1.2, 1.3])
+    assert result.values[1] == pytest.approx([1.0, 1.0, 1.0, 1.01])
+
+
+def _compounded_day_by_day(rates: list[float], days_elapsed: list[int], percentage: float) -> list[float]:
+    cumulative, values = 1.0, []
+    for rate, days in zip(rates, days_elapsed):
+        cumulative *= 1.0 + rate / 100.0 * (percentage / 100.0)
+        ir = 0.225 if days <= 180 else 0.20 if days <= 360 else 0.175 if days <= 720 else 0.15
+        values.append(1.0 + (cumulative - 1.0) * (1.0 - ir))
+    return values
+
+
+@patch("src.service.requests.get")
+def test_selic_curve_matches_multipliers(mock_get):
+    rates = {f"{day:02d}/01/2024": 0.05 for day in range(2, 31)}
+    mock_get.return_value = _bcb_response(rates)
+    start, end = datetime(2023, 6, 1), datetime(2024, 1, 31)
+
+    multipliers = service.fetch_selic(start, end, ir=True, percentage=110.0).multipliers
+    days_elapsed = [(datetime(2024, 1, day) - start).days for day in range(2, 31)]
+
+    assert [m.value for m in multipliers[:29]] == pytest.approx(_compounded_day_by_day([0.05] * 29, days_elapsed, 110.0))
+    # Forward-filled past BCB's last day up to end
+    assert multipliers[-1].datetime == datetime(2024, 1, 31)
+    assert multipliers[-1].value == multipliers[28].value
+
+
+@patch("src.service.requests.get")
+def test_selic_curve_is_extended_by_new_days_not_rebuilt(mock_get):
+    start = datetime(2024, 1, 2)
+    mock_get.return_value = _bcb_response({f"{day:02d}/01/2024": 0.04 + day / 1000 for day in range(2, 20)})
+    service.fetch_selic(start, datetime(2024, 1, 19), ir=True, percentage=110.0)
+    mock_get.return_value = _bcb_response({f"{day:02d}/01/2024": 0.04 + day / 1000 for day in range(12, 31)})
+    rates = service._selic_series(start, datetime(2024, 1, 30))
+
+    with patch.object(service._SelicCurve, "build", wraps=service._SelicCurve.build) as build:
+        extended = service._selic_curve(rates, start, 110.0, True)
+        shorter = service._selic_curve(rates.between(0, int(datetime(2024, 1, 10, tzinfo=timezone.utc).timestamp())), start, 110.0, True)
+    service._curve_cache.clear()
+    rebuilt = service._selic_curve(rates, start, 110.0, True)
+
+    assert build.call_count == 0
+    assert len(extended) == 29
+    assert extended.values.tolist() == rebuilt.values.tolist()
+    assert shorter.values.tolist() == rebuilt.values[:len(shorter)].tolist()
+
+
+@patch("src.service.requests.get")
+def test_selic_over_a_weekend_past_stored_range_skips_bcb(mock_get):
+    mock_get.return_value = _bcb_response({f"{day:02d}/03/2024": 0.04 for day in range(4, 9)})
+    service._selic_series(datetime(2024, 3, 4), datetime(2024, 3, 8))
+
+    rates = service._selic_series(datetime(2024, 3, 4), datetime(2024, 3, 10))
+
+    assert mock_get.call_count == 1
+    assert len(rates) == 5
+
+
+@patch("src.service.yf.Ticker")
+def test_compare_ticker_without_data_raises(mock_ticker_cls):
+    mock_ticker_cls.return_value.history.return_value = pd.DataFrame()
+
+    with pytest.raises(ValueError):
+        service.compare(["NOPE"], [], datetime(2024, 3, 1), datetime(2024, 3, 4))
+
+
+# ---------------------------------------------------------------------------
+# Currency conversion
+# ---------------------------------------------------------------------------
+
+@pytest.mark.parametrize("ticker, currency", [
+    ("PETR4.SA", "BRL"), ("AAPL", "USD"), ("BTC-USD", "USD"), ("ETH-BRL", "BRL"), ("USDBRL=X", "BRL"),
+    ("BRK-B", "USD"), ("^BVSP", "BRL"), ("SAP.DE", "EUR"), ("BTC-USDT", "USD"), ("ETH-USDC", "USD"),
+    ("SOL-FDUSD", "USD"),
+])
+def test_asset_currency(ticker, currency):
+    assert service.asset_currency(ticker) == currency
+
+
+@patch("src.service.yf.Ticker")
+def test_fetch_ticker_converts_with_asof_fx_rate(mock_ticker_cls):
+    frames = {
+        "AAPL": _daily_df([100.0, 110.0, 120.0], "2024-03-04"),
+        # No FX bar on 03-05: the 03-04 rate carries over
+        "USDBRL=X": pd.DataFrame({"Close": [5.0, 5.5]}, index=pd.DatetimeIndex(["2024-03-04", "2024-03-06"], tz="UTC")),
+    }
+    mock_ticker_cls.side_effect = lambda symbol: MagicMock(**{"history.return_value": frames[symbol]})
+
+    result = fetch_ticker("AAPL", datetime(2024, 3, 4, tzinfo=timezone.utc), datetime(2024, 3, 7, tzinfo=timezone.utc), "brl")
+
+    assert [p.price for p in result.prices] == pytest.approx([500.0, 550.0, 660.0])
+    assert result.multipliers[-1].value == pytest.approx(660.0 / 500.0)
+
+
+@patch("src.service.yf.Ticker")
+def test_fetch_ticker_converts_stablecoin_pairs_through_usd(mock_ticker_cls):
+    frames = {
+        "BTC-USDT": _daily_df([60_000.0, 61_000.0], "2024-03-04"),
+        "USDBRL=X": _daily_df([5.0, 5.0], "2024-03-04"),
+    }
+    mock_ticker_cls.side_effect = lambda symbol: MagicMock(**{"history.return_value": frames[symbol]})
+
+    result = fetch_ticker("BTC-USDT", datetime(2024, 3, 4, tzinfo=timezone.utc), datetime(2024, 3, 6, tzinfo=timezone.utc), "BRL")
+
+    assert [p.price for p in result.prices] == pytest.approx([300_000.0, 305_000.0])
+    assert sorted(c.args[0] for c in mock_ticker_cls.call_args_list) == ["BTC-USDT", "USDBRL=X"]
+
+@patch("src.service.yf.Ticker")
+def test_fetch_ticker_same_currency_skips_fx(mock_ticker_cls):
+    mock_ticker_cls.return_value.history.return_value = _daily_df([30.0, 31.0], "2024-03-04")
+
+    fetch_ticker("PETR4.SA", datetime(2024, 3, 4, tzinfo=timezone.utc), datetime(2024, 3, 6, tzinfo=timezone.utc), "BRL")
+
+    mock_ticker_cls.assert_called_once_with("PETR4.SA")
+
+
+@patch("src.service.requests.get")
+@patch("src.service.yf.Ticker")
+def test_analyze_reports_statistics_per_ticker(mock_ticker_cls, mock_get):
+    mock_ticker_cls.return_value.history.return_value = _daily_df([10.0, 12.0, 9.0, 15.0], "2024-03-01")
+    mock_get.return_value = _bcb_response({"01/03/2024": 0.04, "04/03/2024": 0.04})
+
+    result = service.analyze(["BTC-USD"], datetime(2024, 3, 1), datetime(2024, 3, 4), [1, 30])
+
+    stats = result.tickers[0]
+    assert stats.points == 4
+    assert stats.total_return == pytest.approx(0.5)
+    assert stats.max_drawdown == pytest.approx(-0.25)
+    assert stats.sharpe is not None
+    assert stats.rolling[0].latest == pytest.approx(15.0 / 9.0 - 1.0)
+    assert stats.rolling[1].latest is None
+
+
+# ---------------------------------------------------------------------------
+# Portfolio valuation
+# ---------------------------------------------------------------------------
+
+@patch("src.service.yf.Ticker")
+def test_value_portfolio_buys_and_sells(mock_ticker_cls):
+    mock_ticker_cls.return_value.history.return_value = _daily_df([10.0, 11.0, 12.0, 13.0], "2024-03-01")
+    events = [
+        PortfolioEvent(event_type="buy", date=date(2024, 3, 1), ticker="PETR4.SA", quantity=10, asset_unit_price=10.0, fees=1.0),
+        PortfolioEvent(event_type="sell", date=date(2024, 3, 3), ticker="PETR4.SA", quantity=5, asset_unit_price=12.0),
+    ]
+
+    result = service.value_portfolio(events, "BRL", date(2024, 3, 4))
+
+    assert result.value == pytest.approx([100.0, 110.0, 60.0, 65.0])
+    assert result.invested == pytest.approx([101.0, 101.0, 41.0, 41.0])
+    assert result.twr[-1] == pytest.approx(0.3)
+
+
+@patch("src.service.requests.get")
+def test_value_portfolio_fixed_income_accrues_selic(mock_get):
+    mock_get.return_value = _bcb_response({"01/03/2024": 1.0, "04/03/2024": 1.0})
+    events = [PortfolioEvent(event_type="fixed_income", date=date(2024, 3, 1), fiat_amount=1000.0)]
+
+    result = service.value_portfolio(events, "BRL", date(2024, 3, 4))
+
+    assert result.value == pytest.approx([1000.0, 1000.0, 1000.0, 1010.0])
+    assert result.invested == pytest.approx([1000.0] * 4)
+    assert result.twr[-1] == pytest.approx(0.01)
+
+
+@patch("src.service.requests.get")
+@patch("src.service.yf.Ticker")
+def test_value_portfolio_foreign_fixed_income_accrues_in_brl(mock_ticker_cls, mock_get):
+    mock_get.return_value = _bcb_response({"01/03/2024": 1.0, "04/03/2024": 1.0})
+    mock_ticker_cls.return_value.history.return_value = _daily_df([0.2] * 11, "2024-02-23")
+    events = [PortfolioEvent(event_type="fixed_income", date=date(2024, 3, 1), fiat_amount=100.0, currency="USD")]
+
+    result = service.value_portfolio(events, "USD", date(2024, 3, 4))
+
+    # 100 USD buys 500 BRL of SELIC, worth 505 BRL (101 USD) after a 1% day
+    assert mock_ticker_cls.call_args.args == ("BRLUSD=X",)
+    assert result.value == pytest.approx([100.0, 100.0, 100.0, 101.0])
+    assert result.invested == pytest.approx([100.0] * 4)
+
+
+@patch("src.service.yf.Ticker")
+def test_value_portfolio_converts_foreign_assets(mock_ticker_cls):
+    frames = {
+        "AAPL": _daily_df([100.0, 110.0], "2024-03-04"),
+        "USDBRL=X": _daily_df([5.0, 5.0], "2024-03-04"),
+    }
+    mock_ticker_cls.side_effect = lambda symbol: MagicMock(**{"history.return_value": frames[symbol]})
+    events = [PortfolioEvent(event_type="buy", date=date(2024, 3, 4), ticker="AAPL", quantity=1, asset_unit_price=100.0)]
+
+    result = service.value_portfolio(events, "BRL", date(2024, 3, 5))
+
+    assert result.value == pytest.approx([500.0, 550.0])
+    assert result.invested == pytest.approx([500.0, 500.0])
+
+
+def test_value_portfolio_rejects_incomplete_trade():
+    with pytest.raises(ValueError):
+        service.value_portfolio([PortfolioEvent(event_type="buy", date=date(2024, 3, 1), ticker="AAPL")])
+
+
+
+@patch("src.service.yf.Ticker")
+def test_value_portfolio_rejects_selling_more_than_held(mock_ticker_cls):
+    events = [
+        PortfolioEvent(event_type="buy", date=date(2024, 3, 1), ticker="PETR4.SA", quantity=10, asset_unit_price=10.0),
+        PortfolioEvent(event_type="sell", date=date(2024, 3, 2), ticker="PETR4.SA", quantity=4, asset_unit_price=11.0),
+        PortfolioEvent(event_type="sell", date=date(2024, 3, 3), ticker="PETR4.SA", quantity=7, asset_unit_price=12.0),
+    ]
+
+    with pytest.raises(ValueError, match="PETR4.SA exceed the quantity held on 2024-03-03"):
+        service.value_portfolio(events, "BRL", date(2024, 3, 4))
+    # Rejected before anything is fetched
+    mock_ticker_cls.assert_not_called()
+
+@patch("src.service.yf.Ticker")
+def test_fetch_latest_prices_one_call_per_distinct_ticker(mock_ticker_cls):
+    mock_ticker_cls.side_effect = lambda symbol: MagicMock(**{
+        "history.return_value": pd.DataFrame() if symbol == "DELISTED" else _daily_df([1.0, 2.0], "2024-03-01")
+    })
+
+    prices = service.fetch_latest_prices(["AAPL", "AAPL", "BTC-USD", "DELISTED"])
+
+    assert sorted(prices) == ["AAPL", "BTC-USD"]
+    assert prices["AAPL"].price == 2.0
+    assert mock_ticker_cls.call_count == 3
@@ -0,0 +1,119 @@
+import multiprocessing
+import os
+
+import numpy as np
+import pytest
+
+from src.storage import SeriesStore, StoredSeries, merge
+
+
+def _series(epochs, values, covered_from, covered_to, fetched_at=1.0) -> StoredSeries:
+    return StoredSeries(
+        np.array(epochs, dtype=np.int64), np.array(values, dtype=np.float64), covered_from, covered_to, fetched_at
+    )
+
+
+def test_write_then_read_roundtrip(tmp_path):
+    store = SeriesStore(tmp_path)
+    store.write("prices", "AAPL@1d", _series([10, 20, 30], [1.0, 2.0, 3.0], 0, 40))
+
+    stored = store.read("prices", "AAPL@1d")
+
+    assert stored.epochs.tolist() == [10, 20, 30]
+    assert stored.values.tolist() == [1.0, 2.0, 3.0]
+    assert (stored.covered_from, stored.covered_to) == (0, 40)
+
+
+def test_read_missing_returns_none(tmp_path):
+    assert SeriesStore(tmp_path).read("prices", "NOPE@1d") is None
+
+
+def test_read_maps_without_copying(tmp_path):
+    store = SeriesStore(tmp_path)
+    store.write("prices", "AAPL@1d", _series([10, 20], [1.0, 2.0], 0, 30))
+
+    stored = store.read("prices", "AAPL@1d")
+
+    assert not stored.epochs.flags.writeable
+    assert not stored.epochs.flags.owndata
+    # Unchanged files are not remapped
+    assert store.read("prices", "AAPL@1d") is stored
+
+
+def test_open_mappings_are_capped(tmp_path):
+    store = SeriesStore(tmp_path, max_mapped_files=8)
+    for i in range(50):
+        store.write("prices", f"T{i}@1d", _series([10], [1.0], 0, 20))
+    open_before = len(os.listdir("/proc/self/fd"))
+
+    for i in range(50):
+        store.read("prices", f"T{i}@1d")
+
+    assert len(os.listdir("/proc/self/fd")) - open_before <= 8
+
+
+def test_between_returns_half_open_window():
+    series = _series([10, 20, 30, 40], [1.0, 2.0, 3.0, 4.0], 0, 50)
+
+    window = series.between(20, 40)
+
+    assert window.epochs.tolist() == [20, 30]
+    assert window.values.tolist() == [2.0, 3.0]
+
+
+def test_merge_overlapping_prefers_new_points():
+    existing = _series([10, 20, 30], [1.0, 2.0, 3.0], 0, 35)
+    new = _series([30, 40], [3.5, 4.0], 25, 50, fetched_at=2.0)
+
+    merged = merge(existing, new)
+
+    assert merged.epochs.tolist() == [10, 20, 30, 40]
+    assert merged.values.tolist() == [1.0, 2.0, 3.5, 4.0]
+    assert (merged.covered_from, merged.covered_to, merged.fetched_at) == (0, 50, 2.0)
+    # Points from the first fetch are still there
+    assert merged.first_fetched_at == 1.0
+
+
+def test_merge_disjoint_replaces():
+    existing = _series([10], [1.0], 0, 20)
+    new = _series([100], [5.0], 90, 110)
+
+    assert merge(existing, new) is new
+
+
+def test_replace_drops_stored_points(tmp_path):
+    store = SeriesStore(tmp_path)
+    store.write("prices", "AAPL@1d", _series([10, 20, 30], [1.0, 2.0, 3.0], 0, 40))
+
+    store.write("prices", "AAPL@1d", _series([20], [1.0], 15, 25, fetched_at=2.0), replace=True)
+    stored = store.read("prices", "AAPL@1d")
+
+    assert stored.epochs.tolist() == [20]
+    assert (stored.covered_from, stored.covered_to, stored.first_fetched_at) == (15, 25, 2.0)
+
+
+def test_key_is_sanitized(tmp_path):
+    path = SeriesStore(tmp_path).path("prices", "../../etc/passwd")
+
+    assert path.parent == tmp_path / "prices"
+
+
+def _write_from_child(root: str) -> None:
+    SeriesStore(root).write("prices", "PETR4.SA@1d", _series([10, 20], [30.0, 31.0], 0, 30))
+
+
+def test_writes_from_another_process_are_visible(tmp_path):
+    store = SeriesStore(tmp_path)
+    assert store.read("prices", "PETR4.SA@1d") is None
+
+    child = multiprocessing.get_context("fork").Process(target=_write_from_child, args=(str(tmp_path),))
+    child.start()
+    child.join(10)
+
+    assert child.exitcode == 0
+    assert store.read("prices", "PETR4.SA@1d").values.tolist() == [30.0, 31.0]
+
+
+@pytest.mark.parametrize("key", ["BTC-USD@1d", "^BVSP@1d", "USDBRL=X@1d"])
+def test_symbol_characters_survive_in_file_name(tmp_path, key):
+    assert SeriesStore(tmp_path).path("prices", key).name == f"{key}.bin"